@@ -2,12 +2,13 @@ import os
 import tempfile
 from flashlog.app import create_app
 
-# Create app instance
-app = create_app()
-
-# Configure for serverless environment
-app.config['UPLOAD_FOLDER'] = '/tmp'  # Use temporary directory for Vercel
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Create app instance configured for the serverless environment
+app = create_app({
+    'UPLOAD_FOLDER': '/tmp',  # Use temporary directory for Vercel
+    'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16MB max file size
+    'ANALYSIS_WORKERS': 0,  # No long-lived worker processes in serverless; run jobs inline
+    'SUMMARIZER_WARMUP': False  # Don't load the summarization model on every cold start
+})
 
 # Ensure upload directory exists
 os.makedirs('/tmp', exist_ok=True)
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect
+from flask import Flask, render_template, request, redirect, flash
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -6,9 +6,19 @@ import secrets
 import os
 from datetime import timedelta
 
-def create_app():
-    app = Flask(__name__)
+def create_app(config=None):
+    from .helpers import DEFAULT_MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES
+
+    # Static files live next to the templates in flashlog/, not inside the app package
+    app = Flask(__name__, static_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static')))
     app.config['UPLOAD_FOLDER'] = 'uploads'
+    app.config['MAX_UPLOAD_BYTES'] = DEFAULT_MAX_UPLOAD_BYTES  # Enforced while streaming uploads to disk
+    app.config['ANALYSIS_WORKERS'] = 2  # Background worker processes for analysis jobs (0 = run inline)
+    app.config['SUMMARIZER_WARMUP'] = True  # Load the T5 summarization model in the background at startup
+    app.config.update(config or {})
+    # Werkzeug refuses larger bodies from their Content-Length, before receiving them
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_BYTES'] + MULTIPART_OVERHEAD_BYTES
     
     # Force session cookie settings for local development
     app.config['SESSION_COOKIE_SECURE'] = False  # Always False for local dev
@@ -74,6 +84,12 @@ def create_app():
     def forbidden_error(error):
         return render_template('errors/403.html'), 403
 
+    @app.errorhandler(413)
+    def request_too_large(error):
+        max_mb = app.config['MAX_UPLOAD_BYTES'] // (1024 * 1024)
+        flash(f'File too large (max {max_mb}MB)', 'error')
+        return redirect(request.referrer or '/')
+
     # Register blueprints
     from .routes import main
     from .auth import auth
@@ -83,6 +99,7 @@ def create_app():
     from .history import history_bp
     from .kibana import kibana_bp
     from .upload import upload_bp
+    from .jobs import jobs_bp
     
     app.register_blueprint(main)
     app.register_blueprint(auth, url_prefix='/auth')
@@ -92,6 +109,14 @@ def create_app():
     app.register_blueprint(history_bp)
     app.register_blueprint(kibana_bp)
     app.register_blueprint(upload_bp)
+    app.register_blueprint(jobs_bp)
+
+    from . import metrics
+    metrics.init_app(app, limiter)
+
+    if app.config['SUMMARIZER_WARMUP']:
+        from .summarizer import warm_up
+        warm_up()
 
     @app.before_request
     def enforce_https():
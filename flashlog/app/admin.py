@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
 from werkzeug.security import generate_password_hash, check_password_hash
 from .auth import admin_required, get_db_connection, login_required
+from .session_cache import session_cache, revoke_user_sessions
 import sqlite3
 from datetime import datetime
 import re
@@ -178,6 +179,7 @@ def delete_user(user_id):
         conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
         conn.commit()
         conn.close()
+        session_cache.invalidate_user(user_id)
     except sqlite3.IntegrityError as e:
         conn.close()
         flash(f'Error deleting user: Database constraint violation. {str(e)}', 'error')
@@ -229,6 +231,9 @@ def toggle_user_status(user_id):
     conn.execute('UPDATE users SET is_active = ? WHERE id = ?', (new_status, user_id))
     conn.commit()
     conn.close()
+    if not new_status:
+        # A deactivated user must not stay logged in through existing sessions
+        revoke_user_sessions(user_id)
     
     # Log the status change activity
     try:
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# Dashboard aggregation for a finished run. Everything is computed in one pass
+# over the results: rows are assigned to time buckets once, per-bucket totals
+# come from np.bincount and running values from cumulative sums, so the cost is
+# O(rows) regardless of how many points the charts show.
+
+TIME_BUCKETS = 60
+ERROR_PATTERN = r'\b(?:error|exception|fail)\b'
+WARNING_PATTERN = r'\b(?:warning|warn)\b'
+SEVERITY_PATTERN = r'\b(?:error|warning|info|debug|critical)\b'
+
+
+def _bucket_rows(df, buckets):
+    """Return (bucket index per row, time point labels, time_range) for a frame sorted by time"""
+    n = len(df)
+    if 'timestamp' in df.columns:
+        timestamps = pd.to_datetime(df['timestamp'], errors='coerce')
+        if timestamps.notna().any():
+            valid = timestamps.notna().to_numpy()
+            ns = timestamps.to_numpy(dtype='datetime64[ns]').astype('int64')
+            start, end = ns[valid].min(), ns[valid].max()
+            edges = np.linspace(start, end, buckets + 1)
+            codes = np.clip(np.searchsorted(edges, ns, side='right') - 1, 0, buckets - 1)
+            # Rows without a usable timestamp are kept out of the time series
+            codes = np.where(valid, codes, -1)
+            points = pd.to_datetime(edges[:-1].astype('int64'))
+            interval = pd.Timedelta(int((end - start) / buckets), unit='ns')
+            time_range = {
+                'start': str(pd.Timestamp(start)),
+                'end': str(pd.Timestamp(end)),
+                'interval': str(interval)
+            }
+            return codes, [t.strftime('%H:%M:%S') for t in points], time_range
+    # No timestamps: bucket by position in the file
+    buckets = max(1, min(buckets, n))
+    codes = (np.arange(n) * buckets) // max(n, 1)
+    starts = [(i * n + buckets - 1) // buckets for i in range(buckets)]
+    time_range = {'start': 'row 1', 'end': f'row {n}', 'interval': f'{max(n // buckets, 1)} rows'}
+    return codes, [f'#{s + 1}' for s in starts], time_range
+
+
+def _per_bucket(codes, buckets, weights=None):
+    mask = codes >= 0
+    if weights is not None:
+        weights = np.asarray(weights, dtype='float64')[mask]
+    return np.bincount(codes[mask], weights=weights, minlength=buckets)[:buckets]
+
+
+def aggregate_results(results, buckets=TIME_BUCKETS):
+    """Compute dashboard metrics, time series and summary for a run's results"""
+    df = results.copy() if isinstance(results, pd.DataFrame) else pd.DataFrame(list(results))
+    total_logs = len(df)
+
+    if 'timestamp' in df.columns:
+        sort_keys = pd.to_datetime(df['timestamp'], errors='coerce').to_numpy(dtype='datetime64[ns]').astype('int64')
+        df = df.iloc[np.argsort(sort_keys, kind='stable')].reset_index(drop=True)
+
+    is_anomaly = (pd.to_numeric(df['is_anomaly'], errors='coerce').fillna(0) > 0).to_numpy(dtype='int64') \
+        if 'is_anomaly' in df.columns else np.zeros(total_logs, dtype='int64')
+    lines = df['logline'].astype(str) if 'logline' in df.columns else pd.Series([''] * total_logs, dtype=str)
+    errors = lines.str.contains(ERROR_PATTERN, case=False, regex=True).to_numpy(dtype='int64')
+    warnings = lines.str.contains(WARNING_PATTERN, case=False, regex=True).to_numpy(dtype='int64')
+    severity_lines = int(lines.str.contains(SEVERITY_PATTERN, case=False, regex=True).sum())
+    lengths = lines.str.len().to_numpy(dtype='float64')
+    first_seen = (~lines.duplicated()).to_numpy(dtype='int64')
+
+    if 'processing_time_seconds' in df.columns:
+        processing = pd.to_numeric(df['processing_time_seconds'], errors='coerce').to_numpy(dtype='float64')
+    else:
+        processing = np.full(total_logs, np.nan)
+    has_processing = ~np.isnan(processing)
+    processing_filled = np.where(has_processing, processing, 0.0)
+
+    anomaly_count = int(is_anomaly.sum())
+    unique_patterns = int(first_seen.sum())
+    avg_length = float(lengths.mean()) if total_logs else 0.0
+    error_count = int(errors.sum())
+    warning_count = int(warnings.sum())
+    valid_processing = processing[has_processing]
+    avg_processing = float(valid_processing.mean()) if len(valid_processing) else 0.0
+    max_processing = float(valid_processing.max()) if len(valid_processing) else 0.0
+    processing_variance = float(valid_processing.var(ddof=1)) if len(valid_processing) > 1 else 0.0
+
+    if total_logs:
+        codes, time_points, time_range = _bucket_rows(df, buckets)
+        buckets = len(time_points)
+    else:
+        codes, time_points, time_range = np.zeros(0, dtype='int64'), [], {'start': None, 'end': None, 'interval': None}
+        buckets = 0
+
+    rows = _per_bucket(codes, buckets)
+    anomalies = _per_bucket(codes, buckets, is_anomaly)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anomaly_rate = np.where(rows > 0, anomalies / rows * 100, 0.0)
+
+    # Running totals up to the end of each bucket
+    cum_rows = np.cumsum(rows)
+    cum_errors = np.cumsum(_per_bucket(codes, buckets, errors))
+    cum_warnings = np.cumsum(_per_bucket(codes, buckets, warnings))
+    cum_unique = np.cumsum(_per_bucket(codes, buckets, first_seen))
+    cum_length = np.cumsum(_per_bucket(codes, buckets, lengths))
+    cum_n = np.cumsum(_per_bucket(codes, buckets, has_processing))
+    cum_sum = np.cumsum(_per_bucket(codes, buckets, processing_filled))
+    cum_sq = np.cumsum(_per_bucket(codes, buckets, processing_filled ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        complexity = np.where(cum_rows > 0, cum_unique * (cum_length / cum_rows) / 100, 0.0)
+        variance = np.where(cum_n > 1, (cum_sq - cum_sum ** 2 / cum_n) / (cum_n - 1), 0.0)
+    variance = np.maximum(variance, 0.0) * 1000  # ms
+
+    return {
+        'metrics': {
+            'host_count': unique_patterns,
+            'utc_sources': severity_lines,
+            'average_offset': int(avg_processing * 1000),
+            'max_offset': int(max_processing * 1000)
+        },
+        'time_series': {
+            'time_points': time_points,
+            'anomaly_rate': {
+                'label': 'Anomaly Rate (%)',
+                'data': [round(float(v), 2) for v in anomaly_rate],
+                'color': '#10B981'  # Green
+            },
+            'severity_distribution': {
+                'errors': {
+                    'label': 'Error Logs',
+                    'data': [int(v) for v in cum_errors],
+                    'color': '#EF4444'  # Red
+                },
+                'warnings': {
+                    'label': 'Warning Logs',
+                    'data': [int(v) for v in cum_warnings],
+                    'color': '#F59E0B'  # Orange
+                }
+            },
+            'processing_variance': {
+                'label': 'Processing Time Variance (ms)',
+                'data': [int(v) for v in variance],
+                'color': '#3B82F6'  # Blue
+            },
+            'pattern_complexity': {
+                'label': 'Log Pattern Complexity',
+                'data': [int(v) for v in complexity],
+                'color': '#8B5CF6'  # Purple
+            }
+        },
+        'table_data': [{
+            'log_pattern': f'Pattern-{unique_patterns}',
+            'version': '1.0.1-analysis',
+            'severity_levels': error_count + warning_count,
+            'processing_time_ms': int(avg_processing * 1000),
+            'processing_variance_ms': int(processing_variance * 1000),
+            'pattern_complexity': int(unique_patterns * avg_length / 100)
+        }] if total_logs else [],
+        'summary': {
+            'total_logs': total_logs,
+            'anomaly_count': anomaly_count,
+            'normal_count': total_logs - anomaly_count,
+            'anomaly_percentage': round(anomaly_count / total_logs * 100, 2) if total_logs else 0
+        },
+        'time_range': time_range
+    }
@@ -5,6 +5,8 @@ import os
 from datetime import datetime, timedelta
 import uuid
 import re
+from .db import get_connection
+from .session_cache import is_session_token_valid, revoke_session_token
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, HiddenField
 from wtforms.validators import DataRequired, Length, EqualTo, Regexp
@@ -57,6 +59,121 @@ def init_db():
         )
     ''')
     
+    # Run-level counters let pages avoid touching the result rows at all
+    _add_missing_columns(cursor, 'analysis_runs', [
+        ('total_rows', 'INTEGER'),
+        ('anomaly_count', 'INTEGER'),
+        ('dashboard_json', 'TEXT'),
+        ('file_name', 'TEXT'),
+        ('processing_time', 'REAL'),
+        ('stage_timings_json', 'TEXT')
+    ])
+
+    # Global dashboard counters, incremented by each completed run
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_metrics (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    if cursor.execute('SELECT COUNT(*) FROM dashboard_metrics').fetchone()[0] == 0:
+        # Seed from runs stored before the counters existed
+        cursor.execute('''
+            INSERT INTO dashboard_metrics (name, value)
+            SELECT 'total_logs', COALESCE(SUM(total_rows), 0) FROM analysis_runs WHERE total_rows IS NOT NULL
+            UNION ALL
+            SELECT 'total_anomalies', COALESCE(SUM(anomaly_count), 0) FROM analysis_runs WHERE total_rows IS NOT NULL
+            UNION ALL
+            SELECT 'files_processed', COUNT(*) FROM analysis_runs WHERE total_rows IS NOT NULL
+        ''')
+
+    # Create analysis_results table: one row per analyzed log line, keyed by run and row number
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_results (
+            run_id TEXT NOT NULL,
+            row_num INTEGER NOT NULL,
+            logline TEXT,
+            timestamp TEXT,
+            is_anomaly INTEGER DEFAULT 0,
+            anomaly_type TEXT,
+            severity TEXT,
+            extra_json TEXT,
+            PRIMARY KEY (run_id, row_num)
+        ) WITHOUT ROWID
+    ''')
+    # Indexes backing the filtered results API; row_num last so keyset pages stay index-ordered
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_results_anomaly ON analysis_results (run_id, is_anomaly, row_num)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_results_severity ON analysis_results (run_id, severity, row_num)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_results_timestamp ON analysis_results (run_id, timestamp)')
+
+    # Cache of AI summaries per run; content_hash lets identical inputs share a summary across runs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_summaries (
+            run_id TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ai_summaries_hash ON ai_summaries (content_hash)')
+
+    # LLM anomaly classifications keyed by normalized log template, reused across runs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS template_classifications (
+            template_hash TEXT PRIMARY KEY,
+            template TEXT,
+            anomaly_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create analysis_jobs table for background analysis processing
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'queued',
+            stage TEXT,
+            progress INTEGER DEFAULT 0,
+            file_path TEXT NOT NULL,
+            file_name TEXT,
+            parser TEXT,
+            model TEXT,
+            index_name TEXT,
+            run_id TEXT,
+            summary_json TEXT,
+            error TEXT,
+            worker_pid INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, created_at)')
+    _add_missing_columns(cursor, 'analysis_jobs', [
+        ('file_sha256', 'TEXT'),
+        ('config_hash', 'TEXT'),
+        ('attempts', 'INTEGER DEFAULT 0')
+    ])
+
+    # Finished runs keyed by upload content and analysis config, so repeated uploads skip the pipeline
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_result_cache (
+            file_sha256 TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            run_id TEXT NOT NULL,
+            outcome_json TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (file_sha256, config_hash, user_id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_result_cache_lru ON analysis_result_cache (last_used_at)')
+
     # Create user activity table for tracking user actions
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_activities (
@@ -83,11 +200,16 @@ def init_db():
     conn.commit()
     conn.close()
 
+def _add_missing_columns(cursor, table, columns):
+    """Add columns introduced after a table was first created (CREATE TABLE IF NOT EXISTS won't)"""
+    existing = [column[1] for column in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+    for column_name, column_def in columns:
+        if column_name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column_name} {column_def}")
+
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('flashlog/users.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get a pooled database connection (WAL mode); close() returns it to the pool"""
+    return get_connection()
 
 @auth.route('/register', methods=['GET', 'POST'])
 def register():
@@ -236,18 +358,15 @@ def login():
                     )
                     conn.commit()
                     conn.close()
-                    # Log the login activity
-                    try:
-                        conn = get_db_connection()
-                        conn.execute(
-                            'INSERT INTO user_activities (user_id, activity_type, description, created_at) VALUES (?, ?, ?, ?)',
-                            (user['id'], 'login', 'User logged in successfully', datetime.now())
-                        )
-                        conn.commit()
-                        conn.close()
-                        print(f"[DEBUG] Logged login activity for user {user['username']}.")
-                    except Exception as e:
-                        print(f"[ERROR] Failed to log login activity for user {user['username']}: {e}")
+                    # Log the login activity (queued for the batch writer like every other activity)
+                    from .routes import log_user_activity
+                    log_user_activity(
+                        user_id=user['id'],
+                        activity_type='login',
+                        description='User logged in successfully',
+                        ip_address=request.remote_addr,
+                        user_agent=request.headers.get('User-Agent', 'Unknown')
+                    )
                     flash(f'Welcome back, {user["username"]}!', 'success')
                     print(f"[DEBUG] Session right before redirect after login: {dict(session)}")
                     # Redirect based on role
@@ -299,6 +418,8 @@ def logout():
     if anomaly_types_path and os.path.exists(anomaly_types_path):
         os.remove(anomaly_types_path)
     session.pop('anomaly_types_path', None)
+    if 'session_token' in session:
+        revoke_session_token(session['session_token'])
     session.clear()
     flash('You have been logged out.', 'success')
     return redirect(url_for('auth.auth_page'))
@@ -322,16 +443,9 @@ def login_required(f):
             flash('Please log in to access this page!', 'error')
             return redirect(url_for('auth.auth_page'))
         
-        # Verify session is still valid
+        # Verify session is still valid (cached, see session_cache)
         if 'session_token' in session:
-            conn = get_db_connection()
-            valid_session = conn.execute(
-                'SELECT * FROM user_sessions WHERE session_token = ? AND expires_at > CURRENT_TIMESTAMP',
-                (session['session_token'],)
-            ).fetchone()
-            conn.close()
-            
-            if not valid_session:
+            if not is_session_token_valid(session['session_token']):
                 session.clear()
                 flash('Your session has expired. Please log in again!', 'error')
                 return redirect(url_for('auth.auth_page'))
@@ -0,0 +1,45 @@
+from .auth import get_db_connection
+
+# Persistent store of anomaly classifications per normalized log template
+# (LogNormalizer.get_template_hash). Once a template has been classified it is
+# never sent to the external API again, across runs and users.
+
+LOOKUP_BATCH_SIZE = 500  # Stay well below SQLite's bound-parameter limit
+
+
+def get_classifications(template_hashes):
+    """Return {template_hash: {'type': ..., 'severity': ...}} for the hashes already classified"""
+    template_hashes = list(template_hashes)
+    found = {}
+    if not template_hashes:
+        return found
+    conn = get_db_connection()
+    try:
+        for start in range(0, len(template_hashes), LOOKUP_BATCH_SIZE):
+            batch = template_hashes[start:start + LOOKUP_BATCH_SIZE]
+            rows = conn.execute(
+                f"SELECT template_hash, anomaly_type, severity FROM template_classifications "
+                f"WHERE template_hash IN ({', '.join('?' for _ in batch)})",
+                batch
+            ).fetchall()
+            for row in rows:
+                found[row['template_hash']] = {'type': row['anomaly_type'], 'severity': row['severity']}
+    finally:
+        conn.close()
+    return found
+
+
+def save_classifications(items):
+    """Persist classifications given as (template_hash, template, type, severity) tuples"""
+    items = list(items)
+    if not items:
+        return
+    conn = get_db_connection()
+    try:
+        conn.executemany('''
+            INSERT OR REPLACE INTO template_classifications (template_hash, template, anomaly_type, severity)
+            VALUES (?, ?, ?, ?)
+        ''', items)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,170 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+
+# SQLite access for the app. Connections are pooled per thread (sqlite3
+# connections must stay on the thread that opened them) and configured for WAL
+# so readers never block the writer. user_activities rows are written by a
+# background thread in batches, so request threads never wait on a commit.
+
+DB_PATH = 'flashlog/users.db'
+MAX_IDLE_PER_THREAD = 4
+BUSY_TIMEOUT_MS = 5000
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # Durable at checkpoints; safe with WAL
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',  # 16MB page cache per connection
+)
+
+_local = threading.local()
+
+
+def _open_connection():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _idle_connections():
+    # A forked worker must not reuse connections inherited from its parent
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.idle = []
+    return _local.idle
+
+
+class PooledConnection:
+    """A pooled sqlite3 connection; close() hands it back to this thread's pool"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        # Uncommitted work is discarded, exactly as closing a connection would
+        if conn.in_transaction:
+            conn.rollback()
+        idle = _idle_connections()
+        if len(idle) < MAX_IDLE_PER_THREAD:
+            idle.append(conn)
+        else:
+            conn.close()
+
+
+def get_connection():
+    """Borrow a configured connection from the current thread's pool"""
+    idle = _idle_connections()
+    conn = idle.pop() if idle else _open_connection()
+    return PooledConnection(conn)
+
+
+ACTIVITY_COLUMNS = (
+    'user_id', 'activity_type', 'description', 'details', 'status', 'ip_address', 'user_agent',
+    'file_name', 'file_size', 'processing_time', 'anomalies_detected', 'total_logs', 'old_value', 'new_value'
+)
+INSERT_ACTIVITY_SQL = (
+    f"INSERT INTO user_activities ({', '.join(ACTIVITY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in ACTIVITY_COLUMNS)})"
+)
+
+
+class ActivityWriter:
+    """Buffers user_activities rows and inserts them in batches from a background thread"""
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._reset()
+
+    def _reset(self):
+        # A forked child inherits the parent's queued rows, which the parent will
+        # write itself, and possibly a lock held by another thread: start empty
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='flashlog-activity-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """Queue one activity row (a tuple in ACTIVITY_COLUMNS order)"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Writer is far behind; fall back to a direct insert rather than drop the row
+            self._write([row])
+
+    def queue_depth(self):
+        """Rows waiting to be written"""
+        return self._queue.qsize()
+
+    def _write(self, rows):
+        conn = get_connection()
+        try:
+            conn.executemany(INSERT_ACTIVITY_SQL, rows)
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Error writing {len(rows)} activities: {str(e)}")
+        finally:
+            conn.close()
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Write everything still queued (used at shutdown)"""
+        while True:
+            try:
+                first = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._write(self._drain(first))
+
+
+activity_writer = ActivityWriter()
+atexit.register(activity_writer.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=activity_writer._reset)
@@ -0,0 +1,164 @@
+import atexit
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Elasticsearch indexing of analysis results. One client (with its own HTTP
+# connection pool) is shared per process, documents are sent with the bulk API
+# in parallel chunks, and indexing runs on a background thread so the analysis
+# pipeline never waits for it. Point FLASHLOG_ES_URL at a local HTTP stand-in
+# to exercise it without a real cluster.
+
+ES_URL = os.environ.get('FLASHLOG_ES_URL', 'http://localhost:9200')
+BULK_CHUNK_SIZE = int(os.environ.get('FLASHLOG_ES_CHUNK_SIZE', 1000))  # Documents per bulk request
+BULK_THREADS = int(os.environ.get('FLASHLOG_ES_THREADS', 4))  # Concurrent bulk requests
+INDEX_QUEUE_SIZE = 16  # Result sets waiting to be indexed
+PING_INTERVAL = 30  # Seconds a failed/successful ping is trusted before checking again
+
+_client = None
+_client_lock = threading.Lock()
+_available = None
+_available_checked = 0.0
+
+_queue = queue.Queue(maxsize=INDEX_QUEUE_SIZE)
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide Elasticsearch client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from elasticsearch import Elasticsearch
+                _client = Elasticsearch(
+                    ES_URL,
+                    connections_per_node=BULK_THREADS,
+                    request_timeout=30,
+                    max_retries=2,
+                    retry_on_timeout=True
+                )
+    return _client
+
+
+def is_available():
+    """Ping the cluster, reusing the last answer for PING_INTERVAL seconds"""
+    global _available, _available_checked
+    now = time.time()
+    if _available is None or now - _available_checked > PING_INTERVAL:
+        try:
+            _available = bool(get_client().ping())
+        except Exception:
+            _available = False
+        _available_checked = now
+    return _available
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _actions(index_name, columns):
+    loglines = columns.get('logline')
+    anomalies = columns.get('is_anomaly')
+    timestamps = columns.get('timestamp')
+    now = datetime.utcnow().isoformat()
+    for i in range(columns['length']):
+        anomaly = _clean(anomalies[i]) if anomalies is not None else None
+        timestamp = _clean(timestamps[i]) if timestamps is not None else None
+        yield {
+            '_index': index_name,
+            '_source': {
+                'log_line': _clean(loglines[i]) if loglines is not None else '',
+                'anomaly': bool(anomaly),
+                'score': float(anomaly or 0),
+                'timestamp': str(timestamp) if timestamp is not None else now
+            }
+        }
+
+
+def _snapshot(results):
+    # Copy just the indexed columns so the caller can keep mutating its frame
+    columns = {'length': len(results)}
+    if isinstance(results, list):
+        # Result records as read back from the results store
+        for name in ('logline', 'is_anomaly', 'timestamp'):
+            if any(name in record for record in results):
+                columns[name] = [record.get(name) for record in results]
+        return columns
+    for name in ('logline', 'is_anomaly', 'timestamp'):
+        if name in results.columns:
+            columns[name] = results[name].tolist()
+    return columns
+
+
+def index_results(index_name, columns, chunk_size=BULK_CHUNK_SIZE, thread_count=BULK_THREADS):
+    """Bulk-index a result snapshot; returns (indexed, failed) document counts"""
+    if not is_available():
+        print("⚠️  Elasticsearch is not running. Skipping Elasticsearch upload.")
+        return 0, 0
+    from elasticsearch import helpers
+    indexed = failed = 0
+    for ok, _ in helpers.parallel_bulk(
+        get_client(),
+        _actions(index_name, columns),
+        chunk_size=chunk_size,
+        thread_count=thread_count,
+        raise_on_error=False,
+        raise_on_exception=False
+    ):
+        if ok:
+            indexed += 1
+        else:
+            failed += 1
+    return indexed, failed
+
+
+def _worker_main():
+    while True:
+        index_name, columns = _queue.get()
+        try:
+            indexed, failed = index_results(index_name, columns)
+            if indexed or failed:
+                print(f"✅ Indexed {indexed} documents into '{index_name}' ({failed} failed)")
+        except Exception as e:
+            print(f"⚠️  Elasticsearch upload failed: {str(e)}")
+        finally:
+            _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker, _worker_pid
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive() or _worker_pid != os.getpid():
+            _worker_pid = os.getpid()
+            _worker = threading.Thread(target=_worker_main, name='flashlog-es-indexer', daemon=True)
+            _worker.start()
+
+
+def submit_results(index_name, results):
+    """Queue a results DataFrame (or list of result records) for background bulk indexing; returns False if the queue is full"""
+    _ensure_worker()
+    try:
+        _queue.put_nowait((index_name, _snapshot(results)))
+        return True
+    except queue.Full:
+        print(f"⚠️  Elasticsearch indexing queue is full. Skipping upload for '{index_name}'.")
+        return False
+
+
+def flush(timeout=30):
+    """Wait (up to timeout seconds) for queued indexing to finish"""
+    deadline = time.time() + timeout
+    while _queue.unfinished_tasks and time.time() < deadline:
+        time.sleep(0.1)
+
+
+atexit.register(flush)
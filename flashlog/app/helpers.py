@@ -1,209 +1,218 @@
 import os
-import glob
-import pandas as pd
-import requests
-import numpy as np
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+from functools import lru_cache
+from flask import request
+from .results_store import load_dashboard_metrics, PROCESSING_TIME_BUCKETS
+from .classification_store import get_classifications, save_classifications
+from .local_classifier import classify_line
+from .metrics import record_cache
+from .prompt_batcher import PROMPT_TOKEN_BUDGET, MAX_TEMPLATE_TOKENS, estimate_tokens, truncate_to_tokens, pack_by_token_budget
 
-# Load API keys and endpoint from api_config.json
+# API keys and endpoint come from api_config.json, read on first use rather than at import
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'api_config.json')
-with open(CONFIG_PATH, 'r') as f:
-    api_config = json.load(f)
-API_KEYS = api_config["API_KEYS"]
-API_URL = api_config["API_URL"]
 
-# print("Loaded API KEYS:", API_KEYS)
-# print("Loaded API URL:", API_URL)
+@lru_cache(maxsize=1)
+def load_api_config():
+    """Return (api_keys, api_url); no keys if api_config.json is missing or unreadable"""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            api_config = json.load(f)
+        return tuple(api_config["API_KEYS"]), api_config["API_URL"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Could not load API config from {CONFIG_PATH}: {e}")
+        return (), None
+
+
+def get_normalizer():
+    # logai (and numpy with it) is only imported once anomalies need grouping
+    from logai.utils.log_normalizer import get_normalizer as _get_normalizer
+    return _get_normalizer()
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes copied per read when streaming uploads to disk
+DEFAULT_MAX_UPLOAD_BYTES = 2 * 1024 * 1024 * 1024
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Form fields and multipart boundaries sent along with the file
+
+
+def upload_request_too_large(max_bytes):
+    """
+    Whether the declared request size rules an upload out. Check this before
+    touching request.form or request.files, which receive the whole body first.
+    """
+    return request.content_length is not None and request.content_length > max_bytes + MULTIPART_OVERHEAD_BYTES
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit while streaming"""
+
+
+def save_upload_in_chunks(file_storage, dest_path, max_bytes=DEFAULT_MAX_UPLOAD_BYTES, chunk_size=UPLOAD_CHUNK_SIZE,
+                          hasher=None):
+    """
+    Stream an uploaded file to disk chunk by chunk, enforcing max_bytes as data arrives.
+    Only one chunk is held in memory at a time. Partial files are removed on failure.
+    If hasher (e.g. hashlib.sha256()) is given it is updated with every chunk, so the
+    content hash costs no second read of the file.
+    Returns the number of bytes written.
+    """
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    written = 0
+    try:
+        with open(dest_path, 'wb') as out:
+            while True:
+                chunk = file_storage.stream.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f'Upload exceeds the {max_bytes // (1024 * 1024)}MB limit')
+                out.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return written
+
+
+def workflow_settings(parser_algo, model_type):
+    """
+    The LogAI WorkFlowConfig settings of an analysis, without the data loader config.
+    Everything here determines the results, so it is also what the result cache keys on.
+    """
+    return {
+        "preprocessor_config": {
+            "custom_delimiters_regex": []
+        },
+        "log_parser_config": {
+            "parsing_algorithm": parser_algo
+        },
+        "log_vectorizer_config": {
+            "algo_name": "tfidf"
+        },
+        "categorical_encoder_config": {
+            "encoding_type": "onehot"
+        },
+        "feature_extractor_config": {
+            "max_feature_len": 100
+        },
+        "anomaly_detection_config": {
+            "algo_name": model_type,
+            "algo_params": {
+                "nu": 0.05 if model_type == "one_class_svm" else 0.1  # More conservative for One-Class SVM
+            }
+        }
+    }
 
 
 def compute_dashboard_metrics():
-    """Compute dashboard metrics from all previous analysis results"""
-    uploads_dir = 'uploads'
-    anomaly_files = glob.glob(os.path.join(uploads_dir, 'anomaly_results_*.csv'))
-    uploads_abs = os.path.abspath(uploads_dir)
-    total_logs = 0
-    total_anomalies = 0
-    total_processing_time = 0
-    file_count = 0
-    processing_times = []
-    for file_path in anomaly_files:
-        abs_path = os.path.abspath(file_path)
-        if not abs_path.startswith(uploads_abs):
-            continue
-        try:
-            df = pd.read_csv(abs_path)
-            if not df.empty:
-                total_logs += len(df)
-                if 'is_anomaly' in df.columns:
-                    total_anomalies += df['is_anomaly'].sum()
-                if 'processing_time_seconds' in df.columns:
-                    try:
-                        processing_times_col = pd.to_numeric(df['processing_time_seconds'], errors='coerce')
-                        processing_times_col = processing_times_col.dropna()
-                        if len(processing_times_col) > 0:
-                            processing_time = processing_times_col.iloc[0]
-                            processing_times.append(processing_time)
-                            total_processing_time += processing_time
-                    except Exception as e:
-                        print(f"Error processing processing_time_seconds in compute_dashboard_metrics: {e}")
-                        pass
-                file_count += 1
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
+    """Dashboard metrics across all previous analysis runs, read from the counters each run maintains"""
+    counters = load_dashboard_metrics()
+    total_logs = int(counters.get('total_logs', 0))
+    total_anomalies = int(counters.get('total_anomalies', 0))
+    file_count = int(counters.get('files_processed', 0))
+    timed_runs = counters.get('timed_runs', 0)
     success_rate = ((total_logs - total_anomalies) / total_logs * 100) if total_logs > 0 else 0
-    if processing_times:
-        avg_processing_time = sum(processing_times) / len(processing_times)
+    if timed_runs:
+        avg_processing_time = counters.get('total_processing_time', 0) / timed_runs
     else:
         avg_processing_time = 2.4
     if file_count > 0:
         growth_rate = min(15.1, max(-10, (file_count - 1) * 5))
     else:
         growth_rate = 0
+    histogram = [
+        {'le': str(upper), 'count': int(counters.get(f'processing_time_le_{upper}', 0))}
+        for upper in PROCESSING_TIME_BUCKETS
+    ]
+    histogram.append({'le': 'inf', 'count': int(counters.get('processing_time_le_inf', 0))})
     return {
         'total_logs': total_logs,
         'total_anomalies': total_anomalies,
         'success_rate': round(success_rate, 1),
         'avg_processing_time': round(avg_processing_time, 1),
         'growth_rate': growth_rate,
-        'files_processed': file_count
+        'files_processed': file_count,
+        'processing_time_histogram': histogram
     }
 
 
-def build_anomaly_prompt(anomalies):
+def template_prompt_line(template):
+    return f"Template {template['id']} (seen {template['count']} times): {template['template']}\n"
+
+
+def build_anomaly_prompt(templates):
     """
-    Build a prompt for the external API to classify log anomalies.
+    Build a prompt for the external API to classify log anomaly templates.
+    Each template stands for every anomalous line that normalizes to it.
     """
-    total_anomalies = len(anomalies)
+    total_templates = len(templates)
     prompt = (
         "You are an expert in log analysis and anomaly detection. "
-        "I have a list of log anomalies from a system, and I need you to analyze them and classify each anomaly into distinct types. "
-        "For each type of anomaly, provide a severity level (Critical, High, Medium, Low) and the count of how many times this type appears in the provided logs. "
-        "Please respond ONLY with a JSON array of objects, where each object has the following structure: "
-        "{'type': string, 'severity': string, 'count': integer}. "
+        "I have a list of anomalous log templates from a system. Variable parts such as IP addresses, IDs, paths and timestamps "
+        "have been replaced by placeholders like <IP> or <ID>. Classify each template into an anomaly type "
+        "and provide a severity level (Critical, High, Medium, Low). "
+        "Please respond ONLY with a JSON array of objects, one per template, where each object has the following structure: "
+        "{'id': integer, 'type': string, 'severity': string}, with 'id' being the template number given below. "
         "Do not include any explanatory text or additional formatting outside the JSON array. "
-        "Ensure that the sum of the 'count' values in your response equals the total number of anomalies provided (" + str(total_anomalies) + "), "
-        "so that every anomaly is accounted for in one of the types. "
-        "If some anomalies cannot be classified into a specific type, include them under a type labeled 'Unclassified' with an appropriate severity. "
-        "If there are no anomalies to classify, return an empty JSON array []. "
-        "Here are the log anomalies for analysis (total: " + str(total_anomalies) + "):\n\n"
+        "Use the same 'type' name for templates that describe the same kind of problem. "
+        "If a template cannot be classified into a specific type, use the type 'Unclassified' with an appropriate severity. "
+        "Here are the log templates for analysis (total: " + str(total_templates) + "):\n\n"
     )
-    for i, anomaly in enumerate(anomalies, 1):
-        log_line = anomaly.get('logline', str(anomaly))
-        prompt += f"Anomaly {i}: {log_line}\n"
-    prompt += "\nPlease classify these anomalies and return the result as a JSON array, ensuring the sum of counts matches the total (" + str(total_anomalies) + ")."
+    for template in templates:
+        prompt += template_prompt_line(template)
+    prompt += "\nPlease classify every template and return the result as a JSON array with exactly " + str(total_templates) + " objects."
     return prompt
 
 
-def split_anomalies(anomalies, n_chunks):
-    """
-    Split anomalies into n roughly equal chunks for parallel processing.
+def parse_classification_reply(reply, api_key=''):
     """
-    return np.array_split(anomalies, n_chunks)
-
-
-def classify_anomalies_worker(anomaly_chunk, api_key, api_url, max_retries=3):
+    Parse the model reply into a list of dicts; falls back to text extraction
+    when the reply is not valid JSON.
     """
-    Send a chunk of anomalies to the external API using the assigned API key.
-    Handles retries, rate limits, and returns structured results.
-    """
-    if not anomaly_chunk or len(anomaly_chunk) == 0:
-        print(f"[DEBUG] Empty chunk for key {api_key[:10]}..., returning empty results.")
-        return []
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    prompt = build_anomaly_prompt(list(anomaly_chunk))
-    data = {
-        "model": "llama3-70b-8192",
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    }
-    for attempt in range(max_retries):
+    reply = reply.strip() if reply else ''
+    if reply and (reply[0] == '{' or reply[0] == '['):
+        # Attempt to parse JSON
         try:
-            start = time.time()
-            response = requests.post(api_url, headers=headers, json=data, timeout=30)
-            elapsed = time.time() - start
-            if response.status_code == 429:
-                print(f"[WARN] Rate limit hit for key {api_key[:10]}.... Throttling...")
-                time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-            response.raise_for_status()
-            print(f"[INFO] API key {api_key[:10]}... used. Response time: {elapsed:.2f}s")
-            # Get the raw response content
-            reply = response.json()["choices"][0]["message"]["content"]
-            # Log a snippet of the raw response for debugging
-            print(f"[DEBUG] Raw response snippet for key {api_key[:10]}...: {reply[:100] if reply else 'Empty response'}...")
-            # Check if the response looks like JSON (starts with { or [)
-            reply = reply.strip()
-            if reply and (reply[0] == '{' or reply[0] == '['):
-                # Attempt to parse JSON
-                try:
-                    start_idx = reply.find('[')
-                    end_idx = reply.rfind(']') + 1
-                    if start_idx >= 0 and end_idx > start_idx:
-                        json_str = reply[start_idx:end_idx]
-                        result = json.loads(json_str)
-                        if not isinstance(result, list):
-                            print(f"[WARN] Parsed JSON is not a list for key {api_key[:10]}...")
-                            result = []
-                    else:
-                        # Try parsing the entire reply as JSON if no array is found
-                        result = json.loads(reply)
-                        if not isinstance(result, list):
-                            print(f"[WARN] Full JSON parse is not a list for key {api_key[:10]}...")
-                            result = []
-                except json.JSONDecodeError as e:
-                    print(f"[ERROR] JSON parse failed for key {api_key[:10]}...: {e}")
-                    # Fallback to text extraction if JSON parsing fails
-                    result = extract_anomalies_from_text(reply)
+            start_idx = reply.find('[')
+            end_idx = reply.rfind(']') + 1
+            if start_idx >= 0 and end_idx > start_idx:
+                result = json.loads(reply[start_idx:end_idx])
             else:
-                # Response is likely plain text, extract data directly
-                print(f"[DEBUG] Response for key {api_key[:10]}... is plain text, attempting text extraction.")
-                result = extract_anomalies_from_text(reply)
+                # Try parsing the entire reply as JSON if no array is found
+                result = json.loads(reply)
+            if not isinstance(result, list):
+                print(f"[WARN] Parsed JSON is not a list for key {api_key[:10]}...")
+                result = []
             return result
-        except Exception as e:
-            print(f"[ERROR] API key {api_key[:10]}... attempt {attempt+1} failed: {e}")
-            time.sleep(2 ** attempt)
-    return []  # Return empty if all retries fail
+        except json.JSONDecodeError as e:
+            print(f"[ERROR] JSON parse failed for key {api_key[:10]}...: {e}")
+    else:
+        print(f"[DEBUG] Response for key {api_key[:10]}... is plain text, attempting text extraction.")
+    # Fallback to text extraction if JSON parsing fails
+    return extract_anomalies_from_text(reply)
 
 
 def extract_anomalies_from_text(text):
     """
-    Fallback method to extract anomaly data from plain text responses if JSON parsing fails.
-    Looks for patterns like 'type', 'severity', 'count' in the text.
+    Fallback method to extract classifications from plain text responses if JSON parsing fails.
+    Splits the text at each 'Template N' mention and looks for 'type' and 'severity' after it,
+    so every item carries the template id the reply refers to.
     """
     import re
     result = []
-    # Simple pattern to look for anomaly descriptions in text
-    pattern = r'(type|anomaly)[^:]*:.*?(\w+[^,.;]*)(?:,|\.|\s|$)|severity[^:]*:.*?(\w+[^,.;]*)(?:,|\.|\s|$)|count[^:]*:.*?(\d+)(?:,|\.|\s|$)'
-    matches = re.findall(pattern, text, re.IGNORECASE)
-    if matches:
-        current_type = None
-        current_severity = None
-        current_count = None
-        for match in matches:
-            if match[1].strip():
-                current_type = match[1].strip()
-            elif match[2].strip():
-                current_severity = match[2].strip()
-            elif match[3].strip():
-                current_count = int(match[3].strip())
-            if current_type and current_severity and current_count is not None:
-                result.append({
-                    'type': current_type,
-                    'severity': current_severity,
-                    'count': current_count
-                })
-                current_type = None
-                current_severity = None
-                current_count = None
+    sections = re.split(r'\btemplate\s*#?\s*(\d+)', text, flags=re.IGNORECASE)
+    # re.split yields [preamble, id, body, id, body, ...]
+    for template_id, body in zip(sections[1::2], sections[2::2]):
+        anomaly_type = re.search(r'\btype\b[^:\n]*:\s*[*"\']*([^,;\n*"\']+)', body, re.IGNORECASE)
+        severity = re.search(r'\bseverity\b[^:\n]*:\s*[*"\']*(critical|high|medium|low)', body, re.IGNORECASE)
+        if anomaly_type and severity:
+            result.append({
+                'id': int(template_id),
+                'type': anomaly_type.group(1).strip(),
+                'severity': severity.group(1).capitalize()
+            })
     if not result:
         print("[DEBUG] No anomaly data extracted from plain text response.")
     else:
@@ -211,25 +220,169 @@ def extract_anomalies_from_text(text):
     return result
 
 
+def group_anomalies_by_template(anomalies):
+    """
+    Collapse anomalies that normalize to the same template (same IPs/IDs/paths aside).
+    Returns a list of groups with the template hash, normalized template, occurrence
+    count and the indices of the anomalies it covers.
+    """
+    normalizer = get_normalizer()
+    groups = {}
+    for i, anomaly in enumerate(anomalies):
+        log_line = str(anomaly.get('logline', anomaly) if isinstance(anomaly, dict) else anomaly)
+        template_hash = normalizer.get_template_hash(log_line)
+        group = groups.get(template_hash)
+        if group is None:
+            group = groups[template_hash] = {
+                'hash': template_hash,
+                'template': normalizer.normalize(log_line),
+                'example': log_line,
+                'count': 0,
+                'indices': []
+            }
+        group['count'] += 1
+        group['indices'].append(i)
+    return list(groups.values())
+
+
+def lookup_template_classifications(groups):
+    """
+    Find known classifications for template groups: the normalizer's in-memory
+    template cache first, then the persistent classification store.
+    """
+    normalizer = get_normalizer()
+    known = {}
+    missing = []
+    for group in groups:
+        cached = normalizer.get_template_classification(group['example'])
+        if cached is not None:
+            known[group['hash']] = cached
+        else:
+            missing.append(group)
+    record_cache('normalizer', True, len(groups) - len(missing))
+    record_cache('normalizer', False, len(missing))
+    stored = get_classifications(group['hash'] for group in missing)
+    for group in missing:
+        if group['hash'] in stored:
+            known[group['hash']] = stored[group['hash']]
+            normalizer.cache_template_classification(group['example'], stored[group['hash']])
+    record_cache('classification', True, len(stored))
+    record_cache('classification', False, len(missing) - len(stored))
+    return known
+
+
+def classify_templates_locally(groups):
+    """
+    Classify template groups with the offline rule set. Returns
+    {template_hash: {'type': ..., 'severity': ...}} for the groups a rule matched.
+    """
+    classified = {}
+    for group in groups:
+        classification = classify_line(group['example'])
+        if classification is not None:
+            classified[group['hash']] = classification
+    return classified
+
+
+def batch_templates(templates, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Pack templates into prompt batches that fit the token budget, counting the
+    fixed instructions, every template line and the reply each template needs.
+    """
+    for template in templates:
+        template['template'] = truncate_to_tokens(template['template'], MAX_TEMPLATE_TOKENS)
+    overhead = estimate_tokens(build_anomaly_prompt([]))
+    return pack_by_token_budget(templates, template_prompt_line, overhead, budget)
+
+
+def _merge_replies(replies, by_id, classified):
+    for reply in replies:
+        if reply is None:
+            continue
+        print(f"[DEBUG] Raw response snippet: {reply[:100] if reply else 'Empty response'}...")
+        for item in parse_classification_reply(reply):
+            if not isinstance(item, dict):
+                continue
+            try:
+                template = by_id.get(int(item.get('id')))
+            except (TypeError, ValueError):
+                template = None
+            if template and item.get('type') and item.get('severity'):
+                classified[template['hash']] = {'type': str(item['type']), 'severity': str(item['severity'])}
+
+
+def classify_templates_with_api(groups):
+    """
+    Ask the external API to classify template groups. Templates are packed into
+    prompts up to PROMPT_TOKEN_BUDGET tokens and the batches are sent in parallel
+    through the shared LLM client. Templates a reply left out are re-sent once in
+    fresh batches before giving up on them.
+    Returns {template_hash: {'type': ..., 'severity': ...}} for the templates it answered.
+    """
+    templates = [
+        {'id': i, 'hash': group['hash'], 'template': group['template'], 'count': group['count']}
+        for i, group in enumerate(groups, 1)
+    ]
+    by_id = {template['id']: template for template in templates}
+    api_keys, api_url = load_api_config()
+    if not api_keys:
+        return {}
+    from .llm_client import get_llm_client
+    client = get_llm_client(api_keys, api_url)
+    classified = {}
+    remaining = templates
+    for attempt in range(2):
+        batches = batch_templates(remaining)
+        print(f"[DEBUG] Sending {len(remaining)} templates in {len(batches)} prompt batches (pass {attempt + 1}).")
+        _merge_replies(client.complete_all([build_anomaly_prompt(batch) for batch in batches]), by_id, classified)
+        remaining = [template for template in remaining if template['hash'] not in classified]
+        if not remaining:
+            break
+    return classified
+
+
 def classify_all_anomalies(anomalies):
     """
-    Classify all anomalies in parallel using 6 API keys and merge the results.
+    Classify all anomalies and return [{'type', 'severity', 'count'}] totals.
+    Anomalies are collapsed by normalized template. Templates classified before
+    (cache or store) keep their stored answer; templates the offline rules
+    recognise are classified locally; only the rest are sent to the external API,
+    and their answers are stored so later runs reuse them. Anomalies given as
+    dicts also get their own 'anomaly_type' and 'severity' filled in.
     """
     if not anomalies or len(anomalies) == 0:
         print("[DEBUG] Empty anomalies list passed to classify_all_anomalies, returning empty results.")
         return []
-    n_keys = len(API_KEYS)
-    anomaly_chunks = split_anomalies(anomalies, n_keys)
-    results = []
-    with ThreadPoolExecutor(max_workers=n_keys) as executor:
-        futures = [
-            executor.submit(classify_anomalies_worker, list(chunk), API_KEYS[i], API_URL)
-            for i, chunk in enumerate(anomaly_chunks)
-        ]
-        for future in as_completed(futures):
-            result = future.result()
-            if isinstance(result, list):
-                results.extend(result)
-            else:
-                results.append(result)
-    return results 
\ No newline at end of file
+    groups = group_anomalies_by_template(anomalies)
+    known = lookup_template_classifications(groups)
+    known.update(classify_templates_locally([group for group in groups if group['hash'] not in known]))
+    unknown = [group for group in groups if group['hash'] not in known]
+    print(f"[DEBUG] {len(anomalies)} anomalies collapsed into {len(groups)} templates, {len(unknown)} need classification.")
+    if unknown:
+        classified = classify_templates_with_api(unknown)
+        normalizer = get_normalizer()
+        for group in unknown:
+            if group['hash'] in classified:
+                normalizer.cache_template_classification(group['example'], classified[group['hash']])
+        save_classifications(
+            (group['hash'], group['template'], classified[group['hash']]['type'], classified[group['hash']]['severity'])
+            for group in unknown if group['hash'] in classified
+        )
+        known.update(classified)
+    # Fan template classifications back out to anomaly counts
+    totals = {}
+    for group in groups:
+        classification = known.get(group['hash'], {'type': 'Unclassified', 'severity': 'Low'})
+        key = (classification['type'], classification['severity'])
+        totals[key] = totals.get(key, 0) + group['count']
+        for i in group['indices']:
+            if isinstance(anomalies[i], dict):
+                anomalies[i]['anomaly_type'] = classification['type']
+                anomalies[i]['severity'] = classification['severity']
+    results = [{'type': t, 'severity': sev, 'count': count} for (t, sev), count in totals.items()]
+    results.sort(key=lambda item: item['count'], reverse=True)
+    # Counts come from our own grouping, never from the model, so they always add up
+    classified_total = sum(item['count'] for item in results)
+    if classified_total != len(anomalies):
+        print(f"[WARN] Classified {classified_total} anomalies but {len(anomalies)} were detected.")
+    return results
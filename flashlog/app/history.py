@@ -1,6 +1,5 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash, request, jsonify
-import os
-import pandas as pd
+from .results_store import list_runs
 
 history_bp = Blueprint('history', __name__)
 
@@ -9,30 +8,20 @@ def history():
     if 'user_id' not in session:
         flash('Please log in to view history.', 'error')
         return redirect(url_for('auth.auth_page'))
-    uploads_dir = 'uploads'
-    history_files = [f for f in os.listdir(uploads_dir) if f.startswith('anomaly_results_')]
-    history_data = []
-    for file in history_files:
-        file_path = os.path.abspath(os.path.join(uploads_dir, file))
-        if not file_path.startswith(os.path.abspath(uploads_dir)):
-            continue  # Skip invalid paths
-        try:
-            df = pd.read_csv(file_path)
-            if not df.empty:
-                history_data.append({
-                    'filename': file,
-                    'num_logs': len(df),
-                    'num_anomalies': df['is_anomaly'].sum() if 'is_anomaly' in df.columns else 0
-                })
-        except Exception as e:
-            continue
+    # Run metadata comes from analysis_runs; no result files are opened
+    history_data = [{
+        'run_id': run['run_id'],
+        'filename': run['file_name'] or run['run_id'],
+        'num_logs': run['total_rows'] or 0,
+        'num_anomalies': run['anomaly_count'] or 0,
+        'created_at': run['created_at']
+    } for run in list_runs(session['user_id'])]
     return render_template('history.html', history=history_data)
 
 @history_bp.route('/api/history/latest')
 def get_latest_activities():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
-    uploads_dir = 'uploads'
-    history_files = [f for f in os.listdir(uploads_dir) if f.startswith('anomaly_results_')]
-    latest = sorted(history_files)[-1] if history_files else None
-    return jsonify({'latest': latest}) 
\ No newline at end of file
+    runs = list_runs(session['user_id'], limit=1)
+    latest = (runs[0]['file_name'] or runs[0]['run_id']) if runs else None
+    return jsonify({'latest': latest})
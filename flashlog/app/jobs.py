@@ -0,0 +1,436 @@
+from flask import Blueprint, render_template, session, redirect, url_for, flash, jsonify, current_app
+from datetime import datetime, timedelta
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from .auth import get_db_connection
+from .results_store import save_run_results, save_dashboard_data, save_stage_timings, load_all_results
+from .es_indexer import submit_results
+from .metrics import record_job
+from .result_cache import lookup_result, store_result
+
+# Background analysis jobs. Web requests only insert a row into analysis_jobs;
+# a pool of worker processes claims queued rows and runs the LogAI pipeline.
+# Jobs left running by a worker that died are picked up again by reap_lost_jobs.
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOB_POLL_INTERVAL = 1.0  # Seconds an idle worker waits before polling again
+DEFAULT_WORKERS = 2
+JOB_TIMEOUT = 6 * 60 * 60  # Seconds a job may stay running before it is presumed lost
+MAX_JOB_ATTEMPTS = 2  # Runs a job gets before a dying worker fails it instead of requeueing it
+REAP_INTERVAL = 30  # Seconds between lost-job checks of a polling worker
+
+_workers = []
+_workers_lock = threading.Lock()
+_last_reap = 0.0
+
+
+def create_job(user_id, file_path, file_name, parser, model, index_name, file_sha256=None, config_hash=None):
+    """Insert a queued analysis job and return its id"""
+    job_id = str(uuid.uuid4())
+    conn = get_db_connection()
+    conn.execute('''
+        INSERT INTO analysis_jobs (job_id, user_id, status, stage, progress, file_path, file_name, parser, model,
+                                   index_name, file_sha256, config_hash)
+        VALUES (?, ?, 'queued', 'queued', 0, ?, ?, ?, ?, ?, ?, ?)
+    ''', (job_id, user_id, file_path, file_name, parser, model, index_name, file_sha256, config_hash))
+    conn.commit()
+    conn.close()
+    return job_id
+
+
+def get_job(job_id):
+    """Fetch a job row as a dict, or None if it does not exist"""
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM analysis_jobs WHERE job_id = ?', (job_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def update_job_progress(job_id, stage, progress):
+    """Record the current stage and progress percentage of a running job"""
+    conn = get_db_connection()
+    conn.execute('UPDATE analysis_jobs SET stage = ?, progress = ? WHERE job_id = ?', (stage, int(progress), job_id))
+    conn.commit()
+    conn.close()
+
+
+def _pid_alive(pid):
+    """Whether a worker process still exists; None when it cannot be told"""
+    if not pid or os.name == 'nt':
+        # os.kill(pid, 0) terminates the process on Windows; rely on JOB_TIMEOUT there
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _started_before(started_at, cutoff):
+    try:
+        return started_at is not None and datetime.fromisoformat(str(started_at)) < cutoff
+    except ValueError:
+        return False
+
+
+def reap_lost_jobs():
+    """Recover running jobs whose worker died (OOM, crash, terminate at exit) or that ran past JOB_TIMEOUT.
+
+    A job whose worker is gone goes back to the queue until it has been tried
+    MAX_JOB_ATTEMPTS times; timed-out jobs and jobs out of attempts are failed.
+    Returns the number of jobs recovered.
+    """
+    cutoff = datetime.now() - timedelta(seconds=JOB_TIMEOUT)
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        rows = conn.execute(
+            "SELECT job_id, worker_pid, started_at, attempts FROM analysis_jobs WHERE status = 'running'"
+        ).fetchall()
+        requeued, failed = [], []
+        for row in rows:
+            if _started_before(row['started_at'], cutoff):
+                failed.append(('Analysis timed out', datetime.now(), row['job_id']))
+            elif _pid_alive(row['worker_pid']) is False:
+                if (row['attempts'] or 0) < MAX_JOB_ATTEMPTS:
+                    requeued.append((row['job_id'],))
+                else:
+                    failed.append(('Analysis worker stopped before the job finished', datetime.now(), row['job_id']))
+        conn.executemany(
+            "UPDATE analysis_jobs SET status = 'queued', stage = 'queued', progress = 0, started_at = NULL, worker_pid = NULL WHERE job_id = ?",
+            requeued
+        )
+        conn.executemany(
+            "UPDATE analysis_jobs SET status = 'failed', stage = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+            failed
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"[JOBS] Failed to reap lost jobs: {e}")
+        return 0
+    finally:
+        conn.close()
+    for _ in failed:
+        record_job('failed')
+    for job_id, in requeued:
+        print(f"[JOBS] Requeued job {job_id}: its worker is gone")
+    for _, _, job_id in failed:
+        print(f"[JOBS] Failed lost job {job_id}")
+    return len(requeued) + len(failed)
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running and return its id"""
+    global _last_reap
+    if time.monotonic() - _last_reap >= REAP_INTERVAL:
+        _last_reap = time.monotonic()
+        reap_lost_jobs()
+    conn = get_db_connection()
+    try:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can never claim the same row
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(
+            "SELECT job_id FROM analysis_jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+        ).fetchone()
+        if not row:
+            conn.rollback()
+            return None
+        conn.execute(
+            "UPDATE analysis_jobs SET status = 'running', stage = 'starting', progress = 1, started_at = ?, worker_pid = ?, "
+            "attempts = COALESCE(attempts, 0) + 1 WHERE job_id = ?",
+            (datetime.now(), os.getpid(), row['job_id'])
+        )
+        conn.commit()
+        return row['job_id']
+    except Exception as e:
+        conn.rollback()
+        print(f"[JOBS] Failed to claim job: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def _convert_timestamps(obj):
+    import numpy as np
+    import pandas as pd
+    if isinstance(obj, pd.DataFrame):
+        for col in obj.columns:
+            if np.issubdtype(obj[col].dtype, np.datetime64):
+                obj[col] = obj[col].astype(str)
+            elif obj[col].dtype == 'object':
+                obj[col] = obj[col].apply(lambda x: str(x) if isinstance(x, (pd.Timestamp, np.datetime64)) else x)
+        return obj
+    elif isinstance(obj, list):
+        return [_convert_timestamps(x) for x in obj]
+    elif isinstance(obj, dict):
+        return {k: _convert_timestamps(v) for k, v in obj.items()}
+    elif isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return str(obj)
+    return obj
+
+
+def run_analysis(job):
+    """Run the full analysis pipeline for a job row and persist its results"""
+    from .logai_handler import process_log_file
+    from .helpers import classify_all_anomalies
+    from .aggregation import aggregate_results
+    from logai.utils.tracing import PipelineTracer
+
+    job_id = job['job_id']
+    tracer = PipelineTracer()
+    started = time.perf_counter()
+
+    def report(stage, progress):
+        update_job_progress(job_id, stage, progress)
+
+    results, processing_time = process_log_file(
+        job['file_path'], job['parser'], job['model'], job['index_name'], progress_callback=report, tracer=tracer
+    )
+    with tracer.stage('to_records', rows_in=len(results)) as record:
+        results = _convert_timestamps(results)
+        records = results.to_dict(orient='records') if hasattr(results, 'to_dict') else list(results)
+        record.rows_out = len(records)
+
+    # Classified first so every anomaly row is stored with its type and severity
+    report('classifying', 75)
+    anomalies = [row for row in records if row.get('is_anomaly')]
+    anomaly_types = []
+    if anomalies:
+        print(f"[JOBS] {len(anomalies)} anomalies detected for job {job_id}, classifying...")
+        with tracer.stage('classification', rows_in=len(anomalies)) as record:
+            anomaly_types = classify_all_anomalies(anomalies)
+            record.rows_out = len(anomaly_types)
+
+    report('saving', 80)
+    run_id = str(uuid.uuid4())
+    with tracer.stage('save_results', rows_in=len(records)) as record:
+        total_logs, anomaly_count = save_run_results(
+            run_id, job['user_id'], records, file_name=job['file_name'], processing_time=processing_time
+        )
+        record.rows_out = total_logs
+    # Dashboard charts are aggregated once here instead of on every dashboard view
+    report('aggregating', 85)
+    with tracer.stage('aggregation', rows_in=len(results)):
+        save_dashboard_data(run_id, aggregate_results(results))
+    stage_timings = tracer.to_list()
+    save_stage_timings(run_id, stage_timings)
+    record_job('completed', stage_timings, rows=total_logs, seconds=time.perf_counter() - started)
+    success_rate = round((total_logs - anomaly_count) / total_logs * 100, 2) if total_logs > 0 else 0
+
+    tmp_dir = 'uploads/tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    anomaly_types_path = os.path.join(tmp_dir, f'anomaly_types_{run_id}.json')
+    with open(anomaly_types_path, 'w') as f:
+        json.dump(anomaly_types, f)
+
+    severity_counts = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
+    for item in anomaly_types:
+        sev = item.get('severity')
+        cnt = item.get('count', 0)
+        if sev in severity_counts:
+            severity_counts[sev] += cnt
+
+    return {
+        'run_id': run_id,
+        'analysis_summary': {
+            'total_logs': total_logs,
+            'total_anomalies': anomaly_count,
+            'success_rate': success_rate,
+            'index_name': job['index_name'],
+            'parser': job['parser'],
+            'model': job['model'],
+            'processing_time': round(processing_time, 2),
+            'created_at': datetime.now().isoformat()
+        },
+        'anomaly_types_path': anomaly_types_path,
+        'severity_counts': severity_counts
+    }
+
+
+def complete_job(job_id, outcome):
+    """Mark a job completed with the outcome of its run"""
+    conn = get_db_connection()
+    conn.execute('''
+        UPDATE analysis_jobs SET status = 'completed', stage = 'completed', progress = 100,
+            run_id = ?, summary_json = ?, finished_at = ? WHERE job_id = ?
+    ''', (outcome['run_id'], json.dumps(outcome), datetime.now(), job_id))
+    conn.commit()
+    conn.close()
+
+
+def run_job(job_id):
+    """Execute a claimed job and record its outcome"""
+    job = get_job(job_id)
+    if not job:
+        return
+    try:
+        outcome = run_analysis(job)
+        complete_job(job_id, outcome)
+        print(f"[JOBS] Job {job_id} completed as run {outcome['run_id']}")
+        if job['file_sha256'] and job['config_hash']:
+            try:
+                store_result(job['file_sha256'], job['config_hash'], job['user_id'], outcome)
+            except Exception as e:
+                print(f"[RESULT CACHE] Store failed: {e}")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        conn = get_db_connection()
+        conn.execute(
+            "UPDATE analysis_jobs SET status = 'failed', stage = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+            (str(e), datetime.now(), job_id)
+        )
+        conn.commit()
+        conn.close()
+        record_job('failed')
+        print(f"[JOBS] Job {job_id} failed: {e}")
+
+
+def _worker_main(poll_interval):
+    print(f"[JOBS] Analysis worker {os.getpid()} started")
+    while True:
+        job_id = claim_next_job()
+        if job_id is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(job_id)
+
+
+@atexit.register
+def _stop_workers():
+    for proc in _workers:
+        if proc.is_alive():
+            proc.terminate()
+
+
+def start_workers(num_workers=DEFAULT_WORKERS):
+    """Start the worker pool for this process (idempotent; dead workers are replaced)"""
+    with _workers_lock:
+        _workers[:] = [proc for proc in _workers if proc.is_alive()]
+        # Jobs of workers that died are requeued before replacements start polling
+        reap_lost_jobs()
+        while len(_workers) < num_workers:
+            proc = multiprocessing.Process(target=_worker_main, args=(JOB_POLL_INTERVAL,), name='flashlog-analysis-worker')
+            proc.start()
+            _workers.append(proc)
+
+
+def _reuse_outcome(outcome, index_name):
+    """Adapt a cached outcome to a new upload of the same content.
+
+    The stored rows are queued for the index this upload asked for (unless the
+    cached run already went there), and the summary names that index.
+    """
+    outcome = dict(outcome, analysis_summary=dict(outcome['analysis_summary']))
+    if outcome['analysis_summary'].get('index_name') != index_name:
+        try:
+            submit_results(index_name, load_all_results(outcome['run_id']))
+        except Exception as e:
+            print(f"⚠️  Elasticsearch upload failed: {str(e)}")
+    outcome['analysis_summary']['index_name'] = index_name
+    outcome['analysis_summary']['created_at'] = datetime.now().isoformat()
+    return outcome
+
+
+def submit_analysis_job(user_id, file_path, file_name, parser, model, index_name, file_sha256=None):
+    """Queue an analysis and make sure workers are running to pick it up.
+
+    When file_sha256 is given and the same content was already analysed with the
+    same config, the job is completed right away from the stored run, whose rows
+    are indexed into index_name if they are not there yet.
+    With ANALYSIS_WORKERS set to 0 (e.g. the serverless deployment) the job runs inline.
+    """
+    config_hash = None
+    if file_sha256:
+        config_hash, outcome = lookup_result(file_sha256, parser, model, user_id, file_name=file_name)
+        if outcome is not None:
+            outcome = _reuse_outcome(outcome, index_name)
+            job_id = create_job(user_id, file_path, file_name, parser, model, index_name, file_sha256, config_hash)
+            complete_job(job_id, outcome)
+            try:
+                # Remember the index the rows now live in, so a repeat to it is not indexed twice
+                store_result(file_sha256, config_hash, user_id, outcome)
+            except Exception as e:
+                print(f"[RESULT CACHE] Store failed: {e}")
+            # Nothing reads the duplicate upload once the stored run answers it
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            print(f"[JOBS] Job {job_id} reused run {outcome['run_id']} for identical content")
+            return job_id
+    job_id = create_job(user_id, file_path, file_name, parser, model, index_name, file_sha256, config_hash)
+    num_workers = current_app.config.get('ANALYSIS_WORKERS', DEFAULT_WORKERS)
+    if num_workers > 0:
+        start_workers(num_workers)
+    else:
+        conn = get_db_connection()
+        conn.execute(
+            "UPDATE analysis_jobs SET status = 'running', started_at = ?, worker_pid = ?, attempts = 1 WHERE job_id = ?",
+            (datetime.now(), os.getpid(), job_id)
+        )
+        conn.commit()
+        conn.close()
+        run_job(job_id)
+    return job_id
+
+
+def _apply_job_to_session(job):
+    outcome = json.loads(job['summary_json'])
+    session['current_run'] = outcome['run_id']
+    session['analysis_summary'] = outcome['analysis_summary']
+    session['anomaly_types_path'] = outcome['anomaly_types_path']
+    session['severity_counts'] = outcome['severity_counts']
+    session.modified = True
+
+
+@jobs_bp.route('/jobs/<job_id>')
+def job_status_page(job_id):
+    """Progress page that polls the job status endpoint until the run is ready"""
+    if 'user_id' not in session:
+        flash('Please log in to view analysis progress.', 'error')
+        return redirect(url_for('auth.auth_page'))
+    job = get_job(job_id)
+    if not job or job['user_id'] != session['user_id']:
+        flash('Analysis job not found.', 'error')
+        return redirect('/user/dashboard')
+    if job['status'] == 'completed':
+        _apply_job_to_session(job)
+        return redirect(url_for('upload.analyzed_logs'))
+    return render_template('job_status.html', job=job)
+
+
+@jobs_bp.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Return status and progress of an analysis job"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    job = get_job(job_id)
+    if not job or job['user_id'] != session['user_id']:
+        return jsonify({'error': 'Job not found'}), 404
+    data = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'file_name': job['file_name'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    }
+    if job['status'] == 'completed':
+        _apply_job_to_session(job)
+        data['run_id'] = job['run_id']
+        data['redirect_url'] = url_for('upload.analyzed_logs')
+    elif job['status'] == 'failed':
+        data['error'] = job['error']
+    response = jsonify(data)
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
@@ -1,6 +1,5 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash
 import os
-import pandas as pd
 
 kibana_bp = Blueprint('kibana', __name__)
 
@@ -14,6 +13,7 @@ def kibana_dashboard():
         flash('No analysis results found. Please upload and analyze a log file first.', 'error')
         return redirect(url_for('dashboard.index'))
     try:
+        import pandas as pd
         results_df = pd.read_csv(analysis_file)
         results = results_df.to_dict(orient='records')
     except Exception as e:
@@ -0,0 +1,264 @@
+import re
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import observe_llm_call
+
+# Client for the external chat-completions API used to classify anomalies.
+#
+# Every API key gets its own pooled HTTP session, a token bucket kept in step
+# with the server's rate-limit headers, an adaptive (AIMD) limit on requests in
+# flight and a circuit breaker. Prompts sit in one shared queue and each key's
+# threads take work only when that key may send, so a slow, throttled or broken
+# key simply takes less work instead of stalling its share of the run.
+
+DEFAULT_MODEL = "llama3-70b-8192"
+REQUEST_TIMEOUT = 30
+MAX_ATTEMPTS = 3
+RUN_DEADLINE = 300  # Seconds before prompts still waiting are given up
+
+INITIAL_RATE = 1.0  # Requests per second per key until headers say otherwise
+BUCKET_CAPACITY = 5
+INITIAL_IN_FLIGHT = 2
+MAX_IN_FLIGHT = 8
+FAILURE_THRESHOLD = 5  # Consecutive failures that open a key's circuit
+CIRCUIT_COOLDOWN = 30  # Seconds an open circuit rejects work
+IDLE_WAIT = 0.05
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(value):
+    """Parse '12', '1.5s', '2m59.56s' or '250ms' into seconds; None if unparseable"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class RetryableError(Exception):
+    """A request failed in a way that another attempt (possibly on another key) may fix"""
+
+    def __init__(self, message, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+class KeyRejectedError(Exception):
+    """The server refused the API key itself (401/403); the key is useless until someone fixes it"""
+
+
+class KeyState:
+    """Rate limiting, concurrency and health of one API key"""
+
+    def __init__(self, api_key, rate=INITIAL_RATE, capacity=BUCKET_CAPACITY, max_in_flight=MAX_IN_FLIGHT):
+        self.api_key = api_key
+        self.label = f"{api_key[:10]}..."
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.max_in_flight = max_in_flight
+        self.limit = float(INITIAL_IN_FLIGHT)
+        self.in_flight = 0
+        self.failures = 0
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Reserve a request slot; returns 0 on success, else seconds to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self._refill(now)
+            if self.in_flight >= int(self.limit):
+                return IDLE_WAIT
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0
+
+    def cancel(self):
+        """Give back a reserved slot that was not used"""
+        with self._lock:
+            self.in_flight -= 1
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def release(self, success, headers=None, retry_after=None, throttled=False, rejected=False):
+        """Return a slot and adapt limits to how the request went"""
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if headers is not None:
+                self._apply_headers(headers, now)
+            if success:
+                self.failures = 0
+                self.limit = min(self.max_in_flight, self.limit + 1 / self.limit)
+                return
+            self.failures += 1
+            self.limit = max(1.0, self.limit / 2)
+            if throttled:
+                self.tokens = 0
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            if rejected or self.failures >= FAILURE_THRESHOLD:
+                self.paused_until = max(self.paused_until, now + CIRCUIT_COOLDOWN)
+                self.failures = 0
+                print(f"[WARN] Circuit opened for key {self.label} for {CIRCUIT_COOLDOWN}s")
+
+    def _apply_headers(self, headers, now):
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+        try:
+            remaining = float(remaining) if remaining is not None else None
+        except ValueError:
+            remaining = None
+        if remaining is None:
+            return
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+        if reset:
+            # Spread what is left of the window evenly over the time until it resets
+            self.rate = max(remaining / reset, 1 / reset, 0.01)
+            if remaining < 1:
+                self.paused_until = max(self.paused_until, now + reset)
+
+
+class LLMClient:
+    """Runs many chat prompts across a pool of API keys"""
+
+    def __init__(self, api_keys, api_url, model=DEFAULT_MODEL, timeout=REQUEST_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.api_url = api_url
+        self.model = model
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.keys = [KeyState(api_key) for api_key in api_keys]
+
+    def _post(self, key, prompt):
+        response = key.session.post(
+            self.api_url,
+            headers={"Authorization": f"Bearer {key.api_key}", "Content-Type": "application/json"},
+            json={"model": self.model, "messages": [{"role": "user", "content": prompt}]},
+            timeout=self.timeout
+        )
+        if response.status_code == 429:
+            raise RetryableError(
+                f"Rate limit hit for key {key.label}",
+                retry_after=parse_duration(response.headers.get('retry-after')),
+                throttled=True
+            )
+        if response.status_code in (401, 403):
+            raise KeyRejectedError(f"Key {key.label} rejected with {response.status_code}")
+        if response.status_code >= 500:
+            raise RetryableError(f"Server error {response.status_code} for key {key.label}")
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"], response.headers
+
+    def complete_all(self, prompts, deadline=RUN_DEADLINE):
+        """Send all prompts and return their replies in order (None where a prompt failed)"""
+        prompts = list(prompts)
+        replies = [None] * len(prompts)
+        if not prompts or not self.keys:
+            return replies
+        pending = deque((i, prompt, 0) for i, prompt in enumerate(prompts))
+        state = {'remaining': len(prompts)}
+        lock = threading.Lock()
+        done = threading.Event()
+        stop_at = time.monotonic() + deadline
+
+        def finish(index, reply):
+            with lock:
+                replies[index] = reply
+                state['remaining'] -= 1
+                if state['remaining'] == 0:
+                    done.set()
+
+        def retry_or_give_up(index, prompt, attempts):
+            if attempts + 1 < self.max_attempts:
+                # Any key may pick the prompt up again
+                pending.append((index, prompt, attempts + 1))
+            else:
+                finish(index, None)
+
+        def worker(key):
+            while not done.is_set():
+                if time.monotonic() > stop_at:
+                    done.set()
+                    return
+                if not pending:
+                    time.sleep(IDLE_WAIT)
+                    continue
+                wait = key.try_acquire()
+                if wait:
+                    time.sleep(min(wait, 1.0))
+                    continue
+                try:
+                    index, prompt, attempts = pending.popleft()
+                except IndexError:
+                    key.cancel()
+                    continue
+                start = time.time()
+                try:
+                    reply, headers = self._post(key, prompt)
+                    key.release(True, headers=headers)
+                    observe_llm_call('success', time.time() - start)
+                    print(f"[INFO] API key {key.label} used. Response time: {time.time() - start:.2f}s")
+                    finish(index, reply)
+                except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+                    key.release(False, retry_after=getattr(e, 'retry_after', None), throttled=getattr(e, 'throttled', False))
+                    observe_llm_call('retryable_error', time.time() - start)
+                    print(f"[WARN] API key {key.label} attempt {attempts + 1} failed: {e}")
+                    retry_or_give_up(index, prompt, attempts)
+                except Exception as e:
+                    # A rejected key opens its circuit at once so the retry lands on another key;
+                    # bad requests and unreadable replies still get their remaining attempts
+                    key.release(False, rejected=isinstance(e, KeyRejectedError))
+                    observe_llm_call('error', time.time() - start)
+                    print(f"[ERROR] API key {key.label} attempt {attempts + 1} failed: {e}")
+                    retry_or_give_up(index, prompt, attempts)
+
+        threads = [
+            threading.Thread(target=worker, args=(key,), name=f'flashlog-llm-{n}', daemon=True)
+            for key in self.keys for n in range(key.max_in_flight)
+        ]
+        for thread in threads:
+            thread.start()
+        done.wait(deadline)
+        done.set()
+        for thread in threads:
+            thread.join(timeout=self.timeout)
+        return replies
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client(api_keys, api_url):
+    """Process-wide client so sessions and learned rate limits survive between runs"""
+    global _client
+    with _client_lock:
+        if _client is None or _client.api_url != api_url or [k.api_key for k in _client.keys] != list(api_keys):
+            _client = LLMClient(api_keys, api_url)
+        return _client
@@ -0,0 +1,74 @@
+import re
+
+# Rule-based anomaly classifier that labels log lines without calling the LLM.
+# Every rule has a set of trigger words and a regex that confirms the match. A
+# line is split into lower-case words once; only rules sharing a trigger word
+# with it run their regex, so the common case (no trigger word at all) costs a
+# single set intersection. Rules are checked in priority order and the first
+# match wins. Lines no rule recognises return None and are left for the LLM.
+
+TAXONOMY = (
+    ('Security Threat', 'Critical',
+     {'injection', 'xss', 'brute', 'bruteforce', 'malware', 'intrusion', 'break', 'scan', 'portscan', 'suspicious'},
+     r'sql injection|\bxss\b|brute.?force|malware|intrusion|possible break-in|port ?scan|suspicious (?:activity|login|request)'),
+    ('Out of Memory', 'Critical',
+     {'memory', 'oom', 'killer', 'memoryerror', 'outofmemoryerror'},
+     r'out of memory|\boom\b|oom-killer|memoryerror|cannot allocate memory|memory exhausted'),
+    ('Application Crash', 'Critical',
+     {'segmentation', 'segfault', 'core', 'panic', 'fatal', 'unhandled', 'crash', 'crashed', 'crashing', 'sigsegv', 'sigabrt'},
+     r'segmentation fault|segfault|core dumped|\bpanic\b|fatal error|unhandled exception|\bcrash(?:ed|ing)?\b|sigsegv|sigabrt'),
+    ('Disk/Storage Failure', 'High',
+     {'space', 'disk', 'enospc', 'read', 'i', 'filesystem', 'quota'},
+     r'no space left on device|disk (?:full|quota|failure)|\benospc\b|read-only file system|i/o error|filesystem (?:full|error)|quota exceeded'),
+    ('Authentication Failure', 'High',
+     {'authentication', 'auth', 'invalid', 'login', 'failed', 'unauthorized', 'unauthorised', '401'},
+     r'authentication fail|auth(?:entication)? error|invalid (?:password|credentials|user)|login fail|failed (?:password|login)|\bunauthori[sz]ed\b|\b401\b'),
+    ('Access Denied', 'Medium',
+     {'permission', 'access', 'forbidden', '403', 'permitted'},
+     r'permission denied|access denied|forbidden|\b403\b|not permitted'),
+    ('TLS/Certificate Error', 'High',
+     {'certificate', 'ssl', 'tls'},
+     r'certificate (?:has )?(?:expired|verify failed|invalid)|ssl (?:handshake|error)|tls handshake'),
+    ('Database Error', 'High',
+     {'deadlock', 'sql', 'sqlstate', 'database', 'connections', 'ora'},
+     r'deadlock|sql(?:state)?\s*error|database (?:error|is locked)|too many connections|ora-\d{5}'),
+    ('Network Timeout', 'Medium',
+     {'timeout', 'timed', 'timedout', 'etimedout', '504'},
+     r'timed? ?out|timeout|etimedout|\b504\b'),
+    ('Connection Failure', 'Medium',
+     {'connection', 'unreachable', 'broken', 'econnrefused', 'econnreset'},
+     r'connection (?:reset|refused|closed|aborted|lost)|(?:network|host) (?:is )?unreachable|broken pipe|econnrefused|econnreset'),
+    ('Service Unavailable', 'High',
+     {'unavailable', 'gateway', '502', '503'},
+     r'service unavailable|bad gateway|\b50[23]\b'),
+    ('Resource Exhaustion', 'Medium',
+     {'files', 'resource', 'cpu', 'load', 'exhausted', 'rate'},
+     r'too many open files|resource temporarily unavailable|(?:cpu|load) (?:usage |average )?(?:too )?high|pool exhausted|rate limit exceeded'),
+    ('Configuration Error', 'Medium',
+     {'config', 'configuration', 'missing'},
+     r'config(?:uration)? (?:error|invalid|missing)|invalid config|missing (?:required )?(?:parameter|setting|property)'),
+    # Deliberately not matching a bare 'error': that word is in most anomalies and
+    # would keep them all from the LLM and the classification store
+    ('Application Exception', 'Medium',
+     {'traceback', 'exception', 'stack', 'stacktrace'},
+     r'traceback \(most recent call last\)|\bexception\b|stack ?trace'),
+)
+
+_WORD = re.compile(r'[a-z0-9]+')
+_RULES = [(anomaly_type, severity, frozenset(triggers), re.compile(pattern))
+          for anomaly_type, severity, triggers, pattern in TAXONOMY]
+_TRIGGERS = frozenset().union(*(triggers for _, _, triggers, _ in _RULES))
+
+
+def classify_line(line):
+    """Return {'type': ..., 'severity': ...} for a log line, or None if no rule matches"""
+    if not isinstance(line, str):
+        return None
+    text = line.lower()
+    words = _TRIGGERS.intersection(_WORD.findall(text))
+    if not words:
+        return None
+    for anomaly_type, severity, triggers, pattern in _RULES:
+        if not triggers.isdisjoint(words) and pattern.search(text):
+            return {'type': anomaly_type, 'severity': severity}
+    return None
@@ -3,34 +3,74 @@ from datetime import datetime
 import time
 from logai.applications.log_anomaly_detection import LogAnomalyDetection
 from logai.applications.application_interfaces import WorkFlowConfig
-from elasticsearch import Elasticsearch
+from logai.utils.tracing import PipelineTracer
+from .es_indexer import submit_results
+from .helpers import workflow_settings
 import os
 import uuid
 import logging
 import requests
 
 def send_to_elasticsearch(index_name, result_list):
+    """Queue results for bulk indexing on the background indexer (does not block)"""
     try:
-        es = Elasticsearch("http://localhost:9200")
-        # Test connection
-        if not es.ping():
-            print("⚠️  Elasticsearch is not running. Skipping Elasticsearch upload.")
-            return
-            
-        for _, result in result_list.iterrows():
-            doc = {
-                "log_line": result.get("logline", ""),
-                "anomaly": result.get("is_anomaly", False),
-                "score": float(result.get("is_anomaly", False)),
-                "timestamp": result.get("timestamp", datetime.utcnow().isoformat())
-            }
-            es.index(index=index_name, document=doc)
-        print("✅ Data successfully sent to Elasticsearch")
+        submit_results(index_name, result_list)
     except Exception as e:
         print(f"⚠️  Elasticsearch connection failed: {str(e)}")
         print("📝 Continuing without Elasticsearch upload...")
 
-def preprocess_log(filepath):
+PREPROCESS_CHUNK_LINES = 10000  # Lines read from the upload at a time while cleaning
+KEEP_CLEANED_COPY = os.environ.get('FLASHLOG_KEEP_CLEANED_CSV') == '1'  # Also write <upload>_cleaned.csv for debugging
+
+
+def iter_log_lines(filepath):
+    """Yield stripped, non-empty lines one at a time without reading the whole file"""
+    with open(filepath, "r", encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_line_chunks(filepath, chunk_size=PREPROCESS_CHUNK_LINES):
+    """Group the streamed lines of a log file into lists of at most chunk_size lines"""
+    chunk = []
+    for line in iter_log_lines(filepath):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def cleaned_copy_path(filepath):
+    """Path of the cleaned CSV copy of an upload, or None when it would overwrite the upload itself"""
+    cleaned_path = os.path.splitext(filepath)[0] + "_cleaned.csv"
+    if os.path.realpath(cleaned_path) == os.path.realpath(filepath):
+        logging.warning(f"Not writing a cleaned copy of {filepath}: it would overwrite the upload")
+        return None
+    return cleaned_path
+
+
+def _write_cleaned_chunk(chunk, cleaned_path, first):
+    if cleaned_path:
+        chunk.to_csv(cleaned_path, mode='w' if first else 'a', header=first, index=False)
+
+
+def _combine_chunks(frames):
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def preprocess_log(filepath, keep_cleaned_copy=KEEP_CLEANED_COPY):
+    """
+    Clean an upload into a DataFrame with a 'logline' column (plus a datetime
+    'timestamp' column when one was found or synthesized).
+    Returns (df, has_timestamp, cleaned_path); the cleaned CSV copy is only written
+    when keep_cleaned_copy is set, otherwise cleaned_path is None.
+    """
     filename = os.path.basename(filepath).lower()
     
     # Check if file is actually a CSV or just a log file with .csv extension
@@ -64,36 +104,41 @@ def preprocess_log(filepath):
         except Exception as e:
             return False
 
+    cleaned_path = None
+    if keep_cleaned_copy:
+        cleaned_path = cleaned_copy_path(filepath)
+    frames = []
+
     # Handle different file types
     is_csv = is_actual_csv(filepath)
     if filename.endswith(".txt") or filename.endswith(".log") or (filename.endswith(".csv") and not is_csv):
-        # Treat as unstructured log file
+        # Treat as unstructured log file, streamed line by line so memory stays bounded by the chunk size
         try:
-            with open(filepath, "r", encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            # Clean up lines and remove empty ones
-            cleaned_lines = []
-            for line in lines:
-                line = line.strip()
-                if line:  # Only add non-empty lines
-                    cleaned_lines.append(line)
-            
-            if not cleaned_lines:
+            now = pd.Timestamp.now()
+            total_lines = 0
+            for lines in iter_line_chunks(filepath):
+                chunk = pd.DataFrame({"logline": lines})
+                chunk["timestamp"] = now
+                _write_cleaned_chunk(chunk, cleaned_path, total_lines == 0)
+                frames.append(chunk)
+                total_lines += len(chunk)
+
+            if total_lines == 0:
                 raise ValueError("❌ File appears to be empty or contains no valid log entries.")
-            
-            df = pd.DataFrame({"logline": cleaned_lines})
-            df["timestamp"] = pd.Timestamp.now()
-            
+
         except Exception as e:
             logging.error(f"Error reading log file {filepath}: {str(e)}", exc_info=True)
             raise ValueError("Error reading log file. Please check the file format and try again.")
-            
+
+        return _combine_chunks(frames), True, cleaned_path
+
     else:
         # Handle as proper CSV file
         try:
-            chunks = pd.read_csv(filepath, encoding='utf-8', on_bad_lines='skip', chunksize=10000)
-            df_list = []
+            chunks = pd.read_csv(filepath, encoding='utf-8', on_bad_lines='skip', chunksize=PREPROCESS_CHUNK_LINES)
+            rows_written = 0
+            has_timestamp = False
+            columns = None
             for chunk in chunks:
                 # Apply normalizations and append to df_list
                 chunk.columns = [col.strip().lower() for col in chunk.columns]
@@ -178,16 +223,22 @@ def preprocess_log(filepath):
                             print(f"⚠️  No typical log patterns found, but keeping {len(chunk)} non-empty entries")
                 else:
                     raise ValueError("❌ No valid log entries found after cleaning.")
-                df_list.append(chunk)
-            df = pd.concat(df_list) if df_list else pd.DataFrame()
+                # Later chunks are written under the first chunk's header, so keep their columns aligned with it
+                if columns is None:
+                    columns = list(chunk.columns)
+                else:
+                    chunk = chunk.reindex(columns=columns)
+                _write_cleaned_chunk(chunk, cleaned_path, rows_written == 0)
+                frames.append(chunk)
+                rows_written += len(chunk)
+                has_timestamp = has_timestamp or "timestamp" in chunk.columns
+            if rows_written == 0 and cleaned_path:
+                pd.DataFrame().to_csv(cleaned_path, index=False)
         except Exception as e2:
             logging.error(f"Error reading file {filepath}: {str(e2)}", exc_info=True)
             raise ValueError("Error reading file. Please check the file format and try again.")
 
-    cleaned_path = filepath.replace(".csv", "_cleaned.csv").replace(".txt", "_cleaned.csv").replace(".log", "_cleaned.csv")
-    df.to_csv(cleaned_path, index=False)
-    # Check for timestamp column after normalization
-    return cleaned_path, "timestamp" in df.columns
+    return _combine_chunks(frames), has_timestamp, cleaned_path
 
 def call_external_api(logline, api_url, api_key):
     headers = {
@@ -209,14 +260,23 @@ def call_external_api(logline, api_url, api_key):
         print(f"API call failed: {e}")
         return None
 
-def process_log_file(filepath, parser_algo, model_type, index_name):
+def process_log_file(filepath, parser_algo, model_type, index_name, progress_callback=None, tracer=None):
+    """Run anomaly detection on an uploaded file; each stage is timed into tracer if given"""
     start_time = time.time()
-    
-    cleaned_path, has_timestamp = preprocess_log(filepath)
+    if tracer is None:
+        tracer = PipelineTracer()
 
-    # Load the cleaned data and ensure timestamp is in datetime format
-    df = pd.read_csv(cleaned_path)
-    if has_timestamp and 'timestamp' in df.columns:
+    def report(stage, progress):
+        if progress_callback is not None:
+            progress_callback(stage, progress)
+
+    report('preprocessing', 5)
+    with tracer.stage('preprocess_log') as record:
+        df, has_timestamp, cleaned_path = preprocess_log(filepath)
+        record.rows_out = len(df)
+
+    # Chunks were parsed separately; make sure the combined column is one datetime dtype
+    if has_timestamp and 'timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
         print(f"🔧 Converting timestamp column to datetime format...")
         try:
             df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
@@ -229,8 +289,6 @@ def process_log_file(filepath, parser_algo, model_type, index_name):
             logging.error(f"Timestamp conversion failed for file {filepath}: {e}", exc_info=True)
             print("🔧 Using current time as fallback")
             df['timestamp'] = pd.Timestamp.now()
-        # Save the updated DataFrame with proper datetime format
-        df.to_csv(cleaned_path, index=False)
 
     dimensions = {
         "body": ["logline"]
@@ -238,37 +296,18 @@ def process_log_file(filepath, parser_algo, model_type, index_name):
     if has_timestamp:
         dimensions["timestamp"] = ["timestamp"]
 
-    config = WorkFlowConfig.from_dict({
-        "data_loader_config": {
-            "filepath": cleaned_path,
+    # The cleaned frame goes straight to the detector instead of through a CSV file
+    config = WorkFlowConfig.from_dict(dict(
+        workflow_settings(parser_algo, model_type),
+        in_memory_data_loader_config={
+            "data": df,
             "dimensions": dimensions,
             "infer_datetime": True,
             "datetime_format": None  # Let pandas auto-detect the format
-        },
-        "preprocessor_config": {
-            "custom_delimiters_regex": []
-        },
-        "log_parser_config": {
-            "parsing_algorithm": parser_algo
-        },
-        "log_vectorizer_config": {
-            "algo_name": "tfidf"
-        },
-        "categorical_encoder_config": {
-            "encoding_type": "onehot"
-        },
-        "feature_extractor_config": {
-            "max_feature_len": 100
-        },
-        "anomaly_detection_config": {
-            "algo_name": model_type,
-            "algo_params": {
-                "nu": 0.05 if model_type == "one_class_svm" else 0.1  # More conservative for One-Class SVM
-            }
         }
-    })
+    ))
 
-    detector = LogAnomalyDetection(config)
+    detector = LogAnomalyDetection(config, tracer=tracer)
     
     # All algorithms now work with the enhanced timestamp handling
     if has_timestamp:
@@ -276,8 +315,11 @@ def process_log_file(filepath, parser_algo, model_type, index_name):
     else:
         print(f"⚠️  No timestamp column found, using log sequence for analysis")
     
+    report('detecting', 25)
     detector.execute()
-    results = detector.results
+    with tracer.stage('collect_results') as record:
+        results = detector.results
+        record.rows_out = len(results)
     
     # Aggregate counts for dashboard
     if 'severity' in results.columns:
@@ -313,10 +355,13 @@ def process_log_file(filepath, parser_algo, model_type, index_name):
     print(f"⏱️  Processing completed in {processing_time:.2f} seconds")
     
     # Send to Elasticsearch if available
-    try:
-        send_to_elasticsearch(index_name, results)
-    except Exception as e:
-        print(f"⚠️  Elasticsearch upload failed: {str(e)}")
+    report('indexing', 65)
+    # Only measures handing the results to the background indexer
+    with tracer.stage('elasticsearch_submit', rows_in=len(results)):
+        try:
+            send_to_elasticsearch(index_name, results)
+        except Exception as e:
+            print(f"⚠️  Elasticsearch upload failed: {str(e)}")
     
     return results, processing_time
 
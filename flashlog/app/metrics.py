@@ -0,0 +1,346 @@
+import ctypes
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Blueprint, Response, current_app, g, request
+
+# Prometheus metrics for the web process and its analysis worker processes.
+#
+# Every metric, label value and histogram bucket is declared below, so the whole
+# layout is fixed at import time and lives in one flat shared-memory array of
+# doubles. Each process (the web server and every forked worker) writes only to
+# its own slot of that array, so recording a sample is an index lookup and an
+# add, with no dicts, strings or locks shared between processes. /metrics sums
+# the slots when it is scraped. A forked process takes over the slot of a
+# process that has exited, counts included, so short-lived children (respawned
+# job workers, Drain's process pool) do not use slots up and totals never go
+# down. Only more than MAX_PROCESS_SLOTS processes alive at once share the last
+# slot, where concurrent adds can be lost. Workers started with a non-fork start
+# method, or servers that import the app separately in every worker, only report
+# the process that answers the scrape.
+
+MAX_PROCESS_SLOTS = 64  # Live processes beyond this share the last slot
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+THROUGHPUT_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+BLUEPRINTS = ('main', 'auth', 'admin', 'dashboard', 'download', 'history', 'kibana', 'upload', 'jobs', 'metrics',
+              'none', 'other')
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+JOB_STAGES = ('preprocess_log', 'load_data', 'preprocess', 'feature_extraction',
+              'anomaly_detection', 'collect_results', 'elasticsearch_submit', 'to_records', 'classification',
+              'save_results', 'aggregation', 'total', 'other')
+CACHES = ('normalizer', 'classification', 'summary', 'session', 'result')
+
+_metrics = []
+_width = 0
+
+
+class _Metric:
+    kind = None
+    series_width = 1
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=()):
+        global _width
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.combos = list(itertools.product(*labelvalues)) if labelnames else [()]
+        self.offset = _width
+        self._children = {
+            combo: self._child(self.offset + i * self.series_width) for i, combo in enumerate(self.combos)
+        }
+        _width += len(self.combos) * self.series_width
+        _metrics.append(self)
+
+    def labels(self, *values):
+        """The series for these label values; look it up once and keep it for the hot path"""
+        return self._children[values]
+
+    def _label_text(self, combo, extra=None):
+        pairs = list(zip(self.labelnames, combo))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class _CounterChild:
+    __slots__ = ('_offset',)
+
+    def __init__(self, offset):
+        self._offset = offset
+
+    def inc(self, amount=1.0):
+        index = _slot_base + self._offset
+        with _local_lock:
+            _values[index] += amount
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    _child = _CounterChild
+
+    def inc(self, amount=1.0):
+        self._children[()].inc(amount)
+
+    def render(self, totals):
+        lines = []
+        for i, combo in enumerate(self.combos):
+            lines.append(f'{self.name}{self._label_text(combo)} {_format(totals[self.offset + i])}')
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ('_offset', '_buckets', '_sum_index')
+
+    def __init__(self, offset, buckets):
+        self._offset = offset
+        self._buckets = buckets
+        self._sum_index = offset + len(buckets) + 1
+
+    def observe(self, value):
+        base = _slot_base
+        bucket = base + self._offset + bisect_left(self._buckets, value)
+        with _local_lock:
+            _values[bucket] += 1
+            _values[base + self._sum_index] += value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(float(b) for b in buckets)
+        # Per series: one count per bucket, one for +Inf, then the sum
+        self.series_width = len(self.buckets) + 2
+        super().__init__(name, documentation, labelnames, labelvalues)
+
+    def _child(self, offset):
+        return _HistogramChild(offset, self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def render(self, totals):
+        lines = []
+        bounds = [_format(b) for b in self.buckets] + ['+Inf']
+        for i, combo in enumerate(self.combos):
+            offset = self.offset + i * self.series_width
+            cumulative = 0.0
+            for j, bound in enumerate(bounds):
+                cumulative += totals[offset + j]
+                lines.append(f'{self.name}_bucket{self._label_text(combo, ("le", bound))} {_format(cumulative)}')
+            lines.append(f'{self.name}_sum{self._label_text(combo)} {_format(totals[offset + len(bounds)])}')
+            lines.append(f'{self.name}_count{self._label_text(combo)} {_format(cumulative)}')
+        return lines
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REQUEST_LATENCY = Histogram(
+    'flashlog_http_request_duration_seconds', 'HTTP request latency by blueprint',
+    ('blueprint',), (BLUEPRINTS,)
+)
+REQUESTS = Counter(
+    'flashlog_http_requests_total', 'HTTP responses by blueprint and status class',
+    ('blueprint', 'status'), (BLUEPRINTS, STATUS_CLASSES)
+)
+JOB_STAGE_DURATION = Histogram(
+    'flashlog_job_stage_duration_seconds', 'Analysis job duration by pipeline stage',
+    ('stage',), (JOB_STAGES,), buckets=STAGE_BUCKETS
+)
+JOBS = Counter(
+    'flashlog_jobs_total', 'Finished analysis jobs by outcome',
+    ('status',), (('completed', 'failed'),)
+)
+ROWS_PROCESSED = Counter('flashlog_rows_processed_total', 'Log rows analysed (use rate() for rows per second)')
+JOB_THROUGHPUT = Histogram(
+    'flashlog_job_rows_per_second', 'Rows per second of each analysis job', buckets=THROUGHPUT_BUCKETS
+)
+LLM_LATENCY = Histogram(
+    'flashlog_llm_request_duration_seconds', 'LLM API request latency by outcome',
+    ('outcome',), (('success', 'retryable_error', 'error'),), buckets=LLM_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'flashlog_cache_requests_total', 'Cache lookups by cache and result (hit ratio = hit / (hit + miss))',
+    ('cache', 'result'), (CACHES, ('hit', 'miss'))
+)
+
+# Shared storage, sized now that every metric above is declared
+try:
+    _values = multiprocessing.RawArray(ctypes.c_double, MAX_PROCESS_SLOTS * _width)
+    _slot_pids = multiprocessing.RawArray(ctypes.c_long, MAX_PROCESS_SLOTS)
+    _next_slot = multiprocessing.RawValue(ctypes.c_int, 0)  # Slots ever used
+    _slot_lock = multiprocessing.Lock()
+except (OSError, ImportError):
+    # No shared memory/semaphores (e.g. some serverless sandboxes): this process only
+    _values = (ctypes.c_double * (MAX_PROCESS_SLOTS * _width))()
+    _slot_pids = (ctypes.c_long * MAX_PROCESS_SLOTS)()
+    _next_slot = ctypes.c_int(0)
+    _slot_lock = threading.Lock()
+
+_local_lock = threading.Lock()
+_slot_base = 0
+
+
+def _process_alive(pid):
+    if pid <= 0 or os.name == 'nt':
+        # Forks never happen on Windows, and os.kill(pid, 0) would terminate the process there
+        return pid > 0
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _claim_slot():
+    global _slot_base, _local_lock
+    pid = os.getpid()
+    with _slot_lock:
+        used = _next_slot.value
+        # Take over the slot of an exited process (or an earlier one with this pid, also gone)
+        slot = next((s for s in range(used) if _slot_pids[s] == pid or not _process_alive(_slot_pids[s])), None)
+        if slot is None:
+            slot = min(used, MAX_PROCESS_SLOTS - 1)
+            _next_slot.value = slot + 1
+        _slot_pids[slot] = pid
+    _slot_base = slot * _width
+    # A lock held by another thread at fork time would never be released here
+    _local_lock = threading.Lock()
+
+
+_claim_slot()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_claim_slot)
+
+
+def _totals():
+    used = min(_next_slot.value, MAX_PROCESS_SLOTS)
+    totals = [0.0] * _width
+    for slot in range(used):
+        base = slot * _width
+        for i, value in enumerate(_values[base:base + _width]):
+            totals[i] += value
+    return totals
+
+
+def render_metrics(extra_gauges=()):
+    """Prometheus text exposition of all metrics plus (name, help, value) gauges"""
+    totals = _totals()
+    lines = []
+    for metric in _metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.render(totals))
+    for name, documentation, samples in extra_gauges:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            label_text = '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}' if labels else ''
+            lines.append(f'{name}{label_text} {_format(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# Hot-path helpers: series are looked up once here, not per call
+
+_request_series = {
+    blueprint: (REQUEST_LATENCY.labels(blueprint), [REQUESTS.labels(blueprint, s) for s in STATUS_CLASSES])
+    for blueprint in BLUEPRINTS
+}
+_stage_series = {stage: JOB_STAGE_DURATION.labels(stage) for stage in JOB_STAGES}
+_llm_series = {outcome: LLM_LATENCY.labels(outcome) for outcome in ('success', 'retryable_error', 'error')}
+_cache_series = {
+    cache: (CACHE_REQUESTS.labels(cache, 'hit'), CACHE_REQUESTS.labels(cache, 'miss')) for cache in CACHES
+}
+
+
+def observe_request(blueprint, status_code, seconds):
+    latency, statuses = _request_series.get(blueprint or 'none') or _request_series['other']
+    latency.observe(seconds)
+    statuses[min(max(status_code // 100, 1), 5) - 1].inc()
+
+
+def observe_llm_call(outcome, seconds):
+    _llm_series[outcome].observe(seconds)
+
+
+def record_cache(cache, hit, count=1):
+    _cache_series[cache][0 if hit else 1].inc(count)
+
+
+def record_job(status, stages=(), rows=0, seconds=None):
+    """Record a finished job: outcome, stage durations (StageRecord-like dicts) and rows analysed"""
+    JOBS.labels(status).inc()
+    for stage in stages:
+        (_stage_series.get(stage['name']) or _stage_series['other']).observe(stage['wall_time'])
+    if seconds is not None:
+        _stage_series['total'].observe(seconds)
+    if rows:
+        ROWS_PROCESSED.inc(rows)
+        if seconds:
+            JOB_THROUGHPUT.observe(rows / seconds)
+
+
+# Endpoint
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _queue_gauges():
+    from .auth import get_db_connection
+    from .db import activity_writer
+    gauges = []
+    try:
+        conn = get_db_connection()
+        rows = conn.execute(
+            "SELECT status, COUNT(*) AS n FROM analysis_jobs WHERE status IN ('queued', 'running') GROUP BY status"
+        ).fetchall()
+        conn.close()
+        counts = {'queued': 0, 'running': 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        gauges.append(('flashlog_analysis_jobs', 'Analysis jobs waiting or running',
+                       [((('status', status),), n) for status, n in counts.items()]))
+    except Exception as e:
+        print(f"[METRICS] Could not read job queue depth: {e}")
+    gauges.append(('flashlog_activity_queue_depth', 'Activity log rows waiting to be written',
+                   [((), activity_writer.queue_depth())]))
+    return gauges
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(_queue_gauges()), content_type=CONTENT_TYPE)
+
+
+def init_app(app, limiter=None):
+    """Register /metrics and time every request by blueprint"""
+    app.register_blueprint(metrics_bp)
+    if limiter is not None:
+        limiter.exempt(metrics_bp)
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            observe_request(request.blueprint, response.status_code, time.perf_counter() - start)
+        return response
@@ -0,0 +1,70 @@
+import threading
+
+# Packs anomaly templates into prompts that fit a token budget. Token counts come
+# from tiktoken when it is installed (cl100k_base is close enough to the hosted
+# model's tokenizer for budgeting); otherwise a characters-per-token estimate is
+# used, which errs on the side of smaller prompts.
+
+PROMPT_TOKEN_BUDGET = 6000  # Prompt plus expected reply must fit the model's 8192-token context
+REPLY_TOKENS_PER_TEMPLATE = 30  # One {"id", "type", "severity"} object in the reply
+MAX_TEMPLATE_TOKENS = 400  # Longer templates are truncated before packing
+CHARS_PER_TOKEN = 3.5
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        with _encoder_lock:
+            if not _encoder_loaded:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding('cl100k_base')
+                except Exception:
+                    _encoder = None
+                _encoder_loaded = True
+    return _encoder
+
+
+def estimate_tokens(text):
+    """Number of tokens text is expected to use in a prompt"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text so that it uses at most max_tokens"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens]) + '...'
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    return text if len(text) <= max_chars else text[:max_chars] + '...'
+
+
+def pack_by_token_budget(items, item_text, overhead_tokens, budget=PROMPT_TOKEN_BUDGET,
+                         per_item_reply_tokens=REPLY_TOKENS_PER_TEMPLATE):
+    """
+    Greedily pack items into batches whose estimated prompt size (overhead plus the
+    item lines plus the expected reply) stays within budget. Every batch holds at
+    least one item.
+    """
+    batches = []
+    current = []
+    used = overhead_tokens
+    for item in items:
+        cost = estimate_tokens(item_text(item)) + per_item_reply_tokens
+        if current and used + cost > budget:
+            batches.append(current)
+            current = []
+            used = overhead_tokens
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,129 @@
+import copy
+import hashlib
+import json
+import os
+import uuid
+from .auth import get_db_connection
+from .helpers import workflow_settings
+from .metrics import record_cache
+from .results_store import get_run, copy_run
+
+# Content-addressed cache of finished analyses. An upload is identified by the
+# SHA-256 of its bytes plus a hash of the WorkFlowConfig it runs with, so a file
+# that is uploaded again with the same parser and model is answered from the
+# stored run instead of going through the pipeline a second time.
+
+MAX_CACHED_RESULTS = 500
+MAX_RESULT_AGE_DAYS = 30
+CACHE_VERSION = 1  # Bump when a pipeline change alters the results of an unchanged config
+
+
+def analysis_config_hash(parser, model):
+    """Stable hash of the normalized workflow config an analysis runs with"""
+    payload = json.dumps({
+        'version': CACHE_VERSION,
+        'workflow': workflow_settings(parser, model)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _evict(conn):
+    # Stale and least recently used entries go, with anomaly type summaries no other entry
+    # points at. Their runs stay: they are the owning user's analysis history.
+    evicted = conn.execute('''
+        SELECT rowid, outcome_json FROM analysis_result_cache
+        WHERE last_used_at < datetime('now', ?) OR rowid IN (
+            SELECT rowid FROM analysis_result_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+    ''', (f'-{MAX_RESULT_AGE_DAYS} days', MAX_CACHED_RESULTS)).fetchall()
+    if not evicted:
+        return
+    conn.executemany('DELETE FROM analysis_result_cache WHERE rowid = ?', [(row['rowid'],) for row in evicted])
+    kept = {
+        json.loads(row['outcome_json']).get('anomaly_types_path')
+        for row in conn.execute('SELECT outcome_json FROM analysis_result_cache')
+    }
+    for row in evicted:
+        path = json.loads(row['outcome_json']).get('anomaly_types_path')
+        if path and path not in kept and os.path.exists(path):
+            os.remove(path)
+
+
+def _is_available(outcome):
+    # Entries outlive neither their run nor the anomaly type summary the results page reads
+    return get_run(outcome['run_id']) is not None and os.path.exists(outcome.get('anomaly_types_path') or '')
+
+
+def get_cached_result(file_sha256, config_hash, user_id, file_name=None):
+    """Return the job outcome of an identical earlier analysis, or None.
+
+    The user's own run is reused as is. A run of another user is copied to a new
+    run owned by this user (rows are copied in SQLite, not re-analysed), and that
+    copy is cached for the user's next repeat. Entries whose run is gone are dropped.
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT user_id, run_id, outcome_json FROM analysis_result_cache
+            WHERE file_sha256 = ? AND config_hash = ?
+            ORDER BY user_id = ? DESC, last_used_at DESC
+        ''', (file_sha256, config_hash, user_id)).fetchall()
+        stale = []
+        outcome = None
+        for row in rows:
+            candidate = json.loads(row['outcome_json'])
+            if not _is_available(candidate):
+                stale.append(row['user_id'])
+                continue
+            if row['user_id'] == user_id:
+                outcome = candidate
+            else:
+                outcome = copy.deepcopy(candidate)
+                outcome['run_id'] = str(uuid.uuid4())
+                if not copy_run(candidate['run_id'], outcome['run_id'], user_id, file_name=file_name):
+                    stale.append(row['user_id'])
+                    outcome = None
+                    continue
+                conn.execute('''
+                    INSERT OR REPLACE INTO analysis_result_cache (file_sha256, config_hash, user_id, run_id, outcome_json)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (file_sha256, config_hash, user_id, outcome['run_id'], json.dumps(outcome)))
+            conn.execute('''
+                UPDATE analysis_result_cache SET last_used_at = CURRENT_TIMESTAMP
+                WHERE file_sha256 = ? AND config_hash = ? AND user_id IN (?, ?)
+            ''', (file_sha256, config_hash, user_id, row['user_id']))
+            break
+        conn.executemany(
+            'DELETE FROM analysis_result_cache WHERE file_sha256 = ? AND config_hash = ? AND user_id = ?',
+            [(file_sha256, config_hash, stale_user) for stale_user in stale]
+        )
+        conn.commit()
+        return outcome
+    finally:
+        conn.close()
+
+
+def store_result(file_sha256, config_hash, user_id, outcome):
+    """Cache the outcome of a completed job and evict the least recently used entries"""
+    conn = get_db_connection()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO analysis_result_cache (file_sha256, config_hash, user_id, run_id, outcome_json)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (file_sha256, config_hash, user_id, outcome['run_id'], json.dumps(outcome)))
+        _evict(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def lookup_result(file_sha256, parser, model, user_id, file_name=None):
+    """Return (config_hash, cached outcome or None) for an upload; lookup errors count as a miss"""
+    config_hash = analysis_config_hash(parser, model)
+    try:
+        outcome = get_cached_result(file_sha256, config_hash, user_id, file_name=file_name)
+    except Exception as e:
+        print(f"[RESULT CACHE] Lookup failed: {e}")
+        outcome = None
+    record_cache('result', outcome is not None)
+    return config_hash, outcome
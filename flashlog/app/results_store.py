@@ -0,0 +1,377 @@
+import json
+import math
+from .auth import get_db_connection
+
+# Row-wise storage for analysis results. Each log line of a run is one row in
+# analysis_results keyed by (run_id, row_num), so a page of results is an index
+# range scan instead of deserializing the whole run.
+
+INSERT_BATCH_SIZE = 5000
+
+# Columns stored natively; anything else a result record carries goes into extra_json
+RESULT_COLUMNS = ('logline', 'timestamp', 'is_anomaly', 'anomaly_type', 'severity')
+
+# Upper bounds (seconds) of the run processing time histogram kept in dashboard_metrics
+PROCESSING_TIME_BUCKETS = (1, 5, 10, 30, 60, 300, 900)
+
+INSERT_RESULT_SQL = '''
+    INSERT INTO analysis_results (run_id, row_num, logline, timestamp, is_anomaly, anomaly_type, severity, extra_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _clean_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _record_to_row(run_id, row_num, record):
+    extra = {k: _clean_value(v) for k, v in record.items() if k not in RESULT_COLUMNS}
+    timestamp = _clean_value(record.get('timestamp'))
+    return (
+        run_id,
+        row_num,
+        _clean_value(record.get('logline')),
+        str(timestamp) if timestamp is not None else None,
+        1 if _clean_value(record.get('is_anomaly')) else 0,
+        _clean_value(record.get('anomaly_type')),
+        _clean_value(record.get('severity')),
+        json.dumps(extra, default=str) if extra else None
+    )
+
+
+def _row_to_record(row):
+    record = {
+        'row_num': row['row_num'],
+        'logline': row['logline'],
+        'timestamp': row['timestamp'],
+        'is_anomaly': row['is_anomaly'],
+    }
+    if row['anomaly_type'] is not None:
+        record['anomaly_type'] = row['anomaly_type']
+    if row['severity'] is not None:
+        record['severity'] = row['severity']
+    if row['extra_json']:
+        record.update(json.loads(row['extra_json']))
+    return record
+
+
+def _processing_time_bucket(seconds):
+    for upper in PROCESSING_TIME_BUCKETS:
+        if seconds <= upper:
+            return f'processing_time_le_{upper}'
+    return 'processing_time_le_inf'
+
+
+def _increment_metrics(conn, increments):
+    conn.executemany('''
+        INSERT INTO dashboard_metrics (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    ''', list(increments.items()))
+
+
+def save_run_results(run_id, user_id, records, file_name=None, processing_time=None):
+    """Store a run and its result records row by row in a single transaction.
+
+    The global dashboard counters are updated in the same transaction, so they
+    always agree with the runs that were actually stored.
+    """
+    conn = get_db_connection()
+    try:
+        total_rows = 0
+        anomaly_count = 0
+        conn.execute(
+            'INSERT INTO analysis_runs (run_id, user_id, results_json, file_name, processing_time) VALUES (?, ?, ?, ?, ?)',
+            (run_id, user_id, '[]', file_name, processing_time)
+        )
+        batch = []
+        for row_num, record in enumerate(records):
+            row = _record_to_row(run_id, row_num, record)
+            anomaly_count += row[4]
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                conn.executemany(INSERT_RESULT_SQL, batch)
+                total_rows += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(INSERT_RESULT_SQL, batch)
+            total_rows += len(batch)
+        conn.execute(
+            'UPDATE analysis_runs SET total_rows = ?, anomaly_count = ? WHERE run_id = ?',
+            (total_rows, anomaly_count, run_id)
+        )
+        increments = {'total_logs': total_rows, 'total_anomalies': anomaly_count, 'files_processed': 1}
+        if processing_time is not None:
+            increments['total_processing_time'] = processing_time
+            increments['timed_runs'] = 1
+            increments[_processing_time_bucket(processing_time)] = 1
+        _increment_metrics(conn, increments)
+        conn.commit()
+        return total_rows, anomaly_count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def copy_run(source_run_id, run_id, user_id, file_name=None):
+    """Copy a stored run and all its result rows to a new run owned by user_id.
+
+    The rows are copied inside SQLite with INSERT ... SELECT, so nothing is
+    deserialized. Returns False if the source run does not exist.
+    """
+    conn = get_db_connection()
+    try:
+        copied = conn.execute('''
+            INSERT INTO analysis_runs (run_id, user_id, results_json, total_rows, anomaly_count, dashboard_json,
+                                       file_name, processing_time, stage_timings_json)
+            SELECT ?, ?, results_json, total_rows, anomaly_count, dashboard_json,
+                   COALESCE(?, file_name), processing_time, stage_timings_json
+            FROM analysis_runs WHERE run_id = ?
+        ''', (run_id, user_id, file_name, source_run_id)).rowcount
+        if not copied:
+            conn.rollback()
+            return False
+        conn.execute('''
+            INSERT INTO analysis_results (run_id, row_num, logline, timestamp, is_anomaly, anomaly_type, severity, extra_json)
+            SELECT ?, row_num, logline, timestamp, is_anomaly, anomaly_type, severity, extra_json
+            FROM analysis_results WHERE run_id = ?
+        ''', (run_id, source_run_id))
+        row = conn.execute('SELECT total_rows, anomaly_count FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
+        if row['total_rows'] is not None:
+            _increment_metrics(conn, {
+                'total_logs': row['total_rows'],
+                'total_anomalies': row['anomaly_count'] or 0,
+                'files_processed': 1
+            })
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def load_dashboard_metrics():
+    """Read the global dashboard counters as a dict of name -> value"""
+    conn = get_db_connection()
+    rows = conn.execute('SELECT name, value FROM dashboard_metrics').fetchall()
+    conn.close()
+    return {row['name']: row['value'] for row in rows}
+
+
+def list_runs(user_id, limit=100):
+    """Most recent runs of a user, metadata only"""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT run_id, file_name, created_at, total_rows, anomaly_count, processing_time
+        FROM analysis_runs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+    ''', (user_id, limit)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_run(run_id):
+    """Return run metadata (without any result rows), or None if the run does not exist"""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT run_id, user_id, created_at, total_rows, anomaly_count FROM analysis_runs WHERE run_id = ?',
+        (run_id,)
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def save_dashboard_data(run_id, dashboard_data):
+    """Store the precomputed dashboard aggregation of a run"""
+    conn = get_db_connection()
+    conn.execute(
+        'UPDATE analysis_runs SET dashboard_json = ? WHERE run_id = ?',
+        (json.dumps(dashboard_data, default=str), run_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_dashboard_data(run_id):
+    """Return the stored dashboard aggregation of a run, or None if it was never computed"""
+    conn = get_db_connection()
+    row = conn.execute('SELECT dashboard_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
+    conn.close()
+    if not row or not row['dashboard_json']:
+        return None
+    return json.loads(row['dashboard_json'])
+
+
+def save_stage_timings(run_id, stage_timings):
+    """Store the per-stage pipeline timings of a run (a list of stage dicts)"""
+    conn = get_db_connection()
+    conn.execute(
+        'UPDATE analysis_runs SET stage_timings_json = ? WHERE run_id = ?',
+        (json.dumps(stage_timings), run_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_stage_timings(run_id):
+    """Return the per-stage pipeline timings of a run, or [] if none were recorded"""
+    conn = get_db_connection()
+    row = conn.execute('SELECT stage_timings_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
+    conn.close()
+    if not row or not row['stage_timings_json']:
+        return []
+    return json.loads(row['stage_timings_json'])
+
+
+def _load_legacy_results(run_id):
+    # Runs stored before row-wise storage only have the results_json blob
+    conn = get_db_connection()
+    row = conn.execute('SELECT results_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
+    conn.close()
+    if not row:
+        return []
+    results = json.loads(row['results_json'])
+    return results if isinstance(results, list) else []
+
+
+def count_results(run_id):
+    """Number of result rows stored for a run"""
+    run = get_run(run_id)
+    if not run:
+        return 0
+    if run['total_rows'] is None:
+        return len(_load_legacy_results(run_id))
+    return run['total_rows']
+
+
+def fetch_results(run_id, offset, limit):
+    """Read one page of results; cost depends on limit, not on the page number"""
+    run = get_run(run_id)
+    if not run:
+        return []
+    if run['total_rows'] is None:
+        return _load_legacy_results(run_id)[offset:offset + limit]
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT * FROM analysis_results
+        WHERE run_id = ? AND row_num >= ? AND row_num < ?
+        ORDER BY row_num
+    ''', (run_id, offset, offset + limit)).fetchall()
+    conn.close()
+    return [_row_to_record(row) for row in rows]
+
+
+def load_all_results(run_id):
+    """Read every result row of a run in order"""
+    run = get_run(run_id)
+    if not run:
+        return []
+    if run['total_rows'] is None:
+        return _load_legacy_results(run_id)
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT * FROM analysis_results WHERE run_id = ? ORDER BY row_num',
+        (run_id,)
+    ).fetchall()
+    conn.close()
+    return [_row_to_record(row) for row in rows]
+
+
+def load_anomalies(run_id):
+    """Read only the anomalous rows of a run"""
+    run = get_run(run_id)
+    if not run:
+        return []
+    if run['total_rows'] is None:
+        return [row for row in _load_legacy_results(run_id) if row.get('is_anomaly')]
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT * FROM analysis_results WHERE run_id = ? AND is_anomaly = 1 ORDER BY row_num',
+        (run_id,)
+    ).fetchall()
+    conn.close()
+    return [_row_to_record(row) for row in rows]
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _matches_filters(record, anomaly_only, severity, anomaly_type, start, end, query):
+    if anomaly_only is not None and bool(record.get('is_anomaly')) != anomaly_only:
+        return False
+    if severity and record.get('severity') != severity:
+        return False
+    if anomaly_type and record.get('anomaly_type') != anomaly_type:
+        return False
+    timestamp = record.get('timestamp')
+    if start and (timestamp is None or str(timestamp) < start):
+        return False
+    if end and (timestamp is None or str(timestamp) > end):
+        return False
+    if query and query.lower() not in str(record.get('logline') or '').lower():
+        return False
+    return True
+
+
+def query_results(run_id, anomaly_only=None, severity=None, anomaly_type=None, start=None, end=None,
+                  query=None, after=-1, limit=100):
+    """Filter the results of a run in the database and return one keyset page.
+
+    Rows are returned in row_num order starting after the given row_num cursor,
+    so each page costs the same no matter how deep into the run it is.
+    anomaly_only=True keeps only anomalies, False only normal rows, None both.
+    Returns (records, next_cursor) where next_cursor is None on the last page.
+    """
+    run = get_run(run_id)
+    if not run:
+        return [], None
+
+    if run['total_rows'] is None:
+        legacy = _load_legacy_results(run_id)
+        matched = []
+        for row_num, record in enumerate(legacy):
+            if row_num <= after or not _matches_filters(record, anomaly_only, severity, anomaly_type, start, end, query):
+                continue
+            matched.append(dict(record, row_num=row_num))
+            if len(matched) > limit:
+                break
+    else:
+        clauses = ['run_id = ?', 'row_num > ?']
+        params = [run_id, after]
+        if anomaly_only is not None:
+            clauses.append('is_anomaly = ?')
+            params.append(1 if anomaly_only else 0)
+        if severity:
+            clauses.append('severity = ?')
+            params.append(severity)
+        if anomaly_type:
+            clauses.append('anomaly_type = ?')
+            params.append(anomaly_type)
+        if start:
+            clauses.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            clauses.append('timestamp <= ?')
+            params.append(end)
+        if query:
+            clauses.append("logline LIKE ? ESCAPE '\\'")
+            params.append(f'%{_escape_like(query)}%')
+        # Fetch one extra row to know whether another page exists
+        params.append(limit + 1)
+        conn = get_db_connection()
+        rows = conn.execute(
+            f'SELECT * FROM analysis_results WHERE {" AND ".join(clauses)} ORDER BY row_num LIMIT ?',
+            params
+        ).fetchall()
+        conn.close()
+        matched = [_row_to_record(row) for row in rows]
+
+    if len(matched) > limit:
+        matched = matched[:limit]
+        return matched, matched[-1]['row_num']
+    return matched, None
@@ -1,29 +1,26 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, session, make_response, jsonify
 import os
 import glob
-import pandas as pd
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 # from .logai_handler import process_log_file  # Temporarily commented out due to dependency issues
 from .auth import login_required, get_current_user, get_db_connection
-import numpy as np
-from collections import Counter
-from transformers import pipeline
+from .db import activity_writer
+from .session_cache import is_session_token_valid
 from .helpers import classify_all_anomalies
+from .results_store import get_run, load_all_results, load_anomalies, query_results, load_dashboard_data, save_dashboard_data, load_stage_timings
+from .summarizer import summarize_text, SummarizerUnavailable, SummarizerBusy
+from .summary_cache import get_or_create_summary
 import json
 
 def log_user_activity(user_id, activity_type, description, details=None, status='success', ip_address=None, user_agent=None, file_name=None, file_size=None, processing_time=None, anomalies_detected=None, total_logs=None, old_value=None, new_value=None):
-    """Log user activity to the database with enhanced tracking"""
+    """Log user activity to the database with enhanced tracking.
+
+    The row is queued and written in a batch by the background activity writer.
+    """
     try:
         print(f"🔍 Logging activity: {activity_type} - {description}")
-        conn = get_db_connection()
-        conn.execute('''
-            INSERT INTO user_activities (user_id, activity_type, description, details, status, ip_address, user_agent, file_name, file_size, processing_time, anomalies_detected, total_logs, old_value, new_value)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, activity_type, description, details, status, ip_address, user_agent, file_name, file_size, processing_time, anomalies_detected, total_logs, old_value, new_value))
-        conn.commit()
-        conn.close()
-        print(f"✅ Activity logged successfully: {activity_type}")
+        activity_writer.submit((user_id, activity_type, description, details, status, ip_address, user_agent, file_name, file_size, processing_time, anomalies_detected, total_logs, old_value, new_value))
     except Exception as e:
         print(f"❌ Error logging activity: {str(e)}")
         import traceback
@@ -31,6 +28,9 @@ def log_user_activity(user_id, activity_type, description, details=None, status=
 
 main = Blueprint('main', __name__)
 
+RESULTS_PAGE_SIZE = 100
+MAX_RESULTS_PAGE_SIZE = 1000
+
 @main.before_request
 def before_request():
     """Set cache headers and check authentication for all routes"""
@@ -53,14 +53,7 @@ def before_request():
         
         # Verify session is still valid
         if 'session_token' in session:
-            conn = get_db_connection()
-            valid_session = conn.execute(
-                'SELECT * FROM user_sessions WHERE session_token = ? AND expires_at > CURRENT_TIMESTAMP',
-                (session['session_token'],)
-            ).fetchone()
-            conn.close()
-            
-            if not valid_session:
+            if not is_session_token_valid(session['session_token']):
                 session.clear()
                 flash('Session expired. Please log in again.', 'error')
                 return redirect(url_for('auth.auth_page'))
@@ -321,12 +314,7 @@ def get_latest_activities():
     return response
 
 def generate_ai_summary(loglines, anomaly_types, mitigation_map):
-    from transformers import pipeline
-    import os
-    model_path = 'flashlog/models/t5-small'
-    if not os.path.exists(model_path):
-        return 'Local AI model not found. Please download the model.'
-    summarizer = pipeline('summarization', model=model_path)
+    """Summarize log lines with the local T5 model; raises SummarizerUnavailable or SummarizerBusy"""
     # Truncate if too long
     log_data = ' '.join(loglines)
     if len(log_data) > 5000:
@@ -340,8 +328,7 @@ def generate_ai_summary(loglines, anomaly_types, mitigation_map):
         f"Anomaly Types: {', '.join(anomaly_types)}\n\n"
         f"Mitigation Strategies: " + ' '.join([f"{atype}: {mitigation_map.get(atype, 'N/A')}" for atype in anomaly_types])
     )
-    summary = summarizer(prompt, max_length=180, min_length=60, do_sample=False)[0]['summary_text']
-    return summary
+    return summarize_text(prompt, max_length=180, min_length=60)
 
 @main.route('/flashlog-dashboard')
 @login_required
@@ -358,27 +345,25 @@ def flashlog_dashboard():
         flash('No analysis run found. Please analyze a log file first.')
         return redirect(url_for('dashboard.index'))
     try:
-        from .auth import get_db_connection
-        import json
-        conn = get_db_connection()
-        row = conn.execute('SELECT results_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
-        conn.close()
-        if not row:
+        if not get_run(run_id):
             print("[DEBUG] [Kibana] No results found in DB for run_id - redirecting")
             flash('Analysis results expired or not found.')
             return redirect(url_for('dashboard.index'))
-        analysis_results = json.loads(row['results_json'])
-        print(f"[DEBUG] [Kibana] Loaded results from DB, length: {len(analysis_results)}")
+        # Aggregations are computed once at analysis time; older runs are aggregated on first view
+        kibana_data = load_dashboard_data(run_id)
+        if kibana_data is None:
+            analysis_results = load_all_results(run_id)
+            print(f"[DEBUG] [Kibana] Aggregating stored results, length: {len(analysis_results)}")
+            if not analysis_results:
+                flash('Invalid analysis results.')
+                return redirect(url_for('dashboard.index'))
+            from .aggregation import aggregate_results
+            kibana_data = aggregate_results(analysis_results)
+            save_dashboard_data(run_id, kibana_data)
     except Exception as e:
         print(f"[DEBUG] [Kibana] Error loading from DB: {str(e)}")
         flash('Error loading analysis results from storage.', 'error')
         return redirect(url_for('dashboard.index'))
-    if not analysis_results or not isinstance(analysis_results, list):
-        print("[DEBUG] [Kibana] Loaded results invalid - redirecting")
-        flash('Invalid analysis results.')
-        return redirect(url_for('dashboard.index'))
-    # Process data for Kibana-style dashboard
-    kibana_data = process_kibana_dashboard_data(analysis_results)
     # Extract summary, severity_counts, anomaly_types for dashboard template
     analysis_summary = kibana_data.get('summary', {})
     # Severity counts: build dict with keys Critical, High, Medium, Low
@@ -407,20 +392,25 @@ def flashlog_dashboard():
                 mitigation_map[atype] = row.get('mitigation')
     # AI summary: always generate if not present
     loglines = [row['logline'] for row in kibana_data.get('table_data', [])[:50] if row.get('logline')]
-    ai_summary = generate_ai_summary(loglines, list(anomaly_types.keys()), mitigation_map)
+    ai_summary = get_or_create_summary(run_id, loglines, list(anomaly_types.keys()), mitigation_map, generate_ai_summary)
     # Load anomaly_types from temp file if available
     anomaly_types = []
     anomaly_types_path = session.get('anomaly_types_path')
     if anomaly_types_path and os.path.exists(anomaly_types_path):
         with open(anomaly_types_path, 'r') as f:
             anomaly_types = json.load(f)
+    try:
+        stage_timings = load_stage_timings(run_id)
+    except Exception as e:
+        print(f"[DEBUG] [Kibana] Error loading stage timings: {str(e)}")
+        stage_timings = []
     return render_template('flashlog_dashboard.html', 
                          analysis_summary=analysis_summary,
                          severity_counts=dict(severity_counts),
                          anomaly_types=anomaly_types,
                          kibana_data=kibana_data,
-                         results=analysis_results,
-                         ai_summary=ai_summary)
+                         ai_summary=ai_summary,
+                         stage_timings=stage_timings)
 
 @main.route('/api/dashboard-data', methods=['GET'])
 @login_required
@@ -433,348 +423,71 @@ def api_dashboard_data():
     severity_counts = session.get('severity_counts', {})
     analysis_summary = session.get('analysis_summary', {})
 
-    # Fetch the latest analysis logs for the current user/session
+    # Only the first page of logs is sent; the table fetches further pages from /api/runs/<run_id>/results
     logs = []
+    next_cursor = None
     run_id = session.get('current_run')
     if run_id:
-        from .auth import get_db_connection
-        import json as _json
-        conn = get_db_connection()
-        row = conn.execute('SELECT results_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
-        conn.close()
-        if row:
-            try:
-                logs = _json.loads(row['results_json'])
-            except Exception as e:
-                print(f"[API] Error loading logs for dashboard-data: {e}")
-                logs = []
+        try:
+            logs, next_cursor = query_results(run_id, limit=RESULTS_PAGE_SIZE)
+        except Exception as e:
+            print(f"[API] Error loading logs for dashboard-data: {e}")
+            logs = []
 
     data = {
         'anomalyTypes': anomaly_types,
         'severityCounts': severity_counts,
         'analysisSummary': analysis_summary,
-        'logs': logs
+        'runId': run_id,
+        'logs': logs,
+        'nextCursor': next_cursor
     }
     return jsonify(data)
 
-def process_kibana_dashboard_data(results):
-    """Process analysis results for Kibana-style dashboard visualizations"""
-    import pandas as pd
-    import numpy as np
-    from collections import Counter
-    import re
-    from datetime import datetime, timedelta
-    
-    # Convert results to DataFrame for easier processing
-    df = pd.DataFrame(results)
-    
-    # Basic statistics from your actual data
-    total_logs = len(df)
-    anomaly_count = df['is_anomaly'].sum() if 'is_anomaly' in df.columns else 0
-    normal_count = total_logs - anomaly_count
-    anomaly_percentage = (anomaly_count / total_logs * 100) if total_logs > 0 else 0
-    
-    # Generate metrics based on your actual data structure
-    # Unique log patterns (templates) as "hosts"
-    unique_patterns = df['logline'].nunique() if 'logline' in df.columns else 1
-    
-    # Severity levels as "UTC sources"
-    severity_count = 0
-    if 'logline' in df.columns:
-        log_lines = df['logline'].astype(str)
-        severity_count = len(log_lines[log_lines.str.contains(r'\b(error|warning|info|debug|critical)\b', case=False, regex=True)])
-    
-    # Processing time as "offset"
-    if 'processing_time_seconds' in df.columns:
-        try:
-            # Convert to numeric, handling any string concatenation issues
-            processing_times = pd.to_numeric(df['processing_time_seconds'], errors='coerce')
-            # Remove any NaN values
-            processing_times = processing_times.dropna()
-            
-            if len(processing_times) > 0:
-                avg_processing_time = int(processing_times.mean() * 1000)  # Convert to ms
-                max_processing_time = int(processing_times.max() * 1000)
-            else:
-                avg_processing_time = 993
-                max_processing_time = 3832
-        except Exception as e:
-            print(f"Error processing processing_time_seconds: {e}")
-            avg_processing_time = 993
-            max_processing_time = 3832
-    else:
-        avg_processing_time = 993
-        max_processing_time = 3832
-    
-    # Generate time-series data based on your actual data
-    time_series_data = generate_time_series_data(df)
-    
-    # Generate table data based on your actual data
-    table_data = generate_table_data(df)
-    
-    return {
-        'metrics': {
-            'host_count': unique_patterns,
-            'utc_sources': severity_count,
-            'average_offset': avg_processing_time,
-            'max_offset': max_processing_time
-        },
-        'time_series': time_series_data,
-        'table_data': table_data,
-        'summary': {
-            'total_logs': total_logs,
-            'anomaly_count': anomaly_count,
-            'normal_count': normal_count,
-            'anomaly_percentage': round(anomaly_percentage, 2)
-        },
-        'time_range': {
-            'start': '10:27:30',
-            'end': '10:32:00',
-            'interval': '5 seconds'
-        }
-    }
+@main.route('/api/runs/<run_id>/results', methods=['GET'])
+@login_required
+def api_run_results(run_id):
+    """Filtered, keyset-paginated results of an analysis run.
 
-def generate_time_series_data(df):
-    """Generate time-series data for Kibana-style charts based on actual log data"""
-    import numpy as np
-    from datetime import datetime, timedelta
-    
-    # Use actual timestamps if available, otherwise generate realistic ones
-    if 'timestamp' in df.columns and df['timestamp'].notna().any():
-        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-        df = df.dropna(subset=['timestamp'])
-        
-        if len(df) > 0:
-            # Use actual timestamps
-            time_range = pd.date_range(
-                start=df['timestamp'].min(),
-                end=df['timestamp'].max(),
-                periods=60  # 60 data points
-            )
-            time_points = time_range.tolist()
-        else:
-            # Fallback to generated timestamps
-            start_time = datetime.now().replace(hour=10, minute=27, second=30, microsecond=0)
-            time_points = [start_time + timedelta(seconds=i*5) for i in range(60)]
-    else:
-        # Generate realistic timestamps
-        start_time = datetime.now().replace(hour=10, minute=27, second=30, microsecond=0)
-        time_points = [start_time + timedelta(seconds=i*5) for i in range(60)]
-    
-    # Generate data based on actual log analysis results
-    np.random.seed(42)  # For consistent results
-    
-    # Anomaly Rate Over Time (green line) - based on actual anomaly data
-    anomaly_rate_data = []
-    if 'is_anomaly' in df.columns and len(df) > 0:
-        # Calculate anomaly rate for each time period
-        for i in range(len(time_points)):
-            if i < len(df):
-                # Use actual anomaly data if available
-                anomaly_rate = (df['is_anomaly'].iloc[:i+1].sum() / (i+1)) * 100
-                anomaly_rate_data.append(int(anomaly_rate * 10))  # Scale for visualization
-            else:
-                # Extend with realistic pattern
-                base_rate = (df['is_anomaly'].sum() / len(df)) * 100
-                noise = np.random.normal(0, 5)
-                anomaly_rate_data.append(int(max(0, base_rate * 10 + noise)))
-    else:
-        # Fallback data
-        for i in range(len(time_points)):
-            value = np.random.normal(15, 5)  # 15% base anomaly rate
-            anomaly_rate_data.append(int(max(0, value)))
-    
-    # Log Severity Distribution (two lines) - based on actual log content
-    error_severity_data = []
-    warning_severity_data = []
-    if 'logline' in df.columns and len(df) > 0:
-        log_lines = df['logline'].astype(str)
-        error_count = len(log_lines[log_lines.str.contains(r'\b(error|exception|fail)\b', case=False, regex=True)])
-        warning_count = len(log_lines[log_lines.str.contains(r'\b(warning|warn)\b', case=False, regex=True)])
-        
-        for i in range(len(time_points)):
-            if i < len(df):
-                # Use actual severity data
-                current_errors = len(log_lines.iloc[:i+1][log_lines.iloc[:i+1].str.contains(r'\b(error|exception|fail)\b', case=False, regex=True)])
-                current_warnings = len(log_lines.iloc[:i+1][log_lines.iloc[:i+1].str.contains(r'\b(warning|warn)\b', case=False, regex=True)])
-                error_severity_data.append(current_errors)
-                warning_severity_data.append(current_warnings)
-            else:
-                # Extend with realistic pattern
-                error_severity_data.append(error_count + int(np.random.normal(0, 2)))
-                warning_severity_data.append(warning_count + int(np.random.normal(0, 2)))
-    else:
-        # Fallback data
-        for i in range(len(time_points)):
-            error_severity_data.append(int(np.random.normal(10, 3)))
-            warning_severity_data.append(int(np.random.normal(15, 4)))
-    
-    # Processing Time Variance (blue line) - based on actual processing data
-    processing_variance_data = []
-    if 'processing_time_seconds' in df.columns and len(df) > 0:
-        try:
-            # Convert to numeric, handling any string concatenation issues
-            processing_times = pd.to_numeric(df['processing_time_seconds'], errors='coerce')
-            processing_times = processing_times.dropna()
-            
-            if len(processing_times) > 0:
-                for i in range(len(time_points)):
-                    if i < len(processing_times):
-                        # Use actual processing time variance
-                        variance = processing_times.iloc[:i+1].var() * 1000  # Convert to ms
-                        processing_variance_data.append(int(variance if not np.isnan(variance) else 0))
-                    else:
-                        # Extend with realistic pattern
-                        base_variance = processing_times.var() * 1000
-                        noise = np.random.normal(0, base_variance * 0.1)
-                        processing_variance_data.append(int(max(0, base_variance + noise)))
-            else:
-                # Fallback data if no valid processing times
-                for i in range(len(time_points)):
-                    value = np.random.normal(30000, 5000)
-                    processing_variance_data.append(int(max(0, value)))
-        except Exception as e:
-            print(f"Error processing processing_time_seconds in time series: {e}")
-            # Fallback data
-            for i in range(len(time_points)):
-                value = np.random.normal(30000, 5000)
-                processing_variance_data.append(int(max(0, value)))
-    else:
-        # Fallback data
-        for i in range(len(time_points)):
-            value = np.random.normal(30000, 5000)
-            processing_variance_data.append(int(max(0, value)))
-    
-    # Log Pattern Complexity (purple line) - based on actual log patterns
-    pattern_complexity_data = []
-    if 'logline' in df.columns and len(df) > 0:
-        log_lines = df['logline'].astype(str)
-        for i in range(len(time_points)):
-            if i < len(df):
-                # Calculate complexity based on unique patterns and length
-                current_logs = log_lines.iloc[:i+1]
-                unique_patterns = current_logs.nunique()
-                avg_length = current_logs.str.len().mean()
-                complexity = (unique_patterns * avg_length) / 100  # Normalize
-                pattern_complexity_data.append(int(complexity))
-            else:
-                # Extend with realistic pattern
-                base_complexity = (log_lines.nunique() * log_lines.str.len().mean()) / 100
-                noise = np.random.normal(0, base_complexity * 0.2)
-                pattern_complexity_data.append(int(max(0, base_complexity + noise)))
-    else:
-        # Fallback data
-        for i in range(len(time_points)):
-            if i < 10:  # Initial spike
-                value = np.random.normal(1500, 200)
-            else:  # Settled state
-                value = np.random.normal(1000, 200)
-            pattern_complexity_data.append(int(max(0, value)))
-    
-    return {
-        'time_points': [t.strftime('%H:%M:%S') for t in time_points],
-        'anomaly_rate': {
-            'label': 'Anomaly Rate (%)',
-            'data': anomaly_rate_data,
-            'color': '#10B981'  # Green
-        },
-        'severity_distribution': {
-            'errors': {
-                'label': 'Error Logs',
-                'data': error_severity_data,
-                'color': '#EF4444'  # Red
-            },
-            'warnings': {
-                'label': 'Warning Logs',
-                'data': warning_severity_data,
-                'color': '#F59E0B'  # Orange
-            }
-        },
-        'processing_variance': {
-            'label': 'Processing Time Variance (ms)',
-            'data': processing_variance_data,
-            'color': '#3B82F6'  # Blue
-        },
-        'pattern_complexity': {
-            'label': 'Log Pattern Complexity',
-            'data': pattern_complexity_data,
-            'color': '#8B5CF6'  # Purple
-        }
-    }
+    Query parameters: anomaly_only, severity, anomaly_type, start, end (timestamps),
+    q (substring of the log line), after (row_num cursor from the previous page) and limit.
+    """
+    run = get_run(run_id)
+    # Runs without an owner are only visible to admins
+    if not run or (run['user_id'] != session.get('user_id') and session.get('role') != 'admin'):
+        return jsonify({'error': 'Run not found'}), 404
 
-def generate_table_data(df):
-    """Generate table data for the right panel based on actual log data"""
-    table_data = []
-    
-    if len(df) > 0:
-        # Get actual data from the DataFrame
-        total_logs = len(df)
-        anomaly_count = df['is_anomaly'].sum() if 'is_anomaly' in df.columns else 0
-        
-        # Calculate processing time if available
-        if 'processing_time_seconds' in df.columns:
-            try:
-                # Convert to numeric, handling any string concatenation issues
-                processing_times = pd.to_numeric(df['processing_time_seconds'], errors='coerce')
-                processing_times = processing_times.dropna()
-                
-                if len(processing_times) > 0:
-                    avg_processing_time = processing_times.mean()
-                    max_processing_time = processing_times.max()
-                    processing_variance = processing_times.var()
-                else:
-                    avg_processing_time = 2.4
-                    max_processing_time = 5.0
-                    processing_variance = 1.0
-            except Exception as e:
-                print(f"Error processing processing_time_seconds in table data: {e}")
-                avg_processing_time = 2.4
-                max_processing_time = 5.0
-                processing_variance = 1.0
-        else:
-            avg_processing_time = 2.4
-            max_processing_time = 5.0
-            processing_variance = 1.0
-        
-        # Calculate log pattern complexity
-        if 'logline' in df.columns:
-            log_lines = df['logline'].astype(str)
-            unique_patterns = log_lines.nunique()
-            avg_length = log_lines.str.len().mean()
-            complexity = (unique_patterns * avg_length) / 100
-        else:
-            unique_patterns = 1
-            complexity = 1000
-        
-        # Count severity levels
-        error_count = 0
-        warning_count = 0
-        if 'logline' in df.columns:
-            log_lines = df['logline'].astype(str)
-            error_count = len(log_lines[log_lines.str.contains(r'\b(error|exception|fail)\b', case=False, regex=True)])
-            warning_count = len(log_lines[log_lines.str.contains(r'\b(warning|warn)\b', case=False, regex=True)])
-        
-        # Create table entry based on actual data
-        table_data.append({
-            'log_pattern': f'Pattern-{unique_patterns}',
-            'version': '1.0.1-analysis',
-            'severity_levels': error_count + warning_count,
-            'processing_time_ms': int(avg_processing_time * 1000),
-            'processing_variance_ms': int(processing_variance * 1000),
-            'pattern_complexity': int(complexity)
-        })
+    anomaly_only = request.args.get('anomaly_only', '').lower()
+    if anomaly_only in ('1', 'true', 'yes'):
+        anomaly_only = True
+    elif anomaly_only in ('0', 'false', 'no'):
+        anomaly_only = False
     else:
-        # Fallback data if no results
-        table_data.append({
-            'log_pattern': 'No Data',
-            'version': '1.0.1-analysis',
-            'severity_levels': 0,
-            'processing_time_ms': 2400,
-            'processing_variance_ms': 1000,
-            'pattern_complexity': 1000
-        })
-    
-    return table_data
+        anomaly_only = None
+    after = request.args.get('after', -1, type=int)
+    limit = request.args.get('limit', RESULTS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_RESULTS_PAGE_SIZE))
+    # Accept ISO 8601 timestamps as well as the stored 'YYYY-MM-DD HH:MM:SS' form
+    start = request.args.get('start', '').replace('T', ' ') or None
+    end = request.args.get('end', '').replace('T', ' ') or None
+
+    results, next_cursor = query_results(
+        run_id,
+        anomaly_only=anomaly_only,
+        severity=request.args.get('severity') or None,
+        anomaly_type=request.args.get('anomaly_type') or None,
+        start=start,
+        end=end,
+        query=request.args.get('q') or None,
+        after=after,
+        limit=limit
+    )
+    return jsonify({
+        'run_id': run_id,
+        'results': results,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
 
 @main.route('/summarize')
 @login_required
@@ -796,20 +509,17 @@ def summarize():
             else:
                 return jsonify({'error': 'No log data available for summarization'}), 400
         
-        # Load local model
-        model_path = 'flashlog/models/t5-small'
-        if not os.path.exists(model_path):
-            return jsonify({'error': 'Local model not found. Please download the model first.'}), 500
-        
-        # Create summarization pipeline
-        summarizer = pipeline('summarization', model=model_path)
-        
         # Truncate if too long (T5 has input limits)
         if len(log_data) > 5000:
             log_data = log_data[:5000] + "..."
         
-        # Generate summary
-        summary = summarizer(log_data, max_length=150, min_length=50, do_sample=False)[0]['summary_text']
+        # Generate summary with the shared, already-loaded model
+        try:
+            summary = summarize_text(log_data, max_length=150, min_length=50)
+        except SummarizerUnavailable:
+            return jsonify({'error': 'Local model not found. Please download the model first.'}), 500
+        except SummarizerBusy as e:
+            return jsonify({'error': str(e)}), 503
         
         # Log the activity
         user = get_current_user()
@@ -857,19 +567,7 @@ def dashboard():
             return redirect(url_for('main.dashboard'))
         # Retrieve anomalies from DB for immediate classification
         try:
-            from .auth import get_db_connection
-            import json
-            conn = get_db_connection()
-            row = conn.execute('SELECT results_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
-            conn.close()
-            if row:
-                analysis_results = json.loads(row['results_json'])
-                if isinstance(analysis_results, list):
-                    anomalies = [row for row in analysis_results if row.get('is_anomaly') == True or row.get('is_anomaly') == 1]
-                else:
-                    anomalies = []
-            else:
-                anomalies = []
+            anomalies = load_anomalies(run_id)
         except Exception as e:
             print(f"[ERROR] Failed to retrieve results for run_id {run_id}: {e}")
             flash('Error retrieving analysis results for classification.', 'error')
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from .db import get_connection
+from .metrics import record_cache
+
+# Bounded TTL/LRU cache of session tokens that were recently found valid in
+# user_sessions, so authenticated requests skip the database lookup. Entries are
+# dropped explicitly on logout and when an admin deactivates or deletes a user.
+# The cache is per process; the TTL bounds how long another worker process can
+# keep accepting a token that was revoked elsewhere.
+
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 60  # Seconds
+
+
+class SessionTokenCache:
+    def __init__(self, maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (user_id, valid_until)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Return the cached user_id for a still-valid token, or None"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token, user_id, expires_at=None):
+        valid_until = time.time() + self.ttl
+        if expires_at is not None:
+            valid_until = min(valid_until, expires_at)
+        with self._lock:
+            self._entries[token] = (user_id, valid_until)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in [t for t, entry in self._entries.items() if entry[0] == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+session_cache = SessionTokenCache()
+
+
+def _expiry_timestamp(expires_at):
+    # expires_at is written by login as a naive local datetime
+    try:
+        return datetime.fromisoformat(str(expires_at)).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def is_session_token_valid(token):
+    """True if the token belongs to an unexpired row in user_sessions"""
+    if session_cache.get(token) is not None:
+        record_cache('session', True)
+        return True
+    record_cache('session', False)
+    conn = get_connection()
+    row = conn.execute(
+        'SELECT user_id, expires_at FROM user_sessions WHERE session_token = ? AND expires_at > CURRENT_TIMESTAMP',
+        (token,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return False
+    session_cache.put(token, row['user_id'], _expiry_timestamp(row['expires_at']))
+    return True
+
+
+def revoke_session_token(token):
+    """Delete a session row and drop it from the cache"""
+    session_cache.invalidate(token)
+    conn = get_connection()
+    conn.execute('DELETE FROM user_sessions WHERE session_token = ?', (token,))
+    conn.commit()
+    conn.close()
+
+
+def revoke_user_sessions(user_id):
+    """Delete all session rows of a user and drop their cached tokens"""
+    conn = get_connection()
+    conn.execute('DELETE FROM user_sessions WHERE user_id = ?', (user_id,))
+    conn.commit()
+    conn.close()
+    session_cache.invalidate_user(user_id)
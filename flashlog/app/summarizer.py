@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+
+# Process-wide holder for the local T5 summarization pipeline. The model is
+# loaded once (lazily or by warm_up at startup) and shared by every request;
+# concurrent calls are queued and run through the pipeline in small batches.
+
+MODEL_PATH = 'flashlog/models/t5-small'
+REQUEST_QUEUE_SIZE = 32  # Pending summaries before callers are turned away
+MAX_BATCH_SIZE = 8
+BATCH_WAIT = 0.05  # Seconds the worker waits for more requests to join a batch
+REQUEST_TIMEOUT = 120
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_requests = queue.Queue(maxsize=REQUEST_QUEUE_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+class SummarizerUnavailable(RuntimeError):
+    """Raised when the local model is missing or cannot be loaded"""
+
+
+class SummarizerBusy(RuntimeError):
+    """Raised when the request queue is full"""
+
+
+class _SummaryRequest:
+    def __init__(self, text, max_length, min_length):
+        self.text = text
+        self.max_length = max_length
+        self.min_length = min_length
+        self.done = threading.Event()
+        self.summary = None
+        self.error = None
+
+
+def model_available():
+    return os.path.exists(MODEL_PATH)
+
+
+def get_pipeline():
+    """Return the shared summarization pipeline, loading it on first use"""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            if not model_available():
+                raise SummarizerUnavailable('Local AI model not found. Please download the model.')
+            from transformers import pipeline
+            print(f"[SUMMARIZER] Loading summarization model from {MODEL_PATH}")
+            _pipeline = pipeline('summarization', model=MODEL_PATH)
+    return _pipeline
+
+
+def warm_up(background=True):
+    """Load the model (and run one tiny summary) so the first request does not pay for it"""
+    def _load():
+        try:
+            get_pipeline()('warm up', max_length=8, min_length=1, do_sample=False)
+            print("[SUMMARIZER] Summarization model ready")
+        except SummarizerUnavailable as e:
+            print(f"[SUMMARIZER] Skipping warm-up: {e}")
+        except Exception as e:
+            print(f"[SUMMARIZER] Warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=_load, name='flashlog-summarizer-warmup', daemon=True).start()
+    else:
+        _load()
+
+
+def _run_batch(batch):
+    # Requests with different length limits cannot share a pipeline call
+    groups = {}
+    for req in batch:
+        groups.setdefault((req.max_length, req.min_length), []).append(req)
+    for (max_length, min_length), reqs in groups.items():
+        try:
+            outputs = get_pipeline()(
+                [req.text for req in reqs],
+                max_length=max_length,
+                min_length=min_length,
+                do_sample=False,
+                batch_size=len(reqs)
+            )
+            for req, output in zip(reqs, outputs):
+                req.summary = output['summary_text']
+        except Exception as e:
+            for req in reqs:
+                req.error = e
+        for req in reqs:
+            req.done.set()
+
+
+def _worker_main():
+    while True:
+        batch = [_requests.get()]
+        while len(batch) < MAX_BATCH_SIZE:
+            try:
+                batch.append(_requests.get(timeout=BATCH_WAIT))
+            except queue.Empty:
+                break
+        _run_batch(batch)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_main, name='flashlog-summarizer', daemon=True)
+            _worker.start()
+
+
+def summarize_text(text, max_length=150, min_length=50, timeout=REQUEST_TIMEOUT):
+    """Summarize text with the shared model; blocks until the batch containing it has run"""
+    if _pipeline is None and not model_available():
+        raise SummarizerUnavailable('Local AI model not found. Please download the model.')
+    _ensure_worker()
+    req = _SummaryRequest(text, max_length, min_length)
+    try:
+        _requests.put_nowait(req)
+    except queue.Full:
+        raise SummarizerBusy('Summarizer is busy, please try again shortly.')
+    if not req.done.wait(timeout):
+        raise SummarizerBusy('Timed out waiting for the summarizer.')
+    if req.error is not None:
+        raise req.error
+    return req.summary
@@ -0,0 +1,100 @@
+import hashlib
+import json
+from .auth import get_db_connection
+from .summarizer import SummarizerUnavailable, SummarizerBusy
+from .metrics import record_cache
+
+# Run-scoped cache for AI summaries. A run's results never change, so its summary
+# is generated once; the content hash of the summarized inputs also lets a new run
+# with identical lines and anomaly types reuse an existing summary.
+
+MAX_CACHED_SUMMARIES = 1000
+MAX_SUMMARY_AGE_DAYS = 30
+
+
+def summary_content_hash(loglines, anomaly_types, mitigation_map):
+    """Stable hash of everything that goes into a summary prompt"""
+    payload = json.dumps({
+        'loglines': [str(line) for line in loglines],
+        'anomaly_types': list(anomaly_types),
+        'mitigations': {str(k): str(v) for k, v in mitigation_map.items()}
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _evict(conn):
+    conn.execute(
+        "DELETE FROM ai_summaries WHERE last_used_at < datetime('now', ?)",
+        (f'-{MAX_SUMMARY_AGE_DAYS} days',)
+    )
+    conn.execute('''
+        DELETE FROM ai_summaries WHERE run_id IN (
+            SELECT run_id FROM ai_summaries ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+    ''', (MAX_CACHED_SUMMARIES,))
+
+
+def get_cached_summary(run_id, content_hash):
+    """Return a cached summary for this run or for identical inputs, or None"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            'SELECT run_id, summary FROM ai_summaries WHERE run_id = ? AND content_hash = ?',
+            (run_id, content_hash)
+        ).fetchone()
+        if not row:
+            row = conn.execute(
+                'SELECT run_id, summary FROM ai_summaries WHERE content_hash = ? ORDER BY last_used_at DESC LIMIT 1',
+                (content_hash,)
+            ).fetchone()
+        if not row:
+            return None
+        conn.execute('UPDATE ai_summaries SET last_used_at = CURRENT_TIMESTAMP WHERE run_id = ?', (row['run_id'],))
+        if row['run_id'] != run_id:
+            conn.execute('''
+                INSERT OR REPLACE INTO ai_summaries (run_id, content_hash, summary)
+                VALUES (?, ?, ?)
+            ''', (run_id, content_hash, row['summary']))
+        conn.commit()
+        return row['summary']
+    finally:
+        conn.close()
+
+
+def store_summary(run_id, content_hash, summary):
+    conn = get_db_connection()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO ai_summaries (run_id, content_hash, summary)
+            VALUES (?, ?, ?)
+        ''', (run_id, content_hash, summary))
+        _evict(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_or_create_summary(run_id, loglines, anomaly_types, mitigation_map, generate):
+    """Return the cached summary for a run, calling generate(...) only on a miss.
+
+    When the summarizer is unavailable or busy its message is returned but not
+    cached, so a later view can still produce a real summary.
+    """
+    content_hash = summary_content_hash(loglines, anomaly_types, mitigation_map)
+    try:
+        cached = get_cached_summary(run_id, content_hash)
+    except Exception as e:
+        print(f"[SUMMARY CACHE] Lookup failed: {e}")
+        cached = None
+    record_cache('summary', cached is not None)
+    if cached is not None:
+        return cached
+    try:
+        summary = generate(loglines, anomaly_types, mitigation_map)
+    except (SummarizerUnavailable, SummarizerBusy) as e:
+        return str(e)
+    try:
+        store_summary(run_id, content_hash, summary)
+    except Exception as e:
+        print(f"[SUMMARY CACHE] Store failed: {e}")
+    return summary
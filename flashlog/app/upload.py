@@ -1,10 +1,11 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, request, make_response
+from flask import Blueprint, render_template, session, redirect, url_for, flash, request, make_response, current_app
+import hashlib
 import os
-import pandas as pd
 from datetime import datetime
-from .auth import get_db_connection
-import json
+from .results_store import get_run, count_results, fetch_results
 import uuid
+from werkzeug.utils import secure_filename
+from .helpers import save_upload_in_chunks, upload_request_too_large, UploadTooLarge, DEFAULT_MAX_UPLOAD_BYTES
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -26,30 +27,25 @@ def analyzed_logs():
         flash('No analysis run found. Please analyze a log file first.')
         return redirect('/user/dashboard')
     try:
-        conn = get_db_connection()
-        row = conn.execute('SELECT results_json FROM analysis_runs WHERE run_id = ?', (run_id,)).fetchone()
-        conn.close()
-        if not row:
+        run = get_run(run_id)
+        if not run:
             print("[DEBUG] No results found in DB for run_id - redirecting")
             flash('Analysis results expired or not found.')
             return redirect('/user/dashboard')
-        analysis_results = json.loads(row['results_json'])
-        # Remove debug prints
-        # print(f"[DEBUG] Loaded results from DB, length: {len(analysis_results)}")
+        total_results = count_results(run_id)
+        start_idx = (page - 1) * per_page
+        end_idx = start_idx + per_page
+        # Only the requested page is read from storage
+        paginated_results = fetch_results(run_id, start_idx, per_page)
     except Exception as e:
         print(f"[DEBUG] Error loading from DB: {str(e)}")
         flash('Error loading analysis results from storage.', 'error')
         return redirect('/user/dashboard')
-    if not analysis_results or not isinstance(analysis_results, list):
+    if total_results == 0:
         print("[DEBUG] Loaded results invalid - redirecting")
         flash('Invalid analysis results.')
         return redirect('/user/dashboard')
-    results = analysis_results
-    total_results = len(results)
     total_pages = (total_results + per_page - 1) // per_page
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    paginated_results = results[start_idx:end_idx]
     response = make_response(render_template('analyzed_logs.html',
                          results=paginated_results,
                          csv_path=None,
@@ -80,6 +76,7 @@ def analysis_dashboard(analysis_id=None):
         flash('No analysis results found. Please upload and analyze a log file first.', 'error')
         return redirect('/user/dashboard')
     try:
+        import pandas as pd
         results_df = pd.read_csv(analysis_file)
         results = results_df.to_dict(orient='records')
     except Exception as e:
@@ -102,6 +99,12 @@ def upload_file():
         flash('Please log in to upload files.', 'error')
         return redirect(url_for('auth.auth_page'))
 
+    # Rejected before request.form/request.files make Werkzeug receive the whole body
+    max_bytes = current_app.config.get('MAX_UPLOAD_BYTES', DEFAULT_MAX_UPLOAD_BYTES)
+    if upload_request_too_large(max_bytes):
+        flash(f'File too large (max {max_bytes // (1024 * 1024)}MB)', 'error')
+        return redirect('/user/dashboard')
+
     file = request.files.get('logfile')
     parser_algo = request.form.get('parser')
     model_type = request.form.get('model')
@@ -112,32 +115,19 @@ def upload_file():
         return redirect('/user/dashboard')
 
     # Save file to a temp location
-    filepath = os.path.join('uploads', file.filename)
-    file.save(filepath)
-
-    # Call LogAI handler
-    from .logai_handler import process_log_file
-    results, processing_time = process_log_file(filepath, parser_algo, model_type, index_name)
-
-    # Save results to DB
-    conn = get_db_connection()
-    run_id = str(uuid.uuid4())
-    conn.execute(
-        'INSERT INTO analysis_runs (run_id, user_id, results_json) VALUES (?, ?, ?)',
-        (run_id, session['user_id'], json.dumps(results.to_dict(orient='records')))
-    )
-    conn.commit()
-    conn.close()
+    filename = secure_filename(file.filename)
+    filepath = os.path.join('uploads', f"{uuid.uuid4().hex}_{filename}")
+    hasher = hashlib.sha256()
+    try:
+        save_upload_in_chunks(file, filepath, max_bytes, hasher=hasher)
+    except UploadTooLarge:
+        flash(f'File too large (max {max_bytes // (1024 * 1024)}MB)', 'error')
+        return redirect('/user/dashboard')
 
-    # Update session
-    session['current_run'] = run_id
-    session['analysis_summary'] = {
-        'created_at': datetime.now().isoformat(),
-        'index_name': index_name,
-        'parser': parser_algo,
-        'model': model_type,
-        'processing_time': processing_time
-    }
+    # Queue the analysis; the progress page redirects to the results once the job completes
+    from .jobs import submit_analysis_job
+    job_id = submit_analysis_job(session['user_id'], filepath, filename, parser_algo, model_type, index_name,
+                                 file_sha256=hasher.hexdigest())
 
-    flash('Analysis complete!', 'success')
-    return redirect(url_for('upload.analyzed_logs')) 
\ No newline at end of file
+    flash('Analysis queued!', 'success')
+    return redirect(url_for('jobs.job_status_page', job_id=job_id))
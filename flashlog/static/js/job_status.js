@@ -0,0 +1,44 @@
+// FlashLog analysis job progress polling
+
+const JOB_POLL_INTERVAL_MS = 1500;
+
+function pollJobStatus(statusUrl) {
+    fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(job => {
+            updateJobUI(job);
+            if (job.status === 'completed' && job.redirect_url) {
+                window.location.href = job.redirect_url;
+            } else if (job.status !== 'failed') {
+                setTimeout(() => pollJobStatus(statusUrl), JOB_POLL_INTERVAL_MS);
+            }
+        })
+        .catch(error => {
+            console.error('Error polling job status:', error);
+            setTimeout(() => pollJobStatus(statusUrl), JOB_POLL_INTERVAL_MS * 2);
+        });
+}
+
+function updateJobUI(job) {
+    const progress = job.progress || 0;
+    document.getElementById('job-progress-bar').style.width = progress + '%';
+    document.getElementById('job-progress').textContent = progress + '%';
+    document.getElementById('job-stage').textContent = job.stage || job.status;
+    if (job.status === 'failed') {
+        const errorEl = document.getElementById('job-error');
+        errorEl.textContent = 'Analysis failed: ' + (job.error || 'unknown error');
+        errorEl.classList.remove('hidden');
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.getElementById('job-status');
+    if (container) {
+        pollJobStatus(container.dataset.statusUrl);
+    }
+});
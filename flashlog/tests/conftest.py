@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import pytest
+
+# app.auth creates flashlog/users.db relative to the working directory as soon as
+# it is imported, so move out of the source tree before any test imports the app
+os.chdir(tempfile.mkdtemp(prefix='flashlog-tests-'))
+
+from app import auth, create_app, db  # noqa: E402
+
+
+def _close_pooled_connections():
+    for conn in getattr(db._local, 'idle', []):
+        conn.close()
+    db._local.__dict__.clear()
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    """Fresh users.db in a temporary working directory (the app uses relative paths)"""
+    monkeypatch.chdir(tmp_path)
+    _close_pooled_connections()
+    auth.init_db()
+    yield tmp_path / db.DB_PATH
+    _close_pooled_connections()
+
+
+@pytest.fixture
+def flask_app(app_db):
+    return create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'ANALYSIS_WORKERS': 0,
+        'SUMMARIZER_WARMUP': False
+    })
+
+
+def login(client, user_id, role='user'):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['role'] = role
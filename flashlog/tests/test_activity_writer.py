@@ -0,0 +1,50 @@
+import os
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.auth import get_db_connection
+
+
+def _row(user_id, activity_type='upload'):
+    return (user_id, activity_type, 'test row') + (None,) * (len(db.ACTIVITY_COLUMNS) - 3)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_starts_with_an_empty_queue():
+    writer = db.activity_writer
+    # Queue directly so the parent's writer thread does not take the rows first
+    writer._queue.put_nowait(_row(1))
+    writer._queue.put_nowait(_row(2))
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if writer.queue_depth() == 0 and writer._thread is None else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        assert writer.queue_depth() == 2
+    finally:
+        while writer.queue_depth():
+            writer._queue.get_nowait()
+
+
+def test_login_activity_goes_through_the_writer(flask_app, monkeypatch):
+    conn = get_db_connection()
+    conn.execute(
+        'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+        ('alice', 'alice@example.com', generate_password_hash('s3cret-pass'))
+    )
+    conn.commit()
+    conn.close()
+    queued = []
+    monkeypatch.setattr(db.activity_writer, 'submit', queued.append)
+
+    response = flask_app.test_client().post('/auth/login', data={'username': 'alice', 'password': 's3cret-pass'})
+
+    assert response.status_code == 302
+    assert [(row[0], row[1]) for row in queued] == [(1, 'login')]
+    conn = get_db_connection()
+    written = conn.execute('SELECT COUNT(*) FROM user_activities').fetchone()[0]
+    conn.close()
+    assert written == 0
@@ -0,0 +1,112 @@
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('elasticsearch')
+
+from app import es_indexer  # noqa: E402
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers the few Elasticsearch endpoints the indexer uses"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        payload = json.dumps(body or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self._reply(200)
+
+    def do_GET(self):
+        self._reply(200, {'version': {'number': '8.9.0'}, 'tagline': 'You Know, for Search'})
+
+    def do_PUT(self):
+        # The client sends _bulk as PUT
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+        server = self.server
+        with server.lock:
+            server.bulk_attempts += 1
+            if server.fail_next > 0:
+                server.fail_next -= 1
+                self._reply(503, {'error': 'unavailable'})
+                return
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        actions, docs = lines[0::2], lines[1::2]
+        with server.lock:
+            server.bulks.append(docs)
+            server.indices.update(next(iter(action.values()))['_index'] for action in actions)
+        self._reply(200, {
+            'took': 1,
+            'errors': False,
+            'items': [{'index': {'_index': 'logs', 'status': 201, 'result': 'created'}} for _ in docs]
+        })
+
+    do_POST = do_PUT
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.bulks = []
+    server.indices = set()
+    server.bulk_attempts = 0
+    server.fail_next = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('FLASHLOG_ES_URL', 'http://127.0.0.1:{}'.format(server.server_address[1]))
+    monkeypatch.setenv('FLASHLOG_ES_CHUNK_SIZE', '3')
+    monkeypatch.setenv('FLASHLOG_ES_THREADS', '2')
+    importlib.reload(es_indexer)
+    yield server
+    server.shutdown()
+    server.server_close()
+    monkeypatch.undo()
+    importlib.reload(es_indexer)
+
+
+def _records(count, prefix='line'):
+    return [{'logline': '{} {}'.format(prefix, i), 'is_anomaly': i % 2, 'timestamp': '2024-01-01 00:00:0{}'.format(i % 10)}
+            for i in range(count)]
+
+
+class TestIndexer:
+
+    def test_documents_are_sent_in_bulk_chunks(self, stand_in):
+        indexed, failed = es_indexer.index_results('logs', es_indexer._snapshot(_records(7)))
+        assert (indexed, failed) == (7, 0)
+        assert sorted(len(docs) for docs in stand_in.bulks) == [1, 3, 3]
+        assert stand_in.indices == {'logs'}
+        docs = sorted((doc for bulk in stand_in.bulks for doc in bulk), key=lambda doc: doc['log_line'])
+        assert docs[1] == {'log_line': 'line 1', 'anomaly': True, 'score': 1.0, 'timestamp': '2024-01-01 00:00:01'}
+
+    def test_unavailable_bulk_request_is_retried(self, stand_in):
+        stand_in.fail_next = 1
+        assert es_indexer.index_results('logs', es_indexer._snapshot(_records(2))) == (2, 0)
+        assert stand_in.bulk_attempts == 2
+        assert len(stand_in.bulks) == 1
+
+    def test_queued_results_are_drained_on_flush(self, stand_in):
+        for batch in range(3):
+            assert es_indexer.submit_results('logs-{}'.format(batch), _records(5, prefix='batch {}'.format(batch)))
+        es_indexer.flush(timeout=10)
+        assert es_indexer._queue.unfinished_tasks == 0
+        assert sum(len(docs) for docs in stand_in.bulks) == 15
+        assert stand_in.indices == {'logs-0', 'logs-1', 'logs-2'}
+
+    def test_unreachable_cluster_is_skipped(self, stand_in):
+        stand_in.shutdown()
+        stand_in.server_close()
+        assert es_indexer.index_results('logs', es_indexer._snapshot(_records(2))) == (0, 0)
@@ -0,0 +1,39 @@
+from app.helpers import _merge_replies, extract_anomalies_from_text, parse_classification_reply
+
+TEMPLATES = {
+    1: {'id': 1, 'hash': 'h1', 'template': 'Failed password for <USER> from <IP>'},
+    2: {'id': 2, 'hash': 'h2', 'template': 'disk <PATH> is full'},
+}
+
+
+class TestClassificationReplies:
+
+    def test_plain_text_items_carry_template_ids(self):
+        reply = (
+            "Here is the classification:\n"
+            "Template 1 - Type: Authentication Failure, Severity: high\n"
+            "**Template #2**: type: \"Disk/Storage Failure\"; severity: Critical\n"
+        )
+        assert extract_anomalies_from_text(reply) == [
+            {'id': 1, 'type': 'Authentication Failure', 'severity': 'High'},
+            {'id': 2, 'type': 'Disk/Storage Failure', 'severity': 'Critical'},
+        ]
+
+    def test_template_without_severity_is_skipped(self):
+        assert extract_anomalies_from_text('Template 1: type: Unclassified') == []
+
+    def test_plain_text_reply_is_merged(self):
+        classified = {}
+        _merge_replies(['Template 2: Type: Disk Full, Severity: High'], TEMPLATES, classified)
+        assert classified == {'h2': {'type': 'Disk Full', 'severity': 'High'}}
+
+    def test_json_reply_is_merged(self):
+        classified = {}
+        reply = '[{"id": 1, "type": "Authentication Failure", "severity": "High"}, {"id": 9, "type": "X", "severity": "Low"}]'
+        _merge_replies([reply, None], TEMPLATES, classified)
+        assert classified == {'h1': {'type': 'Authentication Failure', 'severity': 'High'}}
+
+    def test_broken_json_falls_back_to_text(self):
+        assert parse_classification_reply('[Template 1: type: Crash, severity: low') == [
+            {'id': 1, 'type': 'Crash', 'severity': 'Low'}
+        ]
@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from app import jobs
+from app.auth import get_db_connection
+
+from tests.conftest import login
+
+
+def _create(user_id=1):
+    return jobs.create_job(user_id, 'upload.log', 'upload.log', 'drain', 'isolation_forest', 'logs')
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def _set_running(job_id, pid, started_at=None, attempts=1):
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE analysis_jobs SET status = 'running', worker_pid = ?, started_at = ?, attempts = ? WHERE job_id = ?",
+        (pid, started_at or datetime.now(), attempts, job_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestClaim:
+
+    def test_claims_oldest_queued_job_once(self, app_db):
+        first, second = _create(), _create()
+        assert jobs.claim_next_job() == first
+        assert jobs.claim_next_job() == second
+        assert jobs.claim_next_job() is None
+        job = jobs.get_job(first)
+        assert job['status'] == 'running'
+        assert job['worker_pid'] == os.getpid()
+        assert job['attempts'] == 1
+
+
+class TestRunJob:
+
+    def test_completed_job_stores_outcome(self, app_db, monkeypatch):
+        outcome = {'run_id': 'run-1', 'analysis_summary': {}, 'anomaly_types_path': None, 'severity_counts': {}}
+        monkeypatch.setattr(jobs, 'run_analysis', lambda job: outcome)
+        job_id = _create()
+        jobs.claim_next_job()
+        jobs.run_job(job_id)
+        job = jobs.get_job(job_id)
+        assert job['status'] == 'completed'
+        assert job['progress'] == 100
+        assert job['run_id'] == 'run-1'
+        assert json.loads(job['summary_json']) == outcome
+
+    def test_failed_job_keeps_error(self, app_db, monkeypatch):
+        def fail(job):
+            raise ValueError('Error reading log file')
+        monkeypatch.setattr(jobs, 'run_analysis', fail)
+        job_id = _create()
+        jobs.claim_next_job()
+        jobs.run_job(job_id)
+        job = jobs.get_job(job_id)
+        assert job['status'] == 'failed'
+        assert job['error'] == 'Error reading log file'
+        assert job['finished_at'] is not None
+
+
+class TestReapLostJobs:
+
+    def test_job_of_live_worker_is_kept(self, app_db):
+        job_id = _create()
+        _set_running(job_id, os.getpid())
+        assert jobs.reap_lost_jobs() == 0
+        assert jobs.get_job(job_id)['status'] == 'running'
+
+    def test_job_of_dead_worker_is_requeued(self, app_db):
+        job_id = _create()
+        _set_running(job_id, _dead_pid())
+        assert jobs.reap_lost_jobs() == 1
+        job = jobs.get_job(job_id)
+        assert job['status'] == 'queued'
+        assert job['worker_pid'] is None
+        assert jobs.claim_next_job() == job_id
+        assert jobs.get_job(job_id)['attempts'] == 2
+
+    def test_job_out_of_attempts_is_failed(self, app_db):
+        job_id = _create()
+        _set_running(job_id, _dead_pid(), attempts=jobs.MAX_JOB_ATTEMPTS)
+        jobs.reap_lost_jobs()
+        job = jobs.get_job(job_id)
+        assert job['status'] == 'failed'
+        assert 'worker stopped' in job['error']
+
+    def test_timed_out_job_is_failed(self, app_db):
+        job_id = _create()
+        _set_running(job_id, os.getpid(), started_at=datetime.now() - timedelta(seconds=jobs.JOB_TIMEOUT + 1))
+        jobs.reap_lost_jobs()
+        job = jobs.get_job(job_id)
+        assert job['status'] == 'failed'
+        assert job['error'] == 'Analysis timed out'
+
+
+class TestJobStatusPage:
+
+    def test_progress_page_script_is_served(self, flask_app):
+        job_id = _create()
+        client = flask_app.test_client()
+        login(client, 1)
+        page = client.get('/jobs/{}'.format(job_id))
+        assert page.status_code == 200
+        scripts = re.findall(r'<script src="(/[^"]+)"', page.get_data(as_text=True))
+        assert scripts == ['/static/js/job_status.js']
+        script = client.get(scripts[0])
+        assert script.status_code == 200
+        assert b'function pollJobStatus' in script.data
+
+    def test_status_endpoint_reports_progress(self, flask_app):
+        job_id = _create()
+        client = flask_app.test_client()
+        login(client, 1)
+        data = client.get('/api/jobs/{}'.format(job_id)).get_json()
+        assert (data['status'], data['progress']) == ('queued', 0)
+        login(client, 2)
+        assert client.get('/api/jobs/{}'.format(job_id)).status_code == 404
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from app import llm_client
+from app.llm_client import KeyRejectedError, KeyState, LLMClient, RetryableError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_client.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def _client(*keys, **kwargs):
+    return LLMClient(list(keys), 'http://llm.invalid/v1/chat', **kwargs)
+
+
+class TestTokenBucket:
+
+    def test_empty_bucket_waits_for_refill(self, clock):
+        key = KeyState('key-aaaaaaaaaa', rate=2.0, capacity=1)
+        assert key.try_acquire() == 0
+        key.release(True)
+        assert key.try_acquire() == pytest.approx(0.5)
+        clock[0] += 0.5
+        assert key.try_acquire() == 0
+
+    def test_rate_limit_headers_pause_an_exhausted_key(self, clock):
+        key = KeyState('key-aaaaaaaaaa')
+        assert key.try_acquire() == 0
+        key.release(True, headers={'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '2s'})
+        assert key.try_acquire() == pytest.approx(2.0)
+
+    def test_throttled_reply_honours_retry_after(self, clock):
+        key = KeyState('key-aaaaaaaaaa')
+        key.try_acquire()
+        key.release(False, retry_after=7, throttled=True)
+        assert key.tokens == 0
+        assert key.try_acquire() == pytest.approx(7)
+
+
+class TestAIMD:
+
+    def test_success_grows_and_failure_halves_the_limit(self, clock):
+        key = KeyState('key-aaaaaaaaaa', capacity=100)
+        for _ in range(20):
+            key.try_acquire()
+            key.release(True)
+        grown = key.limit
+        assert grown > llm_client.INITIAL_IN_FLIGHT
+        key.try_acquire()
+        key.release(False)
+        assert key.limit == pytest.approx(grown / 2)
+
+    def test_in_flight_is_capped_by_the_limit(self, clock):
+        key = KeyState('key-aaaaaaaaaa', capacity=100)
+        for _ in range(llm_client.INITIAL_IN_FLIGHT):
+            assert key.try_acquire() == 0
+        assert key.try_acquire() == llm_client.IDLE_WAIT
+
+
+class TestCircuitBreaker:
+
+    def test_consecutive_failures_open_the_circuit(self, clock):
+        key = KeyState('key-aaaaaaaaaa', capacity=100)
+        for _ in range(llm_client.FAILURE_THRESHOLD):
+            assert key.try_acquire() == 0
+            key.release(False)
+        assert key.try_acquire() == pytest.approx(llm_client.CIRCUIT_COOLDOWN)
+        clock[0] += llm_client.CIRCUIT_COOLDOWN
+        assert key.try_acquire() == 0
+
+    def test_rejected_key_opens_at_once(self, clock):
+        key = KeyState('key-aaaaaaaaaa')
+        key.try_acquire()
+        key.release(False, rejected=True)
+        assert key.try_acquire() == pytest.approx(llm_client.CIRCUIT_COOLDOWN)
+
+
+class TestCompleteAll:
+
+    def test_rejected_key_hands_its_prompts_to_the_other_key(self, monkeypatch):
+        client = _client('bad-aaaaaaaaaa', 'good-aaaaaaaaa')
+        calls = []
+        lock = threading.Lock()
+
+        def post(key, prompt):
+            with lock:
+                calls.append(key.api_key)
+            if key.api_key.startswith('bad'):
+                raise KeyRejectedError('401')
+            return 'reply to ' + prompt, {}
+
+        monkeypatch.setattr(client, '_post', post)
+        replies = client.complete_all(['a', 'b', 'c'], deadline=10)
+        assert replies == ['reply to a', 'reply to b', 'reply to c']
+        # The rejected key's circuit opened on its first failure
+        assert calls.count('bad-aaaaaaaaaa') <= llm_client.INITIAL_IN_FLIGHT
+
+    def test_bad_reply_is_retried(self, monkeypatch):
+        client = _client('only-aaaaaaaaa')
+        seen = []
+
+        def post(key, prompt):
+            seen.append(prompt)
+            if len(seen) == 1:
+                raise KeyError('choices')
+            return 'ok', {}
+
+        monkeypatch.setattr(client, '_post', post)
+        assert client.complete_all(['a'], deadline=10) == ['ok']
+        assert seen == ['a', 'a']
+
+    def test_prompt_gives_up_after_max_attempts(self, monkeypatch):
+        client = _client('only-aaaaaaaaa', max_attempts=2)
+        seen = []
+
+        def post(key, prompt):
+            seen.append(prompt)
+            raise RetryableError('server error')
+
+        monkeypatch.setattr(client, '_post', post)
+        assert client.complete_all(['a'], deadline=10) == [None]
+        assert seen == ['a', 'a']
@@ -0,0 +1,67 @@
+import pytest
+
+from app.local_classifier import classify_line
+
+
+class TestClassifyLine:
+
+    @pytest.mark.parametrize('line, anomaly_type, severity', [
+        ('kernel: Out of memory: Killed process 4242 (java)', 'Out of Memory', 'Critical'),
+        ('app[311]: Segmentation fault (core dumped)', 'Application Crash', 'Critical'),
+        ('write /var/lib/data: No space left on device', 'Disk/Storage Failure', 'High'),
+        ('sshd[88]: Failed password for root from 10.0.0.7', 'Authentication Failure', 'High'),
+        ('open /etc/shadow: permission denied', 'Access Denied', 'Medium'),
+        ('upstream request timed out after 30s', 'Network Timeout', 'Medium'),
+        ('dial tcp 10.0.0.9:5432: connection refused', 'Connection Failure', 'Medium'),
+        ('ERROR: deadlock detected while updating orders', 'Database Error', 'High'),
+        ('Exception in thread "main" java.lang.NullPointerException', 'Application Exception', 'Medium'),
+        ('Traceback (most recent call last):', 'Application Exception', 'Medium'),
+    ])
+    def test_known_lines(self, line, anomaly_type, severity):
+        assert classify_line(line) == {'type': anomaly_type, 'severity': severity}
+
+    def test_first_matching_rule_wins(self):
+        # Matches both the crash and the exception rules; the crash rule comes first
+        assert classify_line('Unhandled exception, process crashed')['type'] == 'Application Crash'
+
+    @pytest.mark.parametrize('line', [
+        'ERROR failed to process batch 17',
+        'error while handling request /api/orders',
+        'worker 3 finished job in 120ms',
+        '',
+    ])
+    def test_unrecognised_lines_are_left_for_the_llm(self, line):
+        assert classify_line(line) is None
+
+    def test_non_string_input(self):
+        assert classify_line(None) is None
+        assert classify_line(float('nan')) is None
+
+
+class TestClassifyAllAnomalies:
+
+    @pytest.fixture(autouse=True)
+    def no_api(self, monkeypatch):
+        from app import helpers
+
+        def unexpected_call(groups):
+            raise AssertionError('classify_templates_with_api called for {}'.format([g['example'] for g in groups]))
+        monkeypatch.setattr(helpers, 'classify_templates_with_api', unexpected_call)
+
+    def test_stored_classification_wins_over_rules(self, app_db):
+        pytest.importorskip('logai.utils.log_normalizer')
+        from app.helpers import classify_all_anomalies, get_normalizer
+        from app.classification_store import save_classifications
+
+        line = 'ERROR: deadlock detected on table stored_orders'
+        save_classifications([(get_normalizer().get_template_hash(line), line, 'Lock Contention', 'Critical')])
+        anomalies = [{'logline': line}]
+        assert classify_all_anomalies(anomalies) == [{'type': 'Lock Contention', 'severity': 'Critical', 'count': 1}]
+        assert anomalies[0]['anomaly_type'] == 'Lock Contention'
+
+    def test_rules_classify_unstored_templates(self, app_db):
+        pytest.importorskip('logai.utils.log_normalizer')
+        from app.helpers import classify_all_anomalies
+
+        anomalies = [{'logline': 'ERROR: deadlock detected on table rule_orders'}]
+        assert classify_all_anomalies(anomalies) == [{'type': 'Database Error', 'severity': 'High', 'count': 1}]
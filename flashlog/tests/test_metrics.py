@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app import metrics
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _delta(before, after):
+    return {name: after[name] - before.get(name, 0.0) for name in after if after[name] != before.get(name, 0.0)}
+
+
+def _record_failed_job():
+    metrics.record_job('failed')
+
+
+class TestRendering:
+
+    def test_histogram_buckets_sum_and_count(self):
+        before = _samples(metrics.render_metrics())
+        metrics.JOB_THROUGHPUT.observe(250)
+        metrics.JOB_THROUGHPUT.observe(100)
+        metrics.JOB_THROUGHPUT.observe(10 ** 7)
+        changed = _delta(before, _samples(metrics.render_metrics()))
+        name = 'flashlog_job_rows_per_second'
+        # Buckets are cumulative; a value on a bound falls into that bucket
+        assert changed[name + '_bucket{le="100"}'] == 1
+        assert changed[name + '_bucket{le="500"}'] == 2
+        assert changed[name + '_bucket{le="500000"}'] == 2
+        assert changed[name + '_bucket{le="+Inf"}'] == 3
+        assert changed[name + '_count'] == 3
+        assert changed[name + '_sum'] == 250 + 100 + 10 ** 7
+
+    def test_labelled_series_render_separately(self):
+        text = metrics.render_metrics()
+        assert '# TYPE flashlog_jobs_total counter' in text
+        assert 'flashlog_http_request_duration_seconds_bucket{blueprint="upload",le="0.005"}' in text
+        assert 'flashlog_cache_requests_total{cache="result",result="hit"}' in text
+
+    def test_extra_gauges(self):
+        text = metrics.render_metrics([('flashlog_test_depth', 'Test gauge', [((('queue', 'a'),), 3), ((), 1.5)])])
+        assert '# TYPE flashlog_test_depth gauge' in text
+        assert 'flashlog_test_depth{queue="a"} 3' in text
+        assert 'flashlog_test_depth 1.5' in text
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason='slots are claimed at fork')
+class TestProcessSlots:
+
+    def _run_in_child(self, target):
+        proc = multiprocessing.get_context('fork').Process(target=target)
+        proc.start()
+        proc.join()
+        assert proc.exitcode == 0
+
+    def test_counts_of_forked_processes_are_summed(self):
+        before = _samples(metrics.render_metrics())
+        metrics.record_job('failed')
+        self._run_in_child(_record_failed_job)
+        self._run_in_child(_record_failed_job)
+        changed = _delta(before, _samples(metrics.render_metrics()))
+        assert changed['flashlog_jobs_total{status="failed"}'] == 3
+
+    def test_slot_of_exited_process_is_reused(self):
+        self._run_in_child(_record_failed_job)
+        used = metrics._next_slot.value
+        for _ in range(3):
+            self._run_in_child(_record_failed_job)
+        assert metrics._next_slot.value == used
+
+
+class TestEndpoint:
+
+    def test_token_required_when_configured(self, flask_app):
+        flask_app.config['METRICS_TOKEN'] = 'secret'
+        client = flask_app.test_client()
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        assert response.status_code == 200
+        assert response.content_type == metrics.CONTENT_TYPE
+        assert 'flashlog_analysis_jobs{status="queued"} 0' in response.get_data(as_text=True)
+
+    def test_open_without_token(self, flask_app):
+        assert flask_app.test_client().get('/metrics').status_code == 200
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from app import result_cache
+from app.auth import get_db_connection
+from app.result_cache import get_cached_result, store_result
+from app.results_store import get_run, load_all_results, save_run_results
+
+RECORDS = [
+    {'logline': 'service started', 'timestamp': '2024-01-01 00:00:00', 'is_anomaly': 0},
+    {'logline': 'disk /dev/sda1 full', 'timestamp': '2024-01-01 00:00:01', 'is_anomaly': 1,
+     'anomaly_type': 'Disk Space', 'severity': 'High'},
+]
+CONFIG = 'c' * 64
+
+
+@pytest.fixture
+def cached_run(app_db, tmp_path):
+    """A stored run of user 1 with its anomaly type summary, cached under sha 'a' * 64"""
+    save_run_results('run-1', 1, RECORDS, file_name='app.log')
+    summary = tmp_path / 'anomaly_types_run-1.json'
+    summary.write_text('{}')
+    outcome = {
+        'run_id': 'run-1',
+        'anomaly_types_path': str(summary),
+        'analysis_summary': {'index_name': 'logs'},
+        'severity_counts': {'High': 1}
+    }
+    store_result('a' * 64, CONFIG, 1, outcome)
+    return outcome
+
+
+def _cache_rows():
+    conn = get_db_connection()
+    rows = conn.execute('SELECT file_sha256, user_id, run_id FROM analysis_result_cache ORDER BY file_sha256, user_id').fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+def _age(file_sha256, days):
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE analysis_result_cache SET last_used_at = datetime('now', ?) WHERE file_sha256 = ?",
+        (f'-{days} days', file_sha256)
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestGetCachedResult:
+
+    def test_same_user_gets_the_stored_run(self, cached_run):
+        assert get_cached_result('a' * 64, CONFIG, 1) == cached_run
+        assert get_cached_result('b' * 64, CONFIG, 1) is None
+        assert get_cached_result('a' * 64, 'd' * 64, 1) is None
+
+    def test_other_user_gets_a_copy(self, cached_run):
+        outcome = get_cached_result('a' * 64, CONFIG, 2, file_name='mine.log')
+        assert outcome['run_id'] != 'run-1'
+        assert outcome['anomaly_types_path'] == cached_run['anomaly_types_path']
+        assert get_run(outcome['run_id'])['user_id'] == 2
+        assert load_all_results(outcome['run_id']) == load_all_results('run-1')
+        # The source run and its cache entry are left as they were
+        assert get_run('run-1')['user_id'] == 1
+        assert len(load_all_results('run-1')) == len(RECORDS)
+        assert _cache_rows() == [('a' * 64, 1, 'run-1'), ('a' * 64, 2, outcome['run_id'])]
+        # The copy answers the second user's next repeat without another copy
+        assert get_cached_result('a' * 64, CONFIG, 2) == outcome
+
+    def test_entry_without_its_summary_is_dropped(self, cached_run, tmp_path):
+        (tmp_path / 'anomaly_types_run-1.json').unlink()
+        assert get_cached_result('a' * 64, CONFIG, 2) is None
+        assert _cache_rows() == []
+        assert get_run('run-1') is not None
+
+
+class TestEviction:
+
+    def test_shared_summary_survives_eviction(self, cached_run):
+        _age('a' * 64, result_cache.MAX_RESULT_AGE_DAYS + 1)
+        store_result('b' * 64, CONFIG, 1, dict(cached_run, run_id='run-2'))
+        assert [row[0] for row in _cache_rows()] == ['b' * 64]
+        # 'b' still points at the evicted entry's summary, so the file stays
+        assert os.path.exists(cached_run['anomaly_types_path'])
+
+    def test_unreferenced_summary_is_removed(self, cached_run, tmp_path, monkeypatch):
+        monkeypatch.setattr(result_cache, 'MAX_CACHED_RESULTS', 1)
+        _age('a' * 64, 1)
+        other = tmp_path / 'anomaly_types_run-2.json'
+        other.write_text('{}')
+        store_result('b' * 64, CONFIG, 1, dict(cached_run, run_id='run-2', anomaly_types_path=str(other)))
+        assert [row[0] for row in _cache_rows()] == ['b' * 64]
+        assert not (tmp_path / 'anomaly_types_run-1.json').exists()
+        assert other.exists()
+        # Evicting an entry keeps its run in the user's history
+        assert get_run('run-1') is not None
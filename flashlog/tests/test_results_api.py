@@ -0,0 +1,59 @@
+from app.results_store import save_run_results, query_results
+
+from tests.conftest import login
+
+RECORDS = [
+    {'logline': 'service started', 'timestamp': '2024-01-01 00:00:00', 'is_anomaly': 0},
+    {'logline': 'disk /dev/sda1 full', 'timestamp': '2024-01-01 00:00:01', 'is_anomaly': 1,
+     'anomaly_type': 'Disk Space', 'severity': 'High'},
+    {'logline': 'login failed for admin', 'timestamp': '2024-01-01 00:00:02', 'is_anomaly': 1,
+     'anomaly_type': 'Authentication Failure', 'severity': 'Critical'},
+    {'logline': 'disk /dev/sdb1 full', 'timestamp': '2024-01-01 00:00:03', 'is_anomaly': 1,
+     'anomaly_type': 'Disk Space', 'severity': 'High'},
+]
+
+
+class TestQueryResults:
+
+    def test_severity_and_type_filters(self, app_db):
+        save_run_results('run-1', 1, RECORDS)
+        rows, cursor = query_results('run-1', severity='High')
+        assert [row['row_num'] for row in rows] == [1, 3]
+        assert cursor is None
+        rows, _ = query_results('run-1', anomaly_type='Authentication Failure')
+        assert [row['logline'] for row in rows] == ['login failed for admin']
+        rows, _ = query_results('run-1', anomaly_only=False)
+        assert [row['row_num'] for row in rows] == [0]
+
+    def test_keyset_pages(self, app_db):
+        save_run_results('run-1', 1, RECORDS)
+        rows, cursor = query_results('run-1', anomaly_only=True, limit=2)
+        assert [row['row_num'] for row in rows] == [1, 2]
+        rows, cursor = query_results('run-1', anomaly_only=True, after=cursor, limit=2)
+        assert [row['row_num'] for row in rows] == [3]
+        assert cursor is None
+
+
+class TestRunResultsApi:
+
+    def test_owner_can_read_run(self, flask_app):
+        save_run_results('run-1', 1, RECORDS)
+        client = flask_app.test_client()
+        login(client, 1)
+        response = client.get('/api/runs/run-1/results?severity=Critical')
+        assert response.status_code == 200
+        assert [row['row_num'] for row in response.get_json()['results']] == [2]
+
+    def test_other_user_gets_404(self, flask_app):
+        save_run_results('run-1', 1, RECORDS)
+        client = flask_app.test_client()
+        login(client, 2)
+        assert client.get('/api/runs/run-1/results').status_code == 404
+
+    def test_run_without_owner_is_admin_only(self, flask_app):
+        save_run_results('run-1', None, RECORDS)
+        client = flask_app.test_client()
+        login(client, 2)
+        assert client.get('/api/runs/run-1/results').status_code == 404
+        login(client, 3, role='admin')
+        assert client.get('/api/runs/run-1/results').status_code == 200
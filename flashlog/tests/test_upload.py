@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from app import create_app
+
+from tests.conftest import login
+
+MAX_UPLOAD_BYTES = 1024 * 1024
+
+
+@pytest.fixture
+def small_upload_app(app_db):
+    return create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'ANALYSIS_WORKERS': 0,
+        'SUMMARIZER_WARMUP': False,
+        'MAX_UPLOAD_BYTES': MAX_UPLOAD_BYTES
+    })
+
+
+def _form(size):
+    return {
+        'parser': 'drain',
+        'model': 'isolation_forest',
+        'logfile': (io.BytesIO(b'x' * size), 'big.log')
+    }
+
+
+def _flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.get('_flashes', [])]
+
+
+class TestUploadSizeLimit:
+
+    def test_max_content_length_follows_upload_limit(self, small_upload_app):
+        assert small_upload_app.config['MAX_CONTENT_LENGTH'] > MAX_UPLOAD_BYTES
+
+    @pytest.mark.parametrize('url', ['/analyze', '/upload'])
+    def test_oversized_upload_rejected_before_the_form_is_read(self, small_upload_app, monkeypatch, url):
+        # Leave MAX_CONTENT_LENGTH out of the way to reach the routes' own Content-Length check
+        small_upload_app.config['MAX_CONTENT_LENGTH'] = None
+        from app import dashboard, upload
+
+        def unexpected_save(*args, **kwargs):
+            raise AssertionError('the upload was read before its size was checked')
+        monkeypatch.setattr(dashboard, 'save_upload_in_chunks', unexpected_save)
+        monkeypatch.setattr(upload, 'save_upload_in_chunks', unexpected_save)
+        client = small_upload_app.test_client()
+        login(client, 1)
+        response = client.post(url, data=_form(2 * MAX_UPLOAD_BYTES), content_type='multipart/form-data')
+        assert response.status_code == 302
+        assert _flashes(client) == ['File too large (max 1MB)']
+
+    def test_body_over_max_content_length_gets_413_handler(self, small_upload_app):
+        client = small_upload_app.test_client()
+        login(client, 1)
+        response = client.post('/analyze', data=_form(2 * MAX_UPLOAD_BYTES), content_type='multipart/form-data',
+                               headers={'Referer': '/dashboard'})
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/dashboard')
+        assert _flashes(client) == ['File too large (max 1MB)']
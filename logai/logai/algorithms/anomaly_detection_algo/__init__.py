@@ -1,10 +1,28 @@
 
-from .distribution_divergence import DistributionDivergence
-from .isolation_forest import IsolationForestDetector
-from .local_outlier_factor import LOFDetector
-from .one_class_svm import OneClassSVMDetector
+from logai.algorithms.factory import factory
 from logai.utils.misc import is_torch_available, \
-    is_transformers_available
+    is_transformers_available, lazy_getattr
+
+# Submodules are imported on first use; the factory only records their names.
+_ATTRIBUTES = {
+    "DistributionDivergence": ".distribution_divergence",
+    "IsolationForestDetector": ".isolation_forest",
+    "LOFDetector": ".local_outlier_factor",
+    "OneClassSVMDetector": ".one_class_svm",
+    "LogBERT": ".logbert",
+    "ForecastBasedLSTM": ".forecast_nn",
+    "ForecastBasedCNN": ".forecast_nn",
+    "ForecastBasedTransformer": ".forecast_nn",
+}
+
+factory.register_lazy("detection", "distribution_divergence", __name__ + ".distribution_divergence")
+factory.register_lazy("detection", "isolation_forest", __name__ + ".isolation_forest")
+factory.register_lazy("detection", "lof", __name__ + ".local_outlier_factor")
+factory.register_lazy("detection", "one_class_svm", __name__ + ".one_class_svm")
+factory.register_lazy("detection", "logbert", __name__ + ".logbert")
+factory.register_lazy("detection", ["lstm", "cnn", "transformer"], __name__ + ".forecast_nn")
+
+__getattr__ = lazy_getattr(__name__, _ATTRIBUTES)
 
 _MODULES = [
     "DistributionDivergence",
@@ -14,9 +32,6 @@ _MODULES = [
 ]
 
 if is_torch_available() and is_transformers_available():
-    from .forecast_nn import ForecastBasedLSTM, ForecastBasedCNN, ForecastBasedTransformer
-    from .logbert import LogBERT
-
     _MODULES += [
         "LogBERT",
         "ForecastBasedLSTM",
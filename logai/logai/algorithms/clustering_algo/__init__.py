@@ -1,7 +1,19 @@
 
-from .birch import BirchAlgo
-from .dbscan import DbScanAlgo
-from .kmeans import KMeansAlgo
+from logai.algorithms.factory import factory
+from logai.utils.misc import lazy_getattr
+
+# Submodules are imported on first use; the factory only records their names.
+_ATTRIBUTES = {
+    "BirchAlgo": ".birch",
+    "DbScanAlgo": ".dbscan",
+    "KMeansAlgo": ".kmeans",
+}
+
+factory.register_lazy("clustering", "birch", __name__ + ".birch")
+factory.register_lazy("clustering", "dbscan", __name__ + ".dbscan")
+factory.register_lazy("clustering", "kmeans", __name__ + ".kmeans")
+
+__getattr__ = lazy_getattr(__name__, _ATTRIBUTES)
 
 __all__ = [
     "BirchAlgo",
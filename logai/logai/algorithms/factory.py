@@ -1,4 +1,6 @@
 
+import importlib
+
 from logai.utils.misc import is_torch_available, \
     is_transformers_available
 
@@ -10,6 +12,13 @@ class AlgorithmFactory:
         "clustering": {},
         "vectorization": {},
     }
+    # Algorithms known by name whose modules are imported on first use
+    _lazy_algorithms = {
+        "detection": {},
+        "parsing": {},
+        "clustering": {},
+        "vectorization": {},
+    }
     _algorithms_with_torch = {
         "lstm", "cnn", "transformer",
         "logbert", "forecast_nn"
@@ -37,18 +46,39 @@ class AlgorithmFactory:
 
         return wrap
 
+    @classmethod
+    def register_lazy(cls, task, name, module):
+        """
+        Record that importing `module` registers algorithm `name` for `task`. The
+        module (and its dependencies) is only imported when the algorithm is first
+        looked up.
+        """
+        assert (
+            task in cls._lazy_algorithms
+        ), f"Unknown task {task}, please choose from {cls._lazy_algorithms.keys()}."
+        names = [name] if isinstance(name, str) else name
+        for algo_name in names:
+            cls._lazy_algorithms[task][algo_name] = module
+
     @classmethod
     def unregister(cls, task, name):
         
+        cls._lazy_algorithms[task].pop(name, None)
         return cls._algorithms[task].pop(name, None)
 
+    def available_algorithms(self, task):
+        """Names of all algorithms registered for `task`, imported or not."""
+        return sorted(set(self._algorithms[task]) | set(self._lazy_algorithms[task]))
+
     def _check_algorithm(self, task, name):
         if name in self._algorithms_with_torch:
             if not is_torch_available() or not is_transformers_available():
                 raise ImportError("Some deep learning packages are missing. "
                                   "Please install them via `pip install logai[deep-learning]`.")
+        if name not in self._algorithms[task] and name in self._lazy_algorithms[task]:
+            importlib.import_module(self._lazy_algorithms[task][name])
         assert name in self._algorithms[task], \
-            f"Unknown algorithm {name}, please choose from {self._algorithms[task].keys()}."
+            f"Unknown algorithm {name}, please choose from {self.available_algorithms(task)}."
 
     def get_config_class(self, task, name):
         
@@ -1,7 +1,19 @@
 
-from .ael import AEL
-from .drain import Drain
-from .iplom import IPLoM
+from logai.algorithms.factory import factory
+from logai.utils.misc import lazy_getattr
+
+# Submodules are imported on first use; the factory only records their names.
+_ATTRIBUTES = {
+    "AEL": ".ael",
+    "Drain": ".drain",
+    "IPLoM": ".iplom",
+}
+
+factory.register_lazy("parsing", "ael", __name__ + ".ael")
+factory.register_lazy("parsing", "drain", __name__ + ".drain")
+factory.register_lazy("parsing", "iplom", __name__ + ".iplom")
+
+__getattr__ = lazy_getattr(__name__, _ATTRIBUTES)
 
 __all__ = [
     "AEL",
@@ -9,6 +9,7 @@ from dataclasses import dataclass
 from logai.algorithms.algo_interfaces import ParsingAlgo
 from logai.config_interfaces import Config
 from logai.algorithms.factory import factory
+from logai.utils.profiler import NullProfiler, profile_section
 
 class Event:
     
@@ -33,7 +34,7 @@ class AELParams(Config):
 
 @factory.register("parsing", "ael", AELParams)
 class AEL(ParsingAlgo):
-    def __init__(self, params: AELParams):
+    def __init__(self, params: AELParams, profiler=NullProfiler()):
         self.rex = params.rex
         self.minEventCount = params.minEventCount
         self.merge_percent = params.merge_percent
@@ -42,6 +43,7 @@ class AEL(ParsingAlgo):
         self.merged_events = []
         self.bins = defaultdict(dict)
         self.keep_para = params.keep_para
+        self.profiler = profiler
 
     def fit(self, loglines: pd.DataFrame):
         
@@ -63,14 +65,19 @@ class AEL(ParsingAlgo):
         )
         normalizer = LogNormalizer(normalizer_config)
         
-        normalized_loglines = normalizer.normalize_batch(loglines.tolist())
-        loglines = pd.Series(normalized_loglines, index=loglines.index)
+        with profile_section(self.profiler, "normalize"):
+            normalized_loglines = normalizer.normalize_batch(loglines.tolist())
+            loglines = pd.Series(normalized_loglines, index=loglines.index, name=loglines.name)
         
         self.logname = "logname"
-        self.load_data(loglines)
-        self.tokenize()
-        self.categorize()
-        self.reconcile()
+        with profile_section(self.profiler, "load_data"):
+            self.load_data(loglines)
+        with profile_section(self.profiler, "tokenize"):
+            self.tokenize()
+        with profile_section(self.profiler, "categorize"):
+            self.categorize()
+        with profile_section(self.profiler, "reconcile"):
+            self.reconcile()
 
         templateL = [0] * self.df_log.shape[0]
 
@@ -78,6 +85,8 @@ class AEL(ParsingAlgo):
             for logidx in event.logs:
                 templateL[logidx] = event.Eventstr
 
+        if self.profiler:
+            self.profiler.report()
         return pd.Series(templateL, index=loglines.index)
 
     def tokenize(self):
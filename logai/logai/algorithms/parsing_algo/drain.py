@@ -1,15 +1,19 @@
 
+import copy
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
 
 import pandas as pd
 from dataclasses import dataclass
 from cachetools import LRUCache, Cache
 
-from abc import ABC, abstractmethod
-
 from logai.algorithms.algo_interfaces import ParsingAlgo
 from logai.config_interfaces import Config
 from logai.algorithms.factory import factory
+from logai.utils.profiler import Profiler, NullProfiler, profile_section  # Profiler classes used to live here
 
 @dataclass
 class DrainParams(Config):
@@ -20,6 +24,9 @@ class DrainParams(Config):
     max_clusters: int = None
     extra_delimiters: tuple = ()
     param_str: str = "*"
+    single_pass: bool = False  # parse() takes each line's cluster from insertion instead of re-matching it
+    line_cache_size: int = 10000  # Repeated lines remembered with their cluster; 0 disables the cache
+    n_jobs: int = None  # Worker processes for parse(); -1 uses all CPUs
 
     @classmethod
     def from_dict(cls, config_dict):
@@ -28,30 +35,6 @@ class DrainParams(Config):
             config.extra_delimiters = tuple(config.extra_delimiters)
         return config
 
-class Profiler(ABC):
-    @abstractmethod
-    def start_section(self, section_name: str):
-        pass
-
-    @abstractmethod
-    def end_section(self, section_name=""):
-        pass
-
-    @abstractmethod
-    def report(self, period_sec=30):
-        pass
-
-class NullProfiler(Profiler):
-    
-    def start_section(self, section_name: str):
-        pass
-
-    def end_section(self, section_name=""):
-        pass
-
-    def report(self, period_sec=30):
-        pass
-
 class LogCluster:
 
     __slots__ = ["log_template_tokens", "cluster_id", "size"]
@@ -100,6 +83,9 @@ class Drain(ParsingAlgo):
         self.extra_delimiters = params.extra_delimiters
         self.max_clusters = params.max_clusters
         self.param_str = params.param_str
+        self.single_pass = params.single_pass
+        self.params = params
+        self.n_jobs = (os.cpu_count() or 1) if params.n_jobs == -1 else (params.n_jobs or 1)
 
         self.id_to_cluster = (
             {}
@@ -108,6 +94,11 @@ class Drain(ParsingAlgo):
         )
         self.clusters_counter = 0
 
+        self.line_cache_size = params.line_cache_size
+        self.line_cache = OrderedDict() if params.line_cache_size else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     @property
     def clusters(self):
         return self.id_to_cluster.values()
@@ -304,7 +295,46 @@ class Drain(ParsingAlgo):
         content_tokens = content.split()
         return content_tokens
 
+    def _cached_cluster(self, content: str):
+        cluster = self.line_cache.get(content)
+        if cluster is None:
+            self.cache_misses += 1
+            return None
+        self.line_cache.move_to_end(content)
+        self.cache_hits += 1
+        return cluster
+
+    def _cache_line(self, content: str, cluster: LogCluster, update_type: str):
+        if update_type != "none":
+            # A new cluster or a changed template can change which cluster the tree
+            # search picks for earlier lines (similarity ties go to the template
+            # with more parameters), so nothing cached before stays trustworthy
+            self.line_cache.clear()
+            return
+        self.line_cache[content] = cluster
+        self.line_cache.move_to_end(content)
+        if len(self.line_cache) > self.line_cache_size:
+            self.line_cache.popitem(last=False)
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Hit and miss counts of the repeated-line cache and its current size.
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self.line_cache) if self.line_cache is not None else 0,
+        }
+
     def _add_log_message(self, content: str):
+        if self.line_cache is not None:
+            match_cluster = self._cached_cluster(content)
+            if match_cluster is not None:
+                # Same line, same tree and same templates: the tree search would return this cluster unchanged
+                match_cluster.size += 1
+                self.id_to_cluster[match_cluster.cluster_id]  # Touch the cluster to keep it in the max_clusters LRU cache
+                return match_cluster, "none"
+
         content_tokens = self._get_content_as_tokens(content)
 
         if self.profiler:
@@ -338,13 +368,83 @@ class Drain(ParsingAlgo):
                 update_type = "cluster_template_changed"
             match_cluster.size += 1
 
-            self.id_to_cluster[match_cluster.cluster_id]
+            self.id_to_cluster[match_cluster.cluster_id]  # Touch the cluster to keep it in the max_clusters LRU cache
 
         if self.profiler:
             self.profiler.end_section()
 
+        if self.line_cache is not None:
+            self._cache_line(content, match_cluster, update_type)
+
         return match_cluster, update_type
 
+    def _state_params(self) -> dict:
+        # As they read back from JSON (tuples become lists)
+        return json.loads(json.dumps({key: getattr(self.params, key) for key in STATE_PARAMS}))
+
+    def save_state(self, path: str):
+        """
+        Write the prefix tree and cluster table to `path` as JSON, so a later run
+        can continue learning with the same cluster ids (see :meth:`load_state`).
+        The file is replaced atomically.
+
+        :param path: The file to write.
+        """
+        def node_state(node):
+            return [node.cluster_ids, {key: node_state(child) for key, child in node.key_to_child_node.items()}]
+
+        state = {
+            "version": STATE_VERSION,
+            "params": self._state_params(),
+            "clusters_counter": self.clusters_counter,
+            "clusters": [
+                [cluster.cluster_id, cluster.size, list(cluster.log_template_tokens)]
+                for cluster in self.id_to_cluster.values()
+            ],
+            "tree": node_state(self.root_node),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load_state(self, path: str):
+        """
+        Replace the parser's clusters and prefix tree with a state written by
+        :meth:`save_state`. Further lines extend the loaded clusters, so template
+        ids stay stable across runs.
+
+        :param path: The file to read.
+        """
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            raise ValueError("Unsupported Drain state version {}".format(state.get("version")))
+        for key, value in self._state_params().items():
+            if state["params"].get(key) != value:
+                raise ValueError(
+                    "Drain state was saved with {}={!r}, parser has {!r}".format(key, state["params"].get(key), value)
+                )
+
+        def build_node(node_state):
+            node = Node()
+            node.cluster_ids = list(node_state[0])
+            node.key_to_child_node = {key: build_node(child) for key, child in node_state[1].items()}
+            return node
+
+        self.root_node = build_node(state["tree"])
+        self.id_to_cluster = {} if self.max_clusters is None else LogClusterCache(maxsize=self.max_clusters)
+        for cluster_id, size, tokens in state["clusters"]:
+            cluster = LogCluster(tokens, cluster_id)
+            cluster.size = size
+            self.id_to_cluster[cluster_id] = cluster
+        self.clusters_counter = state["clusters_counter"]
+        if self.line_cache is not None:
+            self.line_cache.clear()
+
     def match(self, content: str):
         
         content_tokens = self._get_content_as_tokens(content)
@@ -355,10 +455,13 @@ class Drain(ParsingAlgo):
         return self.clusters_counter
 
     def fit(self, logline: pd.Series):
-        for l in logline:
-            if not isinstance(l, str):
-                continue
-            self._add_log_message(l)
+        with profile_section(self.profiler, "fit"):
+            for l in logline:
+                if not isinstance(l, str):
+                    continue
+                self._add_log_message(l)
+                if self.profiler:
+                    self.profiler.report()
 
     def parse(self, logline: pd.Series) -> pd.Series:
 
@@ -376,11 +479,173 @@ class Drain(ParsingAlgo):
         )
         normalizer = LogNormalizer(normalizer_config)
         
-        normalized_loglines = normalizer.normalize_batch(logline.tolist())
-        logline = pd.Series(normalized_loglines, index=logline.index)
+        with profile_section(self.profiler, "normalize"):
+            normalized_loglines = normalizer.normalize_batch(logline.tolist())
+            logline = pd.Series(normalized_loglines, index=logline.index)
         
+        if self._use_parallel(logline):
+            # Shard workers run without a profiler; the pool is timed as one section
+            with profile_section(self.profiler, "parallel_parse"):
+                parsed_logline = self._parse_parallel(logline)
+        else:
+            parsed_logline = self._parse_lines(logline)
+        if self.profiler:
+            self.profiler.report()
+        return pd.Series(parsed_logline, index=logline.index)
+
+    def _parse_lines(self, logline) -> list:
+        if self.single_pass:
+            cluster_ids = self._insert_lines(logline)
+            with profile_section(self.profiler, "resolve_templates"):
+                return self._resolve_templates(logline, cluster_ids)
+
         self.fit(logline)
         parsed_logline = []
-        for line in logline:
-            parsed_logline.append(" ".join(self.match(line).log_template_tokens))
-        return pd.Series(parsed_logline, index=logline.index)
+        with profile_section(self.profiler, "match"):
+            for line in logline:
+                parsed_logline.append(" ".join(self.match(line).log_template_tokens))
+        return parsed_logline
+
+    def _insert_lines(self, logline) -> list:
+        # Like fit(), but keeps the cluster id of every line (None for skipped lines)
+        cluster_ids = []
+        with profile_section(self.profiler, "fit"):
+            for line in logline:
+                if not isinstance(line, str):
+                    cluster_ids.append(None)
+                    continue
+                cluster, _ = self._add_log_message(line)
+                cluster_ids.append(cluster.cluster_id)
+                if self.profiler:
+                    self.profiler.report()
+        return cluster_ids
+
+    def _resolve_templates(self, logline, cluster_ids: list) -> list:
+        """
+        Single-pass parse: the cluster id of each line was kept when it was
+        inserted, so the final template is joined once per cluster.
+        Lines that were skipped or whose cluster was evicted (max_clusters) are
+        matched against the final tree as in the two-pass parse, and keep their
+        own tokens if nothing matches any more.
+        """
+        templates = {}
+        for cluster_id in set(cluster_ids):
+            cluster = self.id_to_cluster.get(cluster_id) if cluster_id is not None else None
+            if cluster is not None:
+                templates[cluster_id] = cluster.get_template()
+
+        parsed_logline = []
+        for line, cluster_id in zip(logline, cluster_ids):
+            template = templates.get(cluster_id)
+            if template is None:
+                tokens = self._get_content_as_tokens(str(line))
+                cluster = self._tree_search(self.root_node, tokens, 1.0, True)
+                template = cluster.get_template() if cluster is not None else " ".join(tokens)
+            parsed_logline.append(template)
+        return parsed_logline
+
+    def _use_parallel(self, logline) -> bool:
+        # Shards are parsed from an empty tree, and max_clusters evicts across all lengths
+        return (
+            self.n_jobs > 1
+            and self.max_clusters is None
+            and self.clusters_counter == 0
+            and len(logline) >= PARALLEL_MIN_LINES
+        )
+
+    def _parse_parallel(self, logline) -> list:
+        """
+        Parse in a process pool. Clusters never span token counts (the first tree
+        layer is keyed by it), so lines are bucketed by token count and the buckets
+        are spread over n_jobs shards, each parsed in its original line order.
+        Cluster ids are then renumbered in the order the serial parser would have
+        created them, so templates, ids, sizes and the tree match a serial parse.
+        """
+        lines = list(logline)
+        buckets = {}
+        for position, line in enumerate(lines):
+            token_count = len(self._get_content_as_tokens(str(line)))
+            buckets.setdefault(token_count, []).append(position)
+        if len(buckets) < 2:
+            return self._parse_lines(lines)
+
+        # Largest buckets first, each onto the least loaded shard
+        shards = [[] for _ in range(min(self.n_jobs, len(buckets)))]
+        for positions in sorted(buckets.values(), key=len, reverse=True):
+            min(shards, key=len).extend(positions)
+        for positions in shards:
+            positions.sort()
+
+        shard_params = copy.copy(self.params)
+        shard_params.n_jobs = None
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(_parse_shard, shard_params, [lines[position] for position in positions])
+                for positions in shards
+            ]
+            results = [future.result() for future in futures]
+
+        parsed_logline = [None] * len(lines)
+        created = []
+        for shard_index, (positions, result) in enumerate(zip(shards, results)):
+            templates, first_lines, _, _, _ = result
+            for position, template in zip(positions, templates):
+                parsed_logline[position] = template
+            for local_id, line_index in first_lines.items():
+                created.append((positions[line_index], shard_index, local_id))
+        created.sort()
+
+        id_maps = [{} for _ in shards]
+        for _, shard_index, local_id in created:
+            _, _, shard_clusters, shard_layer, _ = results[shard_index]
+            cluster = shard_clusters[local_id]
+            self.clusters_counter += 1
+            cluster.cluster_id = self.clusters_counter
+            id_maps[shard_index][local_id] = cluster.cluster_id
+            self.id_to_cluster[cluster.cluster_id] = cluster
+            token_count_str = str(len(cluster.log_template_tokens))
+            if token_count_str not in self.root_node.key_to_child_node:
+                self.root_node.key_to_child_node[token_count_str] = shard_layer[token_count_str]
+
+        for shard_index, (_, _, _, shard_layer, (hits, misses)) in enumerate(results):
+            for node in shard_layer.values():
+                _renumber_node(node, id_maps[shard_index])
+            self.cache_hits += hits
+            self.cache_misses += misses
+        return parsed_logline
+
+
+STATE_VERSION = 1
+# Parameters that shape the tree and the tokens; a state only loads into a parser with the same values
+STATE_PARAMS = ("depth", "max_children", "param_str", "extra_delimiters")
+
+PARALLEL_MIN_LINES = 10000  # Smaller inputs are parsed serially; the pool would cost more than it saves
+
+
+def _parse_shard(params: DrainParams, lines: list):
+    # Runs in a worker process: parse the lines of some token counts with a fresh Drain
+    parser = Drain(params)
+    cluster_ids = parser._insert_lines(lines)
+    if params.single_pass:
+        templates = parser._resolve_templates(lines, cluster_ids)
+    else:
+        templates = [" ".join(parser.match(line).log_template_tokens) for line in lines]
+    first_lines = {}
+    for line_index, cluster_id in enumerate(cluster_ids):
+        if cluster_id is not None and cluster_id not in first_lines:
+            first_lines[cluster_id] = line_index
+    return (
+        templates,
+        first_lines,
+        dict(parser.id_to_cluster),
+        parser.root_node.key_to_child_node,
+        (parser.cache_hits, parser.cache_misses),
+    )
+
+
+def _renumber_node(node: Node, id_map: dict):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        node.cluster_ids = [id_map[cluster_id] for cluster_id in node.cluster_ids]
+        stack.extend(node.key_to_child_node.values())
@@ -13,6 +13,7 @@ import hashlib
 
 from logai.algorithms.factory import factory
 from logai.utils.log_normalizer import LogNormalizer, NormalizationConfig
+from logai.utils.profiler import NullProfiler, profile_section
 
 class Partition:
     
@@ -46,8 +47,9 @@ class IPLoMParams(Config):
 @factory.register("parsing", "iplom", IPLoMParams)
 class IPLoM(ParsingAlgo):
     
-    def __init__(self, params: IPLoMParams):
+    def __init__(self, params: IPLoMParams, profiler=NullProfiler()):
         self.para = params
+        self.profiler = profiler
         self.partitionsL = []
         self.eventsL = []
         self.output = []
@@ -74,22 +76,30 @@ class IPLoM(ParsingAlgo):
         )
         normalizer = LogNormalizer(normalizer_config)
         
-        normalized_loglines = normalizer.normalize_batch(loglines.tolist())
-        loglines = pd.Series(normalized_loglines, index=loglines.index)
+        with profile_section(self.profiler, "normalize"):
+            normalized_loglines = normalizer.normalize_batch(loglines.tolist())
+            loglines = pd.Series(normalized_loglines, index=loglines.index, name=loglines.name)
         
-        self._Step1(loglines)
-        self._Step2()
-        self._Step3()
-        self._Step4()
-        self._getOutput()
-        eventID_template = {
-            event.eventId: " ".join(event.eventStr) for event in self.eventsL
-        }
-
-        self.output.sort(key=lambda x: int(x[0]))
-        res = pd.Series(
-            [eventID_template[logL[1]] for logL in self.output], index=loglines.index
-        )
+        with profile_section(self.profiler, "step1_partition_by_length"):
+            self._Step1(loglines)
+        with profile_section(self.profiler, "step2_partition_by_position"):
+            self._Step2()
+        with profile_section(self.profiler, "step3_partition_by_mapping"):
+            self._Step3()
+        with profile_section(self.profiler, "step4_create_events"):
+            self._Step4()
+        with profile_section(self.profiler, "output"):
+            self._getOutput()
+            eventID_template = {
+                event.eventId: " ".join(event.eventStr) for event in self.eventsL
+            }
+
+            self.output.sort(key=lambda x: int(x[0]))
+            res = pd.Series(
+                [eventID_template[logL[1]] for logL in self.output], index=loglines.index
+            )
+        if self.profiler:
+            self.profiler.report()
         return res
 
     def _Step1(self, loglines: pd.Series):
@@ -1,11 +1,29 @@
 
-from .fasttext import FastText
-from .semantic import Semantic
-from .sequential import Sequential
-from .tfidf import TfIdf
-from .word2vec import Word2Vec
+from logai.algorithms.factory import factory
 from logai.utils.misc import is_torch_available, \
-    is_transformers_available
+    is_transformers_available, lazy_getattr
+
+# Submodules (gensim, torch, tokenizers, ...) are imported on first use; the
+# factory only records their names.
+_ATTRIBUTES = {
+    "FastText": ".fasttext",
+    "Semantic": ".semantic",
+    "Sequential": ".sequential",
+    "TfIdf": ".tfidf",
+    "Word2Vec": ".word2vec",
+    "ForecastNN": ".forecast_nn",
+    "LogBERT": ".logbert",
+}
+
+factory.register_lazy("vectorization", "fasttext", __name__ + ".fasttext")
+factory.register_lazy("vectorization", "semantic", __name__ + ".semantic")
+factory.register_lazy("vectorization", "sequential", __name__ + ".sequential")
+factory.register_lazy("vectorization", "tfidf", __name__ + ".tfidf")
+factory.register_lazy("vectorization", "word2vec", __name__ + ".word2vec")
+factory.register_lazy("vectorization", "forecast_nn", __name__ + ".forecast_nn")
+factory.register_lazy("vectorization", "logbert", __name__ + ".logbert")
+
+__getattr__ = lazy_getattr(__name__, _ATTRIBUTES)
 
 _MODULES = [
     "FastText",
@@ -16,9 +34,6 @@ _MODULES = [
 ]
 
 if is_torch_available() and is_transformers_available():
-    from .forecast_nn import ForecastNN
-    from .logbert import LogBERT
-
     _MODULES += [
         "ForecastNN",
         "LogBERT"
@@ -5,7 +5,7 @@ from logai.analysis.anomaly_detector import AnomalyDetectionConfig
 from logai.analysis.nn_anomaly_detector import NNAnomalyDetectionConfig
 from logai.analysis.clustering import ClusteringConfig
 from logai.config_interfaces import Config
-from logai.dataloader.data_loader import DataLoaderConfig
+from logai.dataloader.data_loader import DataLoaderConfig, InMemoryDataLoaderConfig
 from logai.dataloader.openset_data_loader import OpenSetDataLoaderConfig
 from logai.information_extraction.categorical_encoder import CategoricalEncoderConfig
 from logai.information_extraction.feature_extractor import FeatureExtractorConfig
@@ -19,6 +19,7 @@ from logai.preprocess.preprocessor import PreprocessorConfig
 class WorkFlowConfig(Config):
     
     data_loader_config: object = None
+    in_memory_data_loader_config: object = None
     open_set_data_loader_config: object = None
     preprocessor_config: object = None
 
@@ -42,6 +43,11 @@ class WorkFlowConfig(Config):
                 config.data_loader_config
             )
 
+        if isinstance(config.in_memory_data_loader_config, dict):
+            config.in_memory_data_loader_config = InMemoryDataLoaderConfig.from_dict(
+                config.in_memory_data_loader_config
+            )
+
         if config.open_set_data_loader_config:
             config.open_set_data_loader_config = OpenSetDataLoaderConfig.from_dict(
                 config.open_set_data_loader_config
@@ -5,7 +5,7 @@ from sklearn.model_selection import train_test_split
 
 from logai.analysis.anomaly_detector import AnomalyDetector, AnomalyDetectionConfig
 from logai.applications.application_interfaces import WorkFlowConfig
-from logai.dataloader.data_loader import FileDataLoader
+from logai.dataloader.data_loader import FileDataLoader, InMemoryDataLoader
 from logai.dataloader.data_model import LogRecordObject
 from logai.dataloader.openset_data_loader import OpenSetDataLoader
 from logai.information_extraction.categorical_encoder import (
@@ -19,11 +19,13 @@ from logai.preprocess.partitioner import PartitionerConfig, Partitioner
 from logai.preprocess.preprocessor import Preprocessor
 from logai.utils import constants, evaluate
 from logai.utils.log_normalizer import LogNormalizer, NormalizationConfig, normalize_logs
+from logai.utils.tracing import PipelineTracer
 
 class LogAnomalyDetection:
     
-    def __init__(self, config: WorkFlowConfig):
+    def __init__(self, config: WorkFlowConfig, tracer: PipelineTracer = None):
         self.config = config
+        self.tracer = tracer if tracer is not None else PipelineTracer()
         self._timestamps = pd.DataFrame()
         self._attributes = pd.DataFrame()
         self._feature_df = pd.DataFrame()
@@ -143,21 +145,34 @@ class LogAnomalyDetection:
         np.random.seed(42)
         random.seed(42)
         
-        logrecord = self._load_data()
+        with self.tracer.stage("load_data") as record:
+            logrecord = self._load_data()
+            record.rows_out = len(logrecord.body)
 
-        preprocessed_logrecord = self._preprocess(logrecord)
+        with self.tracer.stage("preprocess", rows_in=len(logrecord.body)) as record:
+            preprocessed_logrecord = self._preprocess(logrecord)
+            record.rows_out = len(preprocessed_logrecord.body)
 
         loglines = preprocessed_logrecord.body[constants.LOGLINE_NAME]
         # Skip parsing - work directly with raw log lines
         print("🔧 Skipping log parsing - working with raw log lines")
 
-        feature_extractor = FeatureExtractor(self.config.feature_extractor_config)
+        with self.tracer.stage("feature_extraction", rows_in=len(loglines)) as record:
+            feature_extractor = FeatureExtractor(self.config.feature_extractor_config)
 
-        self._counter_df = feature_extractor.convert_to_counter_vector(
-            timestamps=logrecord.timestamp[constants.LOG_TIMESTAMPS],
-            attributes=self.attributes,
-        )
+            self._counter_df = feature_extractor.convert_to_counter_vector(
+                timestamps=logrecord.timestamp[constants.LOG_TIMESTAMPS],
+                attributes=self.attributes,
+            )
+            record.rows_out = len(self._counter_df)
+
+        with self.tracer.stage("anomaly_detection", rows_in=len(self.loglines)) as record:
+            self._detect_anomalies()
+            record.rows_out = len(self._ad_results)
+
+        return
 
+    def _detect_anomalies(self):
         if self.config.anomaly_detection_config.algo_name in constants.COUNTER_AD_ALGO:
 
             self._counter_df["attribute"] = self._counter_df.drop(
@@ -264,10 +279,11 @@ class LogAnomalyDetection:
                 self._ad_results = pd.DataFrame({'result': [0.0] * len(self.loglines)})
                 self._index_group = pd.DataFrame({'event_index': [[i] for i in range(len(self.loglines))]})
 
-        return
-
     def _load_data(self):
-        if self.config.open_set_data_loader_config is not None:
+        if self.config.in_memory_data_loader_config is not None:
+            dataloader = InMemoryDataLoader(self.config.in_memory_data_loader_config)
+            logrecord = dataloader.load_data()
+        elif self.config.open_set_data_loader_config is not None:
             dataloader = OpenSetDataLoader(self.config.open_set_data_loader_config)
             logrecord = dataloader.load_data()
         elif self.config.data_loader_config is not None:
@@ -275,7 +291,7 @@ class LogAnomalyDetection:
             logrecord = dataloader.load_data()
         else:
             raise ValueError(
-                "data_loader_config or open_set_data_loader_config is needed to load data."
+                "in_memory_data_loader_config, data_loader_config or open_set_data_loader_config is needed to load data."
             )
         return logrecord
 
@@ -141,6 +141,37 @@ class FileDataLoader:
 
         return log_record
 
+@dataclass
+class InMemoryDataLoaderConfig(DataLoaderConfig):
+    """
+    Config for loading logs that are already in memory.
+
+    :param data: A pd.DataFrame of raw log columns (selected and renamed with
+        ``dimensions`` exactly like a file read by FileDataLoader), or a ready
+        LogRecordObject that is used as is.
+    """
+    data: object = None
+
+class InMemoryDataLoader(FileDataLoader):
+    """
+    Data loader that builds a LogRecordObject from an in-memory frame instead of
+    reading a file, so callers that already hold the data skip a serialization
+    round-trip.
+    """
+
+    def __init__(self, config: InMemoryDataLoaderConfig):
+
+        super().__init__(config)
+
+    def load_data(self) -> LogRecordObject:
+
+        data = self.config.data
+        if isinstance(data, LogRecordObject):
+            return data
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("InMemoryDataLoaderConfig.data must be a pd.DataFrame or LogRecordObject.")
+        return self._create_log_record_object(data)
+
 class DefaultDataLoader:
 
     def __init__(self):
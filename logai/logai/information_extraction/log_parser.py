@@ -11,6 +11,7 @@ from dataclasses import dataclass
 from logai.config_interfaces import Config
 from logai.utils import constants
 from logai.algorithms.factory import factory
+from logai.utils.profiler import SimpleProfiler
 
 @dataclass
 class LogParserConfig(Config):
@@ -18,6 +19,8 @@ class LogParserConfig(Config):
     parsing_algorithm: str = "drain"
     parsing_algo_params: object = None
     custom_config: object = None
+    state_path: str = None
+    profiler: object = None  # A Profiler passed to the parser; "simple" in a config dict creates a SimpleProfiler
 
     @classmethod
     def from_dict(cls, config_dict):
@@ -25,6 +28,8 @@ class LogParserConfig(Config):
         config.parsing_algo_params = factory.get_config(
             "parsing", config.parsing_algorithm.lower(), config.parsing_algo_params
         )
+        if config.profiler == "simple":
+            config.profiler = SimpleProfiler()
         return config
 
 class LogParser:
@@ -33,13 +38,18 @@ class LogParser:
         name = config.parsing_algorithm.lower()
         config_class = factory.get_config_class("parsing", name)
         algorithm_class = factory.get_algorithm_class("parsing", name)
-        self.parser = algorithm_class(
-            config.parsing_algo_params if config.parsing_algo_params else config_class()
-        )
+        params = config.parsing_algo_params if config.parsing_algo_params else config_class()
+        profiler = getattr(config, "profiler", None)
+        self.parser = algorithm_class(params) if profiler is None else algorithm_class(params, profiler=profiler)
+        # Parsers that support it warm-start from, and keep updating, a state file (e.g. one per log source)
+        self.state_path = getattr(config, "state_path", None) if hasattr(self.parser, "save_state") else None
+        if self.state_path and exists(self.state_path):
+            self.parser.load_state(self.state_path)
 
     def fit(self, loglines: pd.Series):
         
         self.parser.fit(loglines)
+        self._save_state()
 
     def parse(self, loglines: pd.Series) -> pd.DataFrame:
         """
@@ -50,6 +60,7 @@ class LogParser:
         if self.parser is None:
             raise RuntimeError("Parser is None.")
         parsed_loglines = self.parser.parse(loglines)
+        self._save_state()
         if loglines.name is not constants.LOGLINE_NAME:
             loglines.name = constants.LOGLINE_NAME
         parsed_loglines.name = constants.PARSED_LOGLINE_NAME
@@ -73,6 +84,10 @@ class LogParser:
 
         return self.parse(loglines)
 
+    def _save_state(self):
+        if self.state_path:
+            self.parser.save_state(self.state_path)
+
     def save(self, out_path):
         
         if not exists(dirname(out_path)):
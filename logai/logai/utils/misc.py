@@ -64,3 +64,17 @@ def is_nltk_available():
         return True
     else:
         return False
+
+def lazy_getattr(package, attributes):
+    """
+    Build a module-level ``__getattr__`` (PEP 562) for `package` that imports
+    ``attributes[name]``, a submodule path relative to the package, only when
+    `name` is first accessed.
+    """
+
+    def __getattr__(name):
+        if name in attributes:
+            return getattr(importlib.import_module(attributes[name], package), name)
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    return __getattr__
@@ -0,0 +1,145 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+
+class Profiler(ABC):
+    """
+    Interface of the sectioned profilers the log parsers report to.
+    """
+
+    @abstractmethod
+    def start_section(self, section_name: str):
+        pass
+
+    @abstractmethod
+    def end_section(self, section_name=""):
+        pass
+
+    @abstractmethod
+    def report(self, period_sec=30):
+        pass
+
+
+class NullProfiler(Profiler):
+    """
+    Profiler that records nothing. It is falsy, so instrumented code guarded by
+    ``if self.profiler:`` skips the profiling calls entirely.
+    """
+
+    def start_section(self, section_name: str):
+        pass
+
+    def end_section(self, section_name=""):
+        pass
+
+    def report(self, period_sec=30):
+        pass
+
+    def __bool__(self):
+        return False
+
+
+@contextmanager
+def profile_section(profiler: Profiler, section_name: str):
+    """
+    Time the enclosed block as section `section_name` of `profiler`. Does
+    nothing for a NullProfiler. Meant for coarse steps, not per-line code.
+    """
+    if not profiler:
+        yield
+        return
+    profiler.start_section(section_name)
+    try:
+        yield
+    finally:
+        profiler.end_section(section_name)
+
+
+class ProfiledSection:
+
+    __slots__ = ["name", "count", "total_time"]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0.0
+
+
+class SimpleProfiler(Profiler):
+    """
+    Low-overhead sectioned profiler keeping a call count and the cumulative
+    wall time of every section. Sections may nest; ``end_section()`` without
+    a name ends the most recently started one.
+
+    .. code-block:: python
+
+        profiler = SimpleProfiler()
+        parser = Drain(DrainParams(), profiler=profiler)
+        parser.parse(loglines)
+        profiler.report(0)
+
+    :param printer: Callable that receives the text of each report.
+    """
+
+    def __init__(self, printer: Callable[[str], None] = print):
+        self.printer = printer
+        self.sections: Dict[str, ProfiledSection] = {}
+        self._open = []
+        self._last_report_time = time.perf_counter()
+
+    def start_section(self, section_name: str):
+        section = self.sections.get(section_name)
+        if section is None:
+            section = self.sections[section_name] = ProfiledSection(section_name)
+        self._open.append((section, time.perf_counter()))
+
+    def end_section(self, section_name=""):
+        end_time = time.perf_counter()
+        if not self._open:
+            raise ValueError("No profiler section is open")
+        index = len(self._open) - 1
+        if section_name:
+            while index >= 0 and self._open[index][0].name != section_name:
+                index -= 1
+            if index < 0:
+                raise ValueError("Profiler section {} is not open".format(section_name))
+        section, start_time = self._open.pop(index)
+        section.count += 1
+        section.total_time += end_time - start_time
+
+    def report(self, period_sec=30):
+        """
+        Print the report if at least `period_sec` seconds passed since the last
+        one, so it can be called on every iteration of a long-running loop.
+        """
+        now = time.perf_counter()
+        if now - self._last_report_time < period_sec:
+            return
+        self._last_report_time = now
+        self.printer(self.format_report())
+
+    def get_stats(self) -> Dict[str, dict]:
+        """
+        Count, cumulative and mean seconds of every section, by section name.
+        """
+        return {
+            name: {"count": section.count, "total_time": section.total_time, "mean_time": section.mean_time}
+            for name, section in self.sections.items()
+        }
+
+    def format_report(self) -> str:
+        sections = sorted(self.sections.values(), key=lambda section: section.total_time, reverse=True)
+        lines = ["{:<24}{:>12}{:>14}{:>14}".format("section", "count", "total (s)", "mean (us)")]
+        for section in sections:
+            lines.append(
+                "{:<24}{:>12}{:>14.3f}{:>14.2f}".format(
+                    section.name, section.count, section.total_time, section.mean_time * 1e6
+                )
+            )
+        return "\n".join(lines)
@@ -0,0 +1,89 @@
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of the current process in bytes, or None where the
+    platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageRecord:
+    """
+    Measurements of one pipeline stage.
+
+    :param name: The stage name.
+    :param wall_time: Elapsed wall-clock time in seconds.
+    :param cpu_time: CPU time of the process in seconds (all threads).
+    :param rows_in: Number of rows the stage received, if known.
+    :param rows_out: Number of rows the stage produced, if known.
+    :param peak_rss_delta: Growth of the process's peak RSS in bytes while the stage ran.
+    """
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_rss_delta: Optional[int] = None
+
+
+@dataclass
+class PipelineTracer:
+    """
+    Collects a StageRecord for every stage run inside :meth:`stage`.
+
+    .. code-block:: python
+
+        tracer = PipelineTracer()
+        with tracer.stage("load", rows_in=0) as record:
+            df = load()
+            record.rows_out = len(df)
+        tracer.to_list()
+    """
+    stages: List[StageRecord] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """
+        Time the enclosed block as stage `name`. The yielded StageRecord can be
+        used to set ``rows_out`` (or ``rows_in``) once they are known. The record
+        is kept even if the block raises.
+        """
+        record = StageRecord(name=name, rows_in=rows_in)
+        rss_start = peak_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - wall_start
+            record.cpu_time = time.process_time() - cpu_start
+            rss_end = peak_rss_bytes()
+            if rss_start is not None and rss_end is not None:
+                record.peak_rss_delta = rss_end - rss_start
+            self.stages.append(record)
+
+    @property
+    def total_wall_time(self) -> float:
+        return sum(record.wall_time for record in self.stages)
+
+    def to_list(self) -> List[dict]:
+        """
+        The recorded stages as plain dicts, in the order they finished.
+        """
+        return [asdict(record) for record in self.stages]
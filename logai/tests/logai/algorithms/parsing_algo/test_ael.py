@@ -3,6 +3,7 @@ import pandas as pd
 
 from logai.algorithms.parsing_algo.ael import AELParams, AEL
 from logai.algorithms.parsing_algo.iplom import IPLoMParams, IPLoM
+from logai.utils.profiler import SimpleProfiler
 
 from tests.logai.test_utils.fixtures import logrecord_body
 
@@ -17,3 +18,10 @@ class TestAEL:
         parsed_loglines = parser.parse(logrecord_body['logline'])
 
         assert isinstance(parsed_loglines, pd.Series), 'parse returns pandas.Series'
+
+    def test_profiler_sections(self, logrecord_body):
+        profiler = SimpleProfiler()
+        AEL(self.params, profiler=profiler).parse(logrecord_body['logline'])
+        stats = profiler.get_stats()
+        for section in ["normalize", "load_data", "tokenize", "categorize", "reconcile"]:
+            assert stats[section]["count"] == 1, "{} was not profiled".format(section)
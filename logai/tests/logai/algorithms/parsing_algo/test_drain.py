@@ -3,7 +3,9 @@ import pandas as pd
 import pytest
 from pytest import approx
 
+from logai.algorithms.parsing_algo import drain
 from logai.algorithms.parsing_algo.drain import DrainParams, Drain
+from logai.utils.profiler import SimpleProfiler
 from tests.logai.test_utils.fixtures import logrecord_body
 
 class TestDrainConfig:
@@ -44,3 +46,138 @@ class TestDrain:
         assert parser.clusters_counter > 0, "log cluster number should be greater than zero after fit"
         assert isinstance(parser, Drain)
         assert isinstance(parsed_loglines, pd.Series), 'parse returns pandas.Series'
+
+    def test_single_pass_parse_matches_two_pass(self, logrecord_body):
+        loglines = logrecord_body['logline']
+        two_pass = Drain(self.params).parse(loglines)
+        single_pass = Drain(DrainParams(single_pass=True)).parse(loglines)
+        assert single_pass.equals(two_pass), "single-pass parse should produce the two-pass templates"
+
+    def test_single_pass_searches_tree_once_per_line(self, logrecord_body, monkeypatch):
+        loglines = logrecord_body['logline']
+        calls = []
+        tree_search = Drain._tree_search
+
+        def counting_tree_search(parser, *args):
+            calls.append(1)
+            return tree_search(parser, *args)
+
+        monkeypatch.setattr(Drain, "_tree_search", counting_tree_search)
+        # Without the line cache, which skips the search for repeated lines
+        Drain(DrainParams(single_pass=True, line_cache_size=0)).parse(loglines)
+        assert len(calls) == len(loglines), "each line should be searched in the tree once"
+
+    def test_line_cache_keeps_clusters(self, logrecord_body):
+        loglines = logrecord_body['logline']
+        uncached = Drain(DrainParams(line_cache_size=0))
+        cached = Drain(self.params)
+        uncached.fit(loglines)
+        cached.fit(loglines)
+        assert [(c.cluster_id, c.get_template(), c.size) for c in cached.clusters] == \
+            [(c.cluster_id, c.get_template(), c.size) for c in uncached.clusters]
+        stats = cached.get_cache_stats()
+        assert stats["hits"] + stats["misses"] == loglines.apply(lambda l: isinstance(l, str)).sum()
+        assert uncached.get_cache_stats() == {"hits": 0, "misses": 0, "size": 0}
+
+    def test_line_cache_hit_and_invalidation(self):
+        parser = Drain(self.params)
+        parser.fit(pd.Series(["user alice logged in", "user alice logged in", "user alice logged in"]))
+        # Created, then matched through the tree and cached, then served from the cache
+        assert parser.get_cache_stats() == {"hits": 1, "misses": 2, "size": 1}
+
+        parser.fit(pd.Series(["user bob logged in", "user alice logged in", "user alice logged in"]))
+        cluster = list(parser.clusters)[0]
+        assert cluster.get_template() == "user * logged in"
+        assert cluster.size == 6
+        # The template change clears the cache, so the next line is a miss
+        assert parser.get_cache_stats()["hits"] == 2
+        assert parser.get_cache_stats()["misses"] == 4
+
+    def test_line_cache_with_two_clusters_in_one_leaf(self):
+        # Same length and first token, so both clusters share a leaf of the prefix tree
+        lines = pd.Series([
+            "job 17 started on host alpha",
+            "job finished cleanly after retry three",
+            "job 17 started on host alpha",
+            "job 18 started on host beta",
+            "job finished cleanly after retry four",
+            "job 17 started on host alpha",
+            "job finished cleanly after retry three",
+        ])
+        uncached = Drain(DrainParams(line_cache_size=0))
+        cached = Drain(self.params)
+        assert [cached._add_log_message(l)[0].cluster_id for l in lines] == \
+            [uncached._add_log_message(l)[0].cluster_id for l in lines]
+        assert len(cached.clusters) == 2
+        assert cached.get_cache_stats()["size"] == 2
+
+        # A template change in either cluster invalidates every cached line
+        assert cached._add_log_message("job 19 started by host gamma")[1] == "cluster_template_changed"
+        assert cached.get_cache_stats()["size"] == 0
+
+    def test_line_cache_cleared_on_new_cluster(self):
+        parser = Drain(self.params)
+        parser.fit(pd.Series(["disk full on sda", "disk full on sda"]))
+        assert parser.get_cache_stats()["size"] == 1
+        parser.fit(pd.Series(["connection reset by peer now"]))
+        assert parser.get_cache_stats()["size"] == 0
+
+    @pytest.mark.parametrize("single_pass", [False, True])
+    def test_parallel_parse_matches_serial(self, logrecord_body, monkeypatch, single_pass):
+        monkeypatch.setattr(drain, "PARALLEL_MIN_LINES", 0)
+        loglines = logrecord_body['logline']
+        serial = Drain(DrainParams(single_pass=single_pass))
+        parallel = Drain(DrainParams(single_pass=single_pass, n_jobs=2))
+        parsed = serial.parse(loglines)
+        assert parallel.parse(loglines).equals(parsed)
+        assert [(c.cluster_id, c.get_template(), c.size) for c in parallel.clusters] == \
+            [(c.cluster_id, c.get_template(), c.size) for c in serial.clusters]
+        assert parallel.clusters_counter == serial.clusters_counter
+        # The merged prefix tree finds the same clusters
+        for template in set(parsed):
+            assert parallel.match(template).cluster_id == serial.match(template).cluster_id
+
+    def test_parallel_falls_back_to_serial_with_max_clusters(self, logrecord_body, monkeypatch):
+        monkeypatch.setattr(drain, "PARALLEL_MIN_LINES", 0)
+        parser = Drain(DrainParams(max_clusters=5, n_jobs=2))
+        assert not parser._use_parallel(logrecord_body['logline'])
+
+    def test_state_round_trip(self, logrecord_body, tmp_path):
+        loglines = logrecord_body['logline']
+        first, rest = loglines[:len(loglines) // 2], loglines[len(loglines) // 2:]
+        continuous = Drain(self.params)
+        continuous.fit(first)
+
+        state_path = str(tmp_path / "drain_state.json")
+        continuous.save_state(state_path)
+        restored = Drain(DrainParams())
+        restored.load_state(state_path)
+        assert [(c.cluster_id, c.get_template(), c.size) for c in restored.clusters] == \
+            [(c.cluster_id, c.get_template(), c.size) for c in continuous.clusters]
+
+        # Learning continues with the same cluster ids
+        continuous.fit(rest)
+        restored.fit(rest)
+        assert restored.clusters_counter == continuous.clusters_counter
+        assert [(c.cluster_id, c.get_template(), c.size) for c in restored.clusters] == \
+            [(c.cluster_id, c.get_template(), c.size) for c in continuous.clusters]
+
+    def test_load_state_rejects_other_tree_params(self, tmp_path):
+        parser = Drain(self.params)
+        parser.fit(pd.Series(["disk full on sda"]))
+        state_path = str(tmp_path / "drain_state.json")
+        parser.save_state(state_path)
+        with pytest.raises(ValueError):
+            Drain(DrainParams(depth=4)).load_state(state_path)
+
+    def test_profiler_sections(self, logrecord_body):
+        loglines = logrecord_body['logline']
+        profiler = SimpleProfiler()
+        Drain(DrainParams(line_cache_size=0), profiler=profiler).parse(loglines)
+        stats = profiler.get_stats()
+        assert stats["normalize"]["count"] == 1
+        assert stats["fit"]["count"] == 1
+        assert stats["match"]["count"] == 1
+        assert stats["tree_search"]["count"] == stats["create_cluster"]["count"] + stats["cluster_exist"]["count"]
+        # Every section ran inside parse
+        assert stats["fit"]["total_time"] >= stats["tree_search"]["total_time"]
@@ -2,6 +2,7 @@
 import pandas as pd
 
 from logai.algorithms.parsing_algo.iplom import IPLoMParams, IPLoM
+from logai.utils.profiler import SimpleProfiler
 
 from tests.logai.test_utils.fixtures import logrecord_body
 
@@ -15,3 +16,11 @@ class TestIPLoM:
         parsed_loglines = parser.parse(logrecord_body['logline'])
         assert isinstance(parser, IPLoM)
         assert isinstance(parsed_loglines, pd.Series), 'parse returns pandas.Series'
+
+    def test_profiler_sections(self, logrecord_body):
+        profiler = SimpleProfiler()
+        IPLoM(self.params, profiler=profiler).parse(logrecord_body['logline'])
+        stats = profiler.get_stats()
+        assert stats["normalize"]["count"] == 1
+        assert all(stats[step]["count"] == 1 for step in stats if step.startswith("step"))
+        assert len([step for step in stats if step.startswith("step")]) == 4
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import logai
+from logai.algorithms.factory import factory
+
+ALGORITHM_PACKAGES = [
+    "logai.algorithms.parsing_algo",
+    "logai.algorithms.vectorization_algo",
+    "logai.algorithms.anomaly_detection_algo",
+    "logai.algorithms.clustering_algo",
+]
+HEAVY_MODULES = ["torch", "gensim", "transformers", "tokenizers", "datasets", "sklearn", "nltk"]
+# Cold import budget for the algorithm packages; importing any of the heavy
+# modules above costs several times this.
+IMPORT_BUDGET_MS = float(os.environ.get("LOGAI_IMPORT_BUDGET_MS", 1000))
+
+
+def _run_python(*args):
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(logai.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+class TestAlgorithmFactory:
+
+    def test_packages_register_without_importing_algorithms(self):
+        code = (
+            "import sys\n"
+            + "".join(f"import {package}\n" for package in ALGORITHM_PACKAGES)
+            + f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        loaded = _run_python("-c", code).stdout.strip()
+        assert loaded == "", f"algorithm packages imported {loaded} at import time"
+
+    def test_lazy_names_are_available(self):
+        import logai.algorithms.parsing_algo
+        import logai.algorithms.vectorization_algo
+        assert {"drain", "ael", "iplom"} <= set(factory.available_algorithms("parsing"))
+        assert {"tfidf", "word2vec", "fasttext"} <= set(factory.available_algorithms("vectorization"))
+
+    def test_lookup_imports_algorithm(self):
+        import logai.algorithms.parsing_algo
+        from logai.algorithms.parsing_algo.drain import Drain, DrainParams
+        assert factory.get_config_class("parsing", "drain") is DrainParams
+        assert factory.get_algorithm_class("parsing", "drain") is Drain
+        assert logai.algorithms.parsing_algo.Drain is Drain
+
+    def test_cold_import_time(self):
+        code = "".join(f"import {package}\n" for package in ALGORITHM_PACKAGES)
+        stderr = _run_python("-X", "importtime", "-c", code).stderr
+        total_us = 0
+        for line in stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                self_us = line.split(":", 1)[1].split("|")[0].strip()
+                if self_us.isdigit():
+                    total_us += int(self_us)
+        assert total_us / 1000 < IMPORT_BUDGET_MS, \
+            f"cold import took {total_us / 1000:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
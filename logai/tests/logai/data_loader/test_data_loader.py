@@ -2,7 +2,7 @@
 import os
 import pandas as pd
 
-from logai.dataloader.data_loader import DataLoaderConfig, FileDataLoader
+from logai.dataloader.data_loader import DataLoaderConfig, FileDataLoader, InMemoryDataLoaderConfig, InMemoryDataLoader
 from logai.dataloader.data_model import LogRecordObject
 from logai.utils import constants
 
@@ -171,3 +171,52 @@ class TestFileDataLoader:
         assert len(logrecord.attributes.columns) == 2, "Attributes should contain 2 columns"
         for c in logrecord.attributes.columns:
             assert c in ["Action", "ID"], "Attribute column name does not match"
+
+
+class TestInMemoryDataLoader:
+
+    def test_matches_file_loader(self):
+        test_fpath = os.path.join(TEST_DATA_PATH, "HealthApp_format_2000.csv")
+        dimensions = {
+            "attributes": ["Action", "ID"],
+            "body": ["Details"]
+        }
+        file_record = FileDataLoader(
+            DataLoaderConfig(filepath=test_fpath, log_type='csv', dimensions=dimensions, reader_args={"header": 0})
+        ).load_data()
+
+        df = pd.read_csv(test_fpath, header=0)
+        memory_record = InMemoryDataLoader(
+            InMemoryDataLoaderConfig(data=df, dimensions=dimensions)
+        ).load_data()
+
+        assert memory_record.body.columns[0] == constants.LOGLINE_NAME, "Logline name does not match"
+        pd.testing.assert_frame_equal(memory_record.body, file_record.body)
+        pd.testing.assert_frame_equal(memory_record.attributes, file_record.attributes)
+
+    def test_timestamp_dimension(self):
+        df = pd.DataFrame({
+            "logline": ["service started", "connection refused"],
+            "timestamp": ["2024-01-01 10:00:00", "2024-01-01 10:00:05"]
+        })
+        config = InMemoryDataLoaderConfig(
+            data=df,
+            dimensions={"body": ["logline"], "timestamp": ["timestamp"]},
+            infer_datetime=True
+        )
+        logrecord = InMemoryDataLoader(config).load_data()
+        assert logrecord.timestamp.columns[0] == constants.LOG_TIMESTAMPS, "Timestamp column name is not correct."
+        assert len(logrecord.body) == 2, "Body should contain every row"
+        assert list(df.columns) == ["logline", "timestamp"], "Input frame should not be modified"
+
+    def test_log_record_passthrough(self):
+        body = pd.DataFrame({constants.LOGLINE_NAME: ["a", "b"]})
+        logrecord = LogRecordObject(body=body)
+        config = InMemoryDataLoaderConfig(data=logrecord)
+        assert InMemoryDataLoader(config).load_data() is logrecord
+
+    def test_from_dict(self):
+        df = pd.DataFrame({"logline": ["a"]})
+        config = InMemoryDataLoaderConfig.from_dict({"data": df, "dimensions": {"body": ["logline"]}})
+        assert config.data is df
+        assert config.dimensions == {"body": ["logline"]}
@@ -1,4 +1,6 @@
 
+import os
+
 import pandas as pd
 
 from logai.algorithms.parsing_algo.drain import DrainParams
@@ -61,3 +63,14 @@ class TestLogParser:
 
         assert parser.parser is not None, "Parsing model are not successfully trained."
         assert isinstance(res, pd.DataFrame), "Parsing result format is not pd.DataFrame"
+
+    def test_state_path_warm_start(self, logrecord_body, tmp_path):
+        state_path = str(tmp_path / "drain_state.json")
+        loglines = logrecord_body[constants.LOGLINE_NAME]
+
+        first = LogParser(LogParserConfig(state_path=state_path))
+        first.parse(loglines)
+        assert os.path.exists(state_path), "Parser state was not saved."
+
+        second = LogParser(LogParserConfig(state_path=state_path))
+        assert second.parser.clusters_counter == first.parser.clusters_counter, "Parser state was not loaded."
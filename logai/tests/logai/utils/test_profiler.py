@@ -0,0 +1,45 @@
+import pytest
+
+from logai.utils.profiler import NullProfiler, SimpleProfiler, profile_section
+
+
+class TestSimpleProfiler:
+
+    def test_sections_counted(self):
+        profiler = SimpleProfiler()
+        for _ in range(3):
+            profiler.start_section("outer")
+            profiler.start_section("inner")
+            profiler.end_section()
+            profiler.end_section("outer")
+
+        stats = profiler.get_stats()
+        assert stats["outer"]["count"] == 3
+        assert stats["inner"]["count"] == 3
+        assert stats["outer"]["total_time"] >= stats["inner"]["total_time"]
+        assert stats["inner"]["mean_time"] == pytest.approx(stats["inner"]["total_time"] / 3)
+
+    def test_end_unknown_section(self):
+        profiler = SimpleProfiler()
+        with pytest.raises(ValueError):
+            profiler.end_section()
+        profiler.start_section("parse")
+        with pytest.raises(ValueError):
+            profiler.end_section("fit")
+
+    def test_report_period(self):
+        reports = []
+        profiler = SimpleProfiler(printer=reports.append)
+        with profile_section(profiler, "parse"):
+            pass
+        profiler.report(period_sec=3600)
+        assert reports == []
+        profiler.report(period_sec=0)
+        assert len(reports) == 1
+        assert "parse" in reports[0]
+
+    def test_null_profiler_is_falsy(self):
+        profiler = NullProfiler()
+        assert not profiler
+        with profile_section(profiler, "parse"):
+            pass
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from logai.utils.tracing import PipelineTracer, StageRecord
+
+
+class TestPipelineTracer:
+
+    def test_stage_records_measurements(self):
+        tracer = PipelineTracer()
+        with tracer.stage("load", rows_in=10) as record:
+            time.sleep(0.01)
+            record.rows_out = 7
+
+        assert len(tracer.stages) == 1
+        stage = tracer.stages[0]
+        assert isinstance(stage, StageRecord)
+        assert stage.name == "load"
+        assert stage.rows_in == 10
+        assert stage.rows_out == 7
+        assert stage.wall_time >= 0.01
+        assert stage.cpu_time >= 0
+        assert stage.peak_rss_delta is None or stage.peak_rss_delta >= 0
+
+    def test_stages_kept_in_order(self):
+        tracer = PipelineTracer()
+        for name in ["load", "parse", "detect"]:
+            with tracer.stage(name):
+                pass
+        assert [stage["name"] for stage in tracer.to_list()] == ["load", "parse", "detect"]
+        assert tracer.total_wall_time == pytest.approx(sum(s.wall_time for s in tracer.stages))
+
+    def test_stage_recorded_when_block_raises(self):
+        tracer = PipelineTracer()
+        with pytest.raises(ValueError):
+            with tracer.stage("broken"):
+                raise ValueError("boom")
+        assert tracer.to_list()[0]["name"] == "broken"